@@ -0,0 +1,311 @@
+"""
+Retries with jittered backoff, and hedged requests, for Vision calls.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Any exception from call_vision_api() used to mark the app 'error' and
+    it stayed that way until a manual --ttb-id rerun, while a single slow
+    response (events.py api_slow, 16 s+) held its worker the whole time.
+
+    Retries: timeouts, connection errors and 408/409/429/5xx (incl. 529
+    overloaded) are retried up to VISION_MAX_RETRIES times. The wait is
+    "full jitter" exponential backoff, uniform(0, base * 2^attempt) capped
+    at VISION_BACKOFF_MAX, so workers that failed together don't retry
+    together. When the response carries Retry-After (or retry-after-ms) the
+    wait is that long plus a little jitter instead. The Anthropic client is
+    created with max_retries=0 so the SDK doesn't retry underneath.
+
+    Hedging (--hedge): when an attempt is still running after the p95 of
+    recent response times, a duplicate request is sent and whichever reply
+    arrives first is used. The loser is left to finish (its reply is
+    ignored) so its latency shows how much time the hedge saved. Until
+    VISION_HEDGE_MIN_SAMPLES responses have been seen there is no p95 and
+    no hedging. At most one hedge per attempt, so the extra load is about
+    (100 - VISION_HEDGE_PERCENTILE)% of requests.
+
+    send(attempt) performs one request: once it holds its concurrency slot
+    it calls attempt.begin(), which starts the hedge clock (so time spent
+    queued for a slot never triggers a hedge) and raises Superseded if the
+    other attempt already won. send() reports the response time via
+    record_latency().
+
+Inputs:
+    - send callables from process_labels.py (sync or async)
+    - config.py: VISION_MAX_RETRIES, VISION_BACKOFF_BASE, VISION_BACKOFF_MAX,
+      VISION_HEDGE_PERCENTILE, VISION_HEDGE_MIN_SAMPLES
+
+Outputs:
+    - counters(): retries, Retry-After waits, recovered / gave-up calls,
+      hedges fired / won, and seconds saved by winning hedges
+
+Created: February 2026
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    VISION_MAX_RETRIES,
+    VISION_BACKOFF_BASE,
+    VISION_BACKOFF_MAX,
+    VISION_HEDGE_PERCENTILE,
+    VISION_HEDGE_MIN_SAMPLES,
+)
+
+RETRY_AFTER_MAX = 120.0  # ignore absurd Retry-After values beyond this
+LATENCY_WINDOW = 200     # recent responses the hedge percentile is taken over
+
+_counters = {"retries": 0, "retry_after_waits": 0, "recovered": 0, "gave_up": 0,
+             "hedges": 0, "hedge_wins": 0, "hedge_saved_seconds": 0.0}
+_counters_lock = threading.Lock()
+_latencies = []
+
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+_background = set()  # async losers still running, kept referenced until done
+
+
+class Superseded(Exception):
+    """Raised by send() when another attempt already produced the reply."""
+
+
+def _count(name: str, amount: float = 1):
+    with _counters_lock:
+        _counters[name] += amount
+
+
+def counters() -> dict:
+    with _counters_lock:
+        return dict(_counters)
+
+
+# ── Error classification ──
+
+def retryable(e: Exception) -> bool:
+    """Timeouts, connection errors, 408/409/429 and 5xx (529 overloaded included)."""
+    import anthropic  # already loaded by whoever raised e
+
+    if isinstance(e, anthropic.APIConnectionError):  # includes APITimeoutError
+        return True
+    status = getattr(e, "status_code", None)
+    return status in (408, 409, 429) or (status is not None and status >= 500)
+
+
+def retry_after(e: Exception) -> float | None:
+    """Seconds from a Retry-After / retry-after-ms response header, if present."""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after-ms")) / 1000
+    except (TypeError, ValueError):
+        pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        import email.utils
+
+        parsed = email.utils.parsedate_tz(value)
+        return max(0.0, email.utils.mktime_tz(parsed) - time.time()) if parsed else None
+
+
+def backoff_delay(attempt: int, e: Exception) -> float:
+    """Wait before retry number `attempt` (0-based)."""
+    server_wait = retry_after(e)
+    if server_wait is not None and server_wait <= RETRY_AFTER_MAX:
+        _count("retry_after_waits")
+        return server_wait + random.uniform(0, VISION_BACKOFF_BASE / 2)
+    return random.uniform(0, min(VISION_BACKOFF_MAX, VISION_BACKOFF_BASE * 2 ** attempt))
+
+
+# ── Latency percentile ──
+
+def record_latency(seconds: float):
+    """Add one response time (request sent to reply, excluding slot waits)."""
+    with _counters_lock:
+        _latencies.append(seconds)
+        del _latencies[:-LATENCY_WINDOW]
+
+
+def hedge_after() -> float | None:
+    """p(VISION_HEDGE_PERCENTILE) of recent responses, or None until enough are seen."""
+    with _counters_lock:
+        if len(_latencies) < VISION_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(_latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * VISION_HEDGE_PERCENTILE / 100))]
+
+
+def _record_hedge_win(won_at: float):
+    """Callback factory: when the losing primary finishes, credit the time saved."""
+    def done(outcome):
+        if not outcome.cancelled() and outcome.exception() is None:
+            _count("hedge_saved_seconds", time.monotonic() - won_at)
+    return done
+
+
+class Attempt:
+    """One request of a call; send() calls begin() right before the request goes out."""
+
+    def __init__(self, settled=None):
+        self._settled = settled  # () -> True once another attempt has won
+        self.sent_at = None
+
+    def begin(self):
+        """Raise Superseded if the reply is already in hand, else start the hedge clock."""
+        if self._settled is not None and self._settled():
+            raise Superseded()
+        self.sent_at = time.monotonic()
+
+    def hedge_due(self, threshold: float) -> float | None:
+        """Seconds until this attempt should be hedged, or None while it hasn't been sent."""
+        if self.sent_at is None:
+            return None
+        return self.sent_at + threshold - time.monotonic()
+
+
+def _retrying(attempt: int, e: Exception) -> float:
+    """Backoff before the next try, or re-raise if `e` isn't worth retrying."""
+    if not retryable(e) or attempt >= VISION_MAX_RETRIES:
+        if attempt:
+            _count("gave_up")
+        raise e
+    delay = backoff_delay(attempt, e)
+    _count("retries")
+    print(f"  Vision retry {attempt + 1}/{VISION_MAX_RETRIES} in {delay:.1f}s: {e}")
+    return delay
+
+
+# ── Sync ──
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="vision-hedge")
+    return _hedge_pool
+
+
+def _hedged(send):
+    """One attempt, duplicated once if it runs past the hedge threshold after being sent."""
+    threshold = hedge_after()
+    if threshold is None:
+        return send(Attempt())
+
+    settled = threading.Event()
+    pool = _get_hedge_pool()
+    first = Attempt(settled.is_set)
+    primary = pool.submit(send, first)
+    while not primary.done():
+        due = first.hedge_due(threshold)
+        if due is not None and due <= 0:
+            break
+        wait([primary], timeout=0.05 if due is None else due)
+    if primary.done():
+        return primary.result()
+
+    _count("hedges")
+    hedge = pool.submit(send, Attempt(settled.is_set))
+    running = {primary, hedge}
+    first_error = None
+    while running:
+        done, running = wait(running, return_when=FIRST_COMPLETED)
+        for finished in done:
+            if finished.exception() is None:
+                settled.set()
+                if finished is hedge:
+                    _count("hedge_wins")
+                    primary.add_done_callback(_record_hedge_win(time.monotonic()))
+                return finished.result()
+            if first_error is None or isinstance(first_error, Superseded):
+                first_error = finished.exception()
+    raise first_error
+
+
+def call(send, hedge: bool = False):
+    """Run send(attempt) with retries (and hedging); returns its result or raises the last error."""
+    attempt = 0
+    while True:
+        try:
+            result = _hedged(send) if hedge else send(Attempt())
+        except Exception as e:
+            time.sleep(_retrying(attempt, e))
+            attempt += 1
+            continue
+        if attempt:
+            _count("recovered")
+        return result
+
+
+# ── Async ──
+
+async def _hedged_async(send):
+    import asyncio
+
+    threshold = hedge_after()
+    if threshold is None:
+        return await send(Attempt())
+
+    settled = False
+    is_settled = lambda: settled
+    first = Attempt(is_settled)
+    primary = asyncio.ensure_future(send(first))
+    while not primary.done():
+        due = first.hedge_due(threshold)
+        if due is not None and due <= 0:
+            break
+        await asyncio.wait({primary}, timeout=0.05 if due is None else due)
+    if primary.done():
+        return primary.result()
+
+    _count("hedges")
+    hedge = asyncio.ensure_future(send(Attempt(is_settled)))
+    running = {primary, hedge}
+    first_error = None
+    while running:
+        done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for finished in done:
+            if finished.exception() is None:
+                settled = True
+                for loser in running:
+                    _background.add(loser)
+                    loser.add_done_callback(_background.discard)
+                if finished is hedge:
+                    _count("hedge_wins")
+                    primary.add_done_callback(_record_hedge_win(time.monotonic()))
+                return finished.result()
+            if first_error is None or isinstance(first_error, Superseded):
+                first_error = finished.exception()
+    raise first_error
+
+
+async def call_async(send, hedge: bool = False):
+    """Async call(): `send(attempt)` is a coroutine function."""
+    import asyncio
+
+    attempt = 0
+    while True:
+        try:
+            result = await (_hedged_async(send) if hedge else send(Attempt()))
+        except Exception as e:
+            await asyncio.sleep(_retrying(attempt, e))
+            attempt += 1
+            continue
+        if attempt:
+            _count("recovered")
+        return result
@@ -0,0 +1,220 @@
+"""
+asyncio extraction engine with a rate limiter for the Claude API.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Drives process_labels.py's stages from a single event loop so one
+    process can keep the Claude API at its rate limit without a thread per
+    request. Vision calls go through anthropic.AsyncAnthropic; blocking work
+    is pushed to executors:
+
+    - EasyOCR runs on a small CPU thread pool (torch releases the GIL)
+    - SQLite, cropping and export run on a single "db" thread that owns
+      the connection, so writes stay serialized
+
+    RateLimiter combines three limits, all of which must admit a request:
+    - a semaphore capping requests in flight
+    - a token bucket for requests/minute
+    - a token bucket for input tokens/minute (estimated before the call,
+      then corrected from response.usage.input_tokens)
+
+Inputs:
+    - List of pending (ttbId, front_image, back_image) rows
+    - Stage callables supplied by process_labels.py
+    - Limits from config.py: API_REQUESTS_PER_MIN, API_INPUT_TOKENS_PER_MIN
+
+Actions:
+    - Checks the STOP file before starting each application
+    - Bounds applications in flight to twice the API concurrency
+
+Outputs:
+    - Per-app elapsed times and a stopped flag
+
+Created: February 2026
+"""
+
+import asyncio
+import functools
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_min`.
+
+    Capacity defaults to one minute's worth, so a cold start can burst up
+    to the per-minute limit and then settles to the steady rate.
+    """
+
+    def __init__(self, rate_per_min: float, capacity: float | None = None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float):
+        # A request bigger than the bucket could never be admitted; cap it
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, delta: float):
+        """Charge (positive) or refund (negative) tokens after the fact."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class RateLimiter:
+    """Concurrency + requests/min + input tokens/min limiter for API calls."""
+
+    def __init__(self, max_concurrency: int, requests_per_min: float, input_tokens_per_min: float):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.requests = TokenBucket(requests_per_min)
+        self.input_tokens = TokenBucket(input_tokens_per_min)
+        self.waited_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """Wait for room to send one request of ~estimated_tokens input tokens.
+
+        Set `slot.actual_tokens` inside the block to correct the estimate.
+        """
+        start = time.monotonic()
+        async with self.semaphore:
+            await self.requests.acquire(1)
+            await self.input_tokens.acquire(estimated_tokens)
+            self.waited_seconds += time.monotonic() - start
+
+            class _Slot:
+                actual_tokens = None
+
+            slot = _Slot()
+            yield slot
+            if slot.actual_tokens is not None:
+                self.input_tokens.adjust(slot.actual_tokens - estimated_tokens)
+
+
+async def _run(pending: list, db_path: str, stop_file: str, begin, vision_async, ocr, finish, fail,
+               limiter: RateLimiter, concurrency: int, ocr_threads: int) -> tuple[list[float], bool]:
+    loop = asyncio.get_running_loop()
+    db_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+    ocr_pool = ThreadPoolExecutor(max_workers=ocr_threads, thread_name_prefix="ocr")
+
+    # The db thread owns the connection; it's only ever touched from there
+    conn = await loop.run_in_executor(db_pool, lambda: sqlite3.connect(db_path, timeout=30, check_same_thread=False))
+
+    def db(fn, *args):
+        return loop.run_in_executor(db_pool, fn, conn, *args)
+
+    app_slots = asyncio.Semaphore(concurrency * 2)
+    app_times = []
+    rows = getattr(pending, "next", None) or functools.partial(next, iter(pending), None)
+
+    def take() -> tuple[tuple | None, int]:
+        """The next row and the current total. A LeaseQueue claims in a write
+        transaction and counts with a query, so this runs on the db thread."""
+        return rows(), len(pending)
+
+    async def handle(n: int, total: int, ttb_id: str, front_img: str, back_img: str):
+        app_start = time.time()
+        print(f"[{n}/{total}] Processing {ttb_id}...")
+        job = {"n": n, "ttb_id": ttb_id, "start": app_start, "error": None}
+        try:
+            job["front_path"], job["back_path"] = await db(begin, ttb_id, front_img or "", back_img or "")
+            try:
+                job["fields"] = await vision_async(job["front_path"], job["back_path"], limiter, ttb_id=ttb_id)
+            except Exception as e:
+                job["error"] = e
+                job["error_stage"] = "vision"
+            if job["error"] is None:
+                job["front_ocr"], job["back_ocr"] = await loop.run_in_executor(
+                    ocr_pool, functools.partial(ocr, job["front_path"], job["back_path"], ttb_id=ttb_id)
+                )
+        except Exception as e:
+            job["error"] = e
+            job["error_stage"] = "ocr"
+        try:
+            await db(finish, job)
+        except Exception as e:
+            await db(fail, ttb_id, e)
+        finally:
+            app_slots.release()
+        elapsed = time.time() - app_start
+        app_times.append(elapsed)
+        print(f"  ⏱ {elapsed:.1f}s for {ttb_id}")
+
+    stopped = False
+    tasks = []
+    try:
+        n = 0
+        while True:
+            await app_slots.acquire()
+            # Check for stop signal before each label
+            if os.path.exists(stop_file):
+                app_slots.release()
+                stopped = True
+                break
+            row, total = await loop.run_in_executor(db_pool, take)
+            if row is None:
+                app_slots.release()
+                break
+            n += 1
+            tasks.append(asyncio.create_task(handle(n, total, *row)))
+        await asyncio.gather(*tasks)
+    finally:
+        await loop.run_in_executor(db_pool, conn.close)
+        db_pool.shutdown(wait=True)
+        ocr_pool.shutdown(wait=True)
+
+    if limiter.waited_seconds:
+        print(f"\nRate limiter: {limiter.waited_seconds:.1f}s total wait across requests")
+    return app_times, stopped
+
+
+def run_async(pending: list, db_path: str, stop_file: str, begin, vision_async, ocr, finish, fail,
+              concurrency: int, requests_per_min: float, input_tokens_per_min: float,
+              ocr_threads: int = 2) -> tuple[list[float], bool]:
+    """Process pending apps on an asyncio event loop.
+
+    Args:
+        pending: (ttbId, front_img, back_img) rows, or a leases.LeaseQueue
+            (claimed and counted on the db thread)
+        db_path: SQLite database (opened on the dedicated db thread)
+        stop_file: Path checked before each app is started
+        begin(conn, ttb_id, front_img, back_img) -> (front_path, back_path)
+        vision_async(front_path, back_path, limiter, ttb_id=) -> fields: coroutine
+        ocr(front_path, back_path, ttb_id=) -> (front_ocr, back_ocr): blocking
+        finish(conn, job): stores results or the error in job["error"]
+        fail(conn, ttb_id, exc): records an unexpected error
+        concurrency: Vision requests in flight at once
+        requests_per_min / input_tokens_per_min: API rate limits
+
+    Returns (per-app elapsed times, stopped_early).
+    """
+    async def go():
+        # Limiter primitives must be created inside the running loop
+        limiter = RateLimiter(concurrency, requests_per_min, input_tokens_per_min)
+        return await _run(pending, db_path, stop_file, begin, vision_async, ocr, finish, fail,
+                          limiter, concurrency, ocr_threads)
+
+    return asyncio.run(go())
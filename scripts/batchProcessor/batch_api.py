@@ -0,0 +1,307 @@
+"""
+Anthropic Message Batches submission mode for large backlogs.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    For overnight backfills we don't need interactive latency, so instead
+    of one messages.create() per app we package pending apps into Message
+    Batches requests (custom_id = ttbId), poll until each batch has ended,
+    and then run the OCR/crop/export half of the pipeline on the results.
+
+    Batch IDs are written to processing.db as soon as a batch is created,
+    so a restart mid-batch picks up where it left off: open batches are
+    polled and collected first, and their apps (status 'processing') are
+    never resubmitted. Collection is idempotent per app — only apps still
+    in 'processing' are finished.
+
+    Works against any server implementing the batch endpoints; point
+    ANTHROPIC_BASE_URL at tools/stub_anthropic_server.py to test locally.
+
+Inputs:
+    - List of pending (ttbId, front_image, back_image) rows
+    - Stage callables supplied by process_labels.py
+    - data/processing.db: vision_batches / vision_batch_items tables
+
+Actions:
+    - Creates the batch tables if missing (idempotent)
+    - Resumes open batches, then submits pending apps in size-capped chunks
+      (apps with a cached Vision reply are finished without submitting)
+    - Polls every poll_interval seconds; STOP halts polling (resume later)
+    - Finishes each app as its result is read
+
+Outputs:
+    - Database updates: batch rows, per-app results via finish()
+    - Events: batch_api_submitted, batch_api_ended
+
+Created: February 2026
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import events
+
+# API limits are 100,000 requests / 256 MB per batch; stay well under
+BATCH_MAX_REQUESTS = 10000
+BATCH_MAX_BYTES = 200 * 1024 * 1024
+
+
+def ensure_batch_tables(conn: sqlite3.Connection):
+    """Create the batch tracking tables if they don't exist."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vision_batches (
+            batch_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            request_count INTEGER,
+            created_at TEXT,
+            ended_at TEXT,
+            collected_at TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vision_batch_items (
+            ttbId TEXT NOT NULL,
+            batch_id TEXT NOT NULL REFERENCES vision_batches(batch_id),
+            status TEXT NOT NULL DEFAULT 'submitted',
+            PRIMARY KEY (ttbId, batch_id)
+        )
+    """)
+    conn.commit()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _submit(client, conn: sqlite3.Connection, requests: list[dict], ttb_ids: list[str]) -> str:
+    batch = client.messages.batches.create(requests=requests)
+    # Record the batch before anything else — it is paid work from here on
+    conn.execute(
+        "INSERT INTO vision_batches (batch_id, status, request_count, created_at) VALUES (?, ?, ?, ?)",
+        (batch.id, batch.processing_status, len(requests), _now()),
+    )
+    conn.executemany(
+        "INSERT INTO vision_batch_items (ttbId, batch_id) VALUES (?, ?)",
+        [(ttb_id, batch.id) for ttb_id in ttb_ids],
+    )
+    conn.commit()
+    events.batch_api_submitted(batch.id, len(requests))
+    print(f"Submitted batch {batch.id} ({len(requests)} requests)")
+    return batch.id
+
+
+def finish_app(conn: sqlite3.Connection, ttb_id: str, front_path: str | None, back_path: str | None,
+               fields: list[dict] | None, error: Exception | None, ocr, finish) -> bool:
+    """Run the OCR/crop/export half for one app's Vision result. Returns True on success."""
+    job = {"ttb_id": ttb_id, "front_path": front_path, "back_path": back_path,
+           "fields": fields, "error": error, "error_stage": "vision"}
+    if error is None:
+        print("  Running OCR...")
+        try:
+            job["front_ocr"], job["back_ocr"] = ocr(front_path, back_path, ttb_id=ttb_id)
+        except Exception as e:
+            job["error"] = e
+            job["error_stage"] = "ocr"
+    finish(conn, job)
+    return job["error"] is None
+
+
+def submit_pending(client, conn: sqlite3.Connection, pending: list, begin, build_params, fail,
+                   cached, ocr, finish, stop_file: str) -> tuple[list[str], list[float]]:
+    """Package pending apps into size-capped batches.
+
+    Apps with a cached Vision reply are finished right away instead of
+    being submitted. Returns (new batch IDs, elapsed times of cached apps).
+    """
+    batch_ids = []
+    cached_times = []
+    requests, ttb_ids, size = [], [], 0
+
+    for ttb_id, front_img, back_img in pending:
+        if os.path.exists(stop_file):
+            break
+        front_path, back_path = begin(conn, ttb_id, front_img or "", back_img or "")
+
+        app_start = time.time()
+        fields = cached(front_path, back_path, ttb_id)
+        if fields is not None:
+            print(f"Finishing {ttb_id} from cache...")
+            finish_app(conn, ttb_id, front_path, back_path, fields, None, ocr, finish)
+            cached_times.append(time.time() - app_start)
+            continue
+
+        params = build_params(front_path, back_path)
+        if params is None:
+            fail(conn, ttb_id, "No label images")
+            continue
+        request = {"custom_id": ttb_id, "params": params}
+        request_size = len(json.dumps(request))
+
+        if requests and (len(requests) >= BATCH_MAX_REQUESTS or size + request_size > BATCH_MAX_BYTES):
+            batch_ids.append(_submit(client, conn, requests, ttb_ids))
+            requests, ttb_ids, size = [], [], 0
+
+        requests.append(request)
+        ttb_ids.append(ttb_id)
+        size += request_size
+
+    if requests:
+        batch_ids.append(_submit(client, conn, requests, ttb_ids))
+    return batch_ids, cached_times
+
+
+def _result_error(result) -> str:
+    """Human-readable message for an errored/canceled/expired result."""
+    if result.type == "errored":
+        try:
+            return f"Batch request errored: {result.error.error.message}"
+        except AttributeError:
+            return f"Batch request errored: {result.error}"
+    return f"Batch request {result.type}"
+
+
+def collect_batch(client, conn: sqlite3.Connection, batch_id: str, paths, parse, ocr, finish, fail,
+                  remember, cache_key, usage=None) -> list[float]:
+    """Finish every app in an ended batch. Returns per-app elapsed times."""
+    # Only apps still waiting on this batch — makes re-collection after a crash safe
+    rows = conn.execute("""
+        SELECT i.ttbId, a.front_image_path, a.back_image_path
+        FROM vision_batch_items i
+        JOIN applications a ON a.ttbId = i.ttbId
+        JOIN processing_results p ON p.ttbId = i.ttbId
+        WHERE i.batch_id = ? AND i.status = 'submitted' AND p.status = 'processing'
+    """, (batch_id,)).fetchall()
+    waiting = {r[0]: (r[1], r[2]) for r in rows}
+
+    app_times = []
+    succeeded = errored = 0
+    for entry in client.messages.batches.results(batch_id):
+        ttb_id = entry.custom_id
+        if ttb_id not in waiting:
+            continue
+        app_start = time.time()
+        print(f"[batch {batch_id}] Finishing {ttb_id}...")
+        front_path, back_path = paths(*waiting.pop(ttb_id))
+
+        fields, error = None, None
+        result = entry.result
+        if result.type == "succeeded":
+            try:
+                text = result.message.content[0].text
+                if usage is not None:
+                    usage(result.message.usage)
+                key = cache_key(front_path, back_path)
+                remember(front_path, back_path, None, ttb_id, text, key)  # keep the raw reply first
+                fields = parse(text)
+                remember(front_path, back_path, fields, ttb_id, text, key)
+            except Exception as e:
+                error = e
+        else:
+            error = RuntimeError(_result_error(result))
+
+        if finish_app(conn, ttb_id, front_path, back_path, fields, error, ocr, finish):
+            succeeded += 1
+        else:
+            errored += 1
+
+        conn.execute(
+            "UPDATE vision_batch_items SET status=? WHERE ttbId=? AND batch_id=?",
+            (result.type, ttb_id, batch_id),
+        )
+        conn.commit()
+        app_times.append(time.time() - app_start)
+
+    # Anything the batch didn't return a line for
+    for ttb_id in waiting:
+        fail(conn, ttb_id, f"Missing from batch {batch_id} results")
+        conn.execute(
+            "UPDATE vision_batch_items SET status='missing' WHERE ttbId=? AND batch_id=?",
+            (ttb_id, batch_id),
+        )
+        errored += 1
+
+    conn.execute("UPDATE vision_batches SET collected_at=? WHERE batch_id=?", (_now(), batch_id))
+    conn.commit()
+    events.batch_api_ended(batch_id, succeeded, errored)
+    return app_times
+
+
+def run_batch_api(client, pending: list, db_path: str, stop_file: str, begin, build_params, paths, parse,
+                  ocr, finish, fail, cached, remember, cache_key, usage=None,
+                  poll_interval: float = 60) -> tuple[list[float], bool]:
+    """Submit pending apps as Message Batches, poll, and finish the results.
+
+    Args:
+        client: anthropic.Anthropic (honours ANTHROPIC_BASE_URL)
+        pending: (ttbId, front_img, back_img) rows to submit
+        db_path: SQLite database holding the batch tables
+        stop_file: STOP halts submission/polling; open batches resume next run
+        begin(conn, ttb_id, front_img, back_img) -> (front_path, back_path)
+        build_params(front_path, back_path) -> messages.create() params or None
+        paths(front_img, back_img) -> (front_path, back_path)
+        parse(text) -> fields
+        ocr(front_path, back_path, ttb_id=) -> (front_ocr, back_ocr)
+        finish(conn, job): stores results or the error in job["error"]
+        fail(conn, ttb_id, message): marks an app errored
+        cached(front_path, back_path, ttb_id) -> fields or None: stored/cached Vision reply
+        remember(front_path, back_path, fields, ttb_id, raw_text, key): stores a Vision reply
+        cache_key(front_path, back_path) -> the app's Vision cache key, computed once per result
+        usage(message_usage): optional, records token usage of each result
+        poll_interval: Seconds between status checks
+
+    Returns (per-app elapsed times, stopped_early).
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    ensure_batch_tables(conn)
+
+    try:
+        open_batches = [r[0] for r in conn.execute(
+            "SELECT batch_id FROM vision_batches WHERE collected_at IS NULL ORDER BY created_at"
+        )]
+        if open_batches:
+            print(f"Resuming {len(open_batches)} open batch(es): {', '.join(open_batches)}")
+
+        new_batches, app_times = submit_pending(client, conn, pending, begin, build_params, fail,
+                                                cached, ocr, finish, stop_file)
+        open_batches += new_batches
+
+        stopped = False
+        while open_batches:
+            if os.path.exists(stop_file):
+                stopped = True
+                print(f"Stopping with {len(open_batches)} batch(es) still open — rerun to resume")
+                break
+
+            for batch_id in list(open_batches):
+                batch = client.messages.batches.retrieve(batch_id)
+                counts = batch.request_counts
+                print(
+                    f"Batch {batch_id}: {batch.processing_status} "
+                    f"({counts.processing} processing, {counts.succeeded} succeeded, {counts.errored} errored)"
+                )
+                conn.execute("UPDATE vision_batches SET status=? WHERE batch_id=?", (batch.processing_status, batch_id))
+                conn.commit()
+                if batch.processing_status == "ended":
+                    conn.execute("UPDATE vision_batches SET ended_at=? WHERE batch_id=?", (_now(), batch_id))
+                    conn.commit()
+                    app_times += collect_batch(client, conn, batch_id, paths, parse, ocr, finish, fail,
+                                               remember, cache_key, usage)
+                    open_batches.remove(batch_id)
+
+            if open_batches:
+                time.sleep(poll_interval)
+    finally:
+        conn.close()
+
+    return app_times, stopped
@@ -17,19 +17,21 @@ Description:
 
 Inputs:
     - data/processing.db: SQLite database with processing state
-    - output/extracted/*.png: Temporary mini-images
+    - output/extracted/*.png: Mini-images left by older runs
     - htdocs/verification/: API output directories
 
 Actions:
     - Resets all processing_results rows to status='pending'
     - Deletes all extracted_fields records
-    - Removes temporary mini-images from output/extracted/
+    - Deletes all stored stage outputs (stage_outputs), so reruns call Vision again
+    - Removes leftover mini-images from output/extracted/
     - Removes verification API output (results/ and extractions/)
     - Clears and resets stats.json with zero counts
     - Clears events.json and emits a "cleared" event
 
 Outputs:
-    - Database reset: All applications pending, no extracted fields
+    - Database reset: All applications pending, no extracted fields or
+      stored stage outputs
     - Filesystem cleaned: No mini-images or verification API output
     - Stats reset: summary shows 0 processed, N pending, 0 errors
     - Events log: Fresh log with single "cleared" event
@@ -52,6 +54,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import PROCESSING_DB, OUTPUT_DIR, VERIFICATION_DIR
 import stats
 import events
+from batchProcessor import stage_outputs
 
 
 def main():
@@ -70,10 +73,13 @@ def main():
     c.execute("DELETE FROM extracted_fields")
     fields_deleted = c.rowcount
 
+    # Stored Vision replies / OCR / match decisions, so nothing resumes
+    stage_outputs.clear(conn)
+
     conn.commit()
     conn.close()
 
-    # Delete mini-images from temp output dir
+    # Delete mini-images left in output/extracted/ by older runs
     images_deleted = 0
     if os.path.exists(OUTPUT_DIR):
         for f in glob.glob(os.path.join(OUTPUT_DIR, "*.png")):
@@ -85,6 +91,8 @@ def main():
     results_dir = os.path.join(VERIFICATION_DIR, "results")
     extractions_dir = os.path.join(VERIFICATION_DIR, "extractions")
 
+    for _, _, files in os.walk(extractions_dir):
+        images_deleted += len(files)
     for dir_path in [results_dir, extractions_dir]:
         if os.path.exists(dir_path):
             shutil.rmtree(dir_path)
@@ -101,7 +109,7 @@ def main():
 
     print(f"Reset {reset_count} apps to pending")
     print(f"Deleted {fields_deleted} extracted fields")
-    print(f"Deleted {images_deleted} mini-images from temp dir")
+    print(f"Deleted {images_deleted} mini-images")
     if verification_cleared:
         print(f"Cleared verification API output")
 
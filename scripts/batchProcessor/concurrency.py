@@ -0,0 +1,162 @@
+"""
+AIMD controller for the number of Vision requests in flight.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    events.api_response() watches a rolling window of response times and
+    reports api_degraded / api_recovered, but --workers N always kept N
+    requests in flight regardless. AimdController turns the same signals
+    into a concurrency limit, TCP-style:
+
+        additive increase    rolling avg latency within AIMD_LATENCY_TOLERANCE
+                             x API_BASELINE_RESPONSE: +1 per `limit` successes
+                             (+1 per success until the first backoff)
+        hold                 between that and API_SLOW_THRESHOLD
+        decrease x0.75       rolling avg above API_SLOW_THRESHOLD
+        decrease x0.5        429 / 529 / timeout
+
+    Decreases are at most one per cooldown (a few response times), since
+    requests already in flight report the same overload again. The limit
+    stays between 1 and the --workers count. The starting limit and every
+    change of the integer limit are emitted as concurrency_changed events
+    (shown in batch.html).
+
+    Workers take a slot() (threads) or async_slot() (asyncio) around each
+    API call, so only `limit` requests are outstanding at once.
+
+Inputs:
+    - Response latencies and error kinds from process_labels.py
+    - events.py thresholds; config.py: AIMD_LATENCY_TOLERANCE
+
+Outputs:
+    - Events: concurrency_changed
+    - summary(): final limit, increases, decreases
+
+Created: February 2026
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import events
+from config import AIMD_LATENCY_TOLERANCE
+
+WINDOW = 5  # responses in the rolling average, as in events.py
+
+
+class AimdController:
+    """Adaptive in-flight request limit (additive increase, multiplicative decrease)."""
+
+    def __init__(self, maximum: int, minimum: int = 1, initial: int = 2):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(max(self.minimum, min(initial, self.maximum)))
+        self.in_flight = 0
+        self.slow_start = True
+        self.increases = 0
+        self.decreases = 0
+        self._latencies = []
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        # So batch.html shows the limit from the start, not only after the first change
+        events.concurrency_changed(None, int(self.limit), self.maximum, "starting limit")
+
+    # ── Gating ──
+
+    def _try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def _release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Block until the current limit allows another request."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """slot() for the asyncio engine (polls; requests take seconds, so 20 ms is noise)."""
+        import asyncio
+
+        while not self._try_acquire():
+            await asyncio.sleep(0.02)
+        try:
+            yield
+        finally:
+            self._release()
+
+    # ── Signals ──
+
+    def _set_limit(self, new_limit: float, reason: str) -> tuple | None:
+        """Apply a new limit (caller holds the lock); returns the event to emit, if any."""
+        old = int(self.limit)
+        self.limit = max(self.minimum, min(self.maximum, new_limit))
+        if int(self.limit) == old:
+            return None
+        if int(self.limit) > old:
+            self.increases += 1
+        else:
+            self.decreases += 1
+        self._cond.notify_all()
+        return old, int(self.limit), self.maximum, reason
+
+    def _cooldown(self) -> float:
+        avg = sum(self._latencies) / len(self._latencies) if self._latencies else events.API_BASELINE_RESPONSE
+        return max(2.0, 2 * avg)
+
+    def _decrease(self, factor: float, reason: str) -> tuple | None:
+        now = time.monotonic()
+        if now - self._last_decrease < self._cooldown():
+            return None
+        self._last_decrease = now
+        self.slow_start = False
+        return self._set_limit(self.limit * factor, reason)
+
+    def record_success(self, latency: float):
+        with self._cond:
+            self._latencies = (self._latencies + [latency])[-WINDOW:]
+            avg = sum(self._latencies) / len(self._latencies)
+            change = None
+            if avg > events.API_SLOW_THRESHOLD:
+                change = self._decrease(0.75, f"latency {avg:.1f}s avg")
+            elif avg <= events.API_BASELINE_RESPONSE * AIMD_LATENCY_TOLERANCE:
+                step = 1.0 if self.slow_start else 1.0 / self.limit
+                change = self._set_limit(self.limit + step, f"latency {avg:.1f}s avg")
+        if change:
+            events.concurrency_changed(*change)
+
+    def record_error(self, kind: str):
+        """kind: 'rate_limited' (429), 'overloaded' (529) or 'timeout'."""
+        with self._cond:
+            change = self._decrease(0.5, kind)
+        if change:
+            events.concurrency_changed(*change)
+
+    def summary(self) -> dict:
+        with self._cond:
+            return {"limit": int(self.limit), "maximum": self.maximum,
+                    "increases": self.increases, "decreases": self.decreases}
@@ -0,0 +1,105 @@
+"""
+Pack an application's field mini-images into one atlas image.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    app.html fetched every field's mini-image as its own file, up to 14
+    requests (and 14 small files on disk) per application. With
+    CROP_OUTPUT=atlas or both, save_fields() also packs the app's crops
+    into a single extractions/{sharded}/{suffix}/atlas.png (or .webp) and
+    stores each field's rectangle in extracted_fields.atlas_rect. The
+    export writes the rectangles into the results JSON, and app.html cuts
+    every crop out of the one atlas fetch.
+
+    Packing is a shelf layout: crops sorted tallest first, placed left to
+    right in rows no wider than the widest crop or ~1.2x the square root of
+    the total area, whichever is larger. Crops are separated by GAP pixels
+    of white so scaled-down previews don't bleed into each other.
+
+    The atlas is opt-in: CROP_OUTPUT=files (the default) writes only the
+    per-field files, as before, and both (atlas + files) keeps them for
+    tools that read mini_image_path directly.
+
+Inputs:
+    - Field crops (PIL images) from process_labels.save_fields()
+
+Outputs:
+    - The atlas image and {field_name: [x, y, w, h]}
+    - data/processing.db: extracted_fields.atlas_rect column
+
+Usage:
+    from batchProcessor import crop_atlas
+    atlas, rects = crop_atlas.pack({"brandName": img1, "netContents": img2})
+
+Created: February 2026
+"""
+
+from __future__ import annotations
+
+import glob
+import math
+import os
+import sqlite3
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from paths import get_extraction_image_dir
+
+ATLAS_NAME = "atlas"
+GAP = 2
+
+
+def ensure_atlas_column(conn: sqlite3.Connection):
+    """Add extracted_fields.atlas_rect if missing."""
+    try:
+        conn.execute("ALTER TABLE extracted_fields ADD COLUMN atlas_rect TEXT")
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+    conn.commit()
+
+
+def layout(sizes: dict[str, tuple[int, int]]) -> tuple[int, int, dict[str, list[int]]]:
+    """Shelf-pack (w, h) boxes: (atlas width, atlas height, {name: [x, y, w, h]})."""
+    if not sizes:
+        return 0, 0, {}
+    area = sum((w + GAP) * (h + GAP) for w, h in sizes.values())
+    shelf_width = max(max(w for w, _ in sizes.values()), int(math.sqrt(area) * 1.2))
+
+    rects = {}
+    x = y = shelf_height = width = 0
+    for name, (w, h) in sorted(sizes.items(), key=lambda kv: (-kv[1][1], kv[0])):
+        if x and x + w > shelf_width:
+            y += shelf_height + GAP
+            x = shelf_height = 0
+        rects[name] = [x, y, w, h]
+        x += w + GAP
+        shelf_height = max(shelf_height, h)
+        width = max(width, x - GAP)
+    return width, y + shelf_height, rects
+
+
+def pack(crops: dict[str, Image.Image]) -> tuple[Image.Image, dict[str, list[int]]]:
+    """One RGB image holding every crop, and each crop's rectangle in it."""
+    from PIL import Image
+
+    width, height, rects = layout({name: crop.size for name, crop in crops.items()})
+    atlas = Image.new("RGB", (max(width, 1), max(height, 1)), (255, 255, 255))
+    for name, (x, y, _, _) in rects.items():
+        atlas.paste(crops[name], (x, y))
+    return atlas, rects
+
+
+def find_atlas(ttb_id: str) -> str | None:
+    """Path of the app's atlas image (newest if the format changed between runs)."""
+    candidates = glob.glob(os.path.join(get_extraction_image_dir(ttb_id), f"{ATLAS_NAME}.*"))
+    return max(candidates, key=os.path.getmtime) if candidates else None
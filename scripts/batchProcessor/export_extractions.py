@@ -16,7 +16,18 @@ Description:
 
     Creates two types of output:
     - JSON files with extraction metadata (text, confidence, OCR scores)
-    - PNG mini-images for visual verification of each extracted field
+    - PNG (or WebP) mini-images for visual verification of each field
+
+    process_labels.py crops mini-images straight into the sharded
+    extraction directory, so normally only the JSON is written here.
+    Rows whose mini_image_path still points at output/extracted/ (from
+    before crops were written in place) are copied over and repointed.
+
+    When the crops were also packed into an atlas (crop_atlas.py), the JSON
+    gets the atlas URL and size, and each field its atlasRect [x, y, w, h],
+    so the frontend can show every crop from one fetch. The atlas URL ends
+    in ?v={mtime} so a rebuilt atlas is not served from the browser cache.
+    imageUrl is only set for fields that have their own file.
 
     Uses the same sharding scheme as the TTB external API for consistency
     and scalability. Example:
@@ -24,22 +35,24 @@ Description:
 
 Inputs:
     - data/processing.db: SQLite database with processed applications
-    - output/extracted/*.png: Temporary mini-images from extraction
+    - htdocs/verification/extractions/{sharded}/{ttbId}/: Mini-images
+    - output/extracted/*.png: Mini-images from older runs (copied once)
 
 Actions:
     - Queries database for all processed applications
     - For each application:
         * Builds JSON with field text, confidence, OCR verification scores
-        * Copies mini-images to sharded extraction directory
-        * Sets imageUrl paths for frontend fetch
+        * Moves any legacy mini-images into the sharded extraction directory
+        * Sets imageUrl paths (with the image's extension) for frontend fetch
     - Provides export_one() function for real-time single-app export
 
 Outputs:
     - htdocs/verification/results/{sharded}/*.json
-      Contains: {status, fields: {fieldName: {text, confidence, ocrText,
-                 ocrScore, imageUrl}, ...}}
+      Contains: {status, atlas: {url, width, height}, fields: {fieldName:
+                 {text, confidence, ocrText, ocrScore, imageUrl, atlasRect}, ...}}
     - htdocs/verification/extractions/{sharded}/{ttbId}/
       Contains: brandName.png, fancifulName.png, alcoholContent.png, etc.
+      and/or atlas.png (.webp with CROP_FORMAT=WEBP)
 
 Usage:
     cd scripts && python3 batchProcessor/export_extractions.py
@@ -58,16 +71,66 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import PROCESSING_DB
 from paths import (
     get_verification_result_path,
-    get_extraction_image_dir,
+    get_extraction_image_path,
     get_extraction_image_url,
     VERIFICATION_BASE,
 )
+from batchProcessor.crop_atlas import ATLAS_NAME, ensure_atlas_column, find_atlas
+
+
+def place_image(conn: sqlite3.Connection, ttb_id: str, field_name: str, mini_path: str | None) -> str | None:
+    """imageUrl for a field's mini-image, moving a legacy output/extracted/ file into place.
+
+    Returns None when the field has no image.
+    """
+    if not mini_path or not os.path.exists(mini_path):
+        return None
+    if os.path.splitext(os.path.basename(mini_path))[0] == ATLAS_NAME:
+        return None  # Atlas only: the field's crop is its atlasRect
+    ext = os.path.splitext(mini_path)[1].lstrip(".").lower() or "png"
+    final_path = get_extraction_image_path(ttb_id, field_name, ext)
+    if os.path.abspath(mini_path) != os.path.abspath(final_path):
+        shutil.copy2(mini_path, final_path)
+        conn.execute(
+            "UPDATE extracted_fields SET mini_image_path = ? WHERE ttbId = ? AND field_name = ?",
+            (final_path, ttb_id, field_name),
+        )
+        conn.commit()
+        os.remove(mini_path)
+    return get_extraction_image_url(ttb_id, field_name, ext)
+
+
+def atlas_info(ttb_id: str) -> dict | None:
+    """{url, width, height} of the app's crop atlas, if there is one (url versioned by mtime)."""
+    path = find_atlas(ttb_id)
+    if path is None:
+        return None
+    from PIL import Image
+
+    with Image.open(path) as img:
+        width, height = img.size
+    ext = os.path.splitext(path)[1].lstrip(".")
+    url = f"{get_extraction_image_url(ttb_id, ATLAS_NAME, ext)}?v={os.stat(path).st_mtime_ns}"
+    return {"url": url, "width": width, "height": height}
+
+
+def write_result(ttb_id: str, fields: dict):
+    """Write the results JSON, with the atlas when any field has a rect in it."""
+    result = {"status": "processed", "fields": fields}
+    atlas = atlas_info(ttb_id) if any("atlasRect" in f for f in fields.values()) else None
+    if atlas:
+        result["atlas"] = atlas
+    else:
+        for field_data in fields.values():
+            field_data.pop("atlasRect", None)
+    with open(get_verification_result_path(ttb_id), "w") as f:
+        json.dump(result, f, indent=2)
 
 
 def export_one(ttb_id: str, conn=None) -> int:
     """Export a single application's extraction data.
 
-    Returns number of images copied.
+    Returns number of fields with a mini-image.
     """
     close_conn = False
     if conn is None:
@@ -81,7 +144,7 @@ def export_one(ttb_id: str, conn=None) -> int:
     # Get extracted fields for this app
     c.execute("""
         SELECT field_name, extracted_text, confidence,
-               mini_image_path, ocr_text, ocr_match_score
+               mini_image_path, ocr_text, ocr_match_score, atlas_rect
         FROM extracted_fields
         WHERE ttbId = ?
     """, (ttb_id,))
@@ -96,9 +159,11 @@ def export_one(ttb_id: str, conn=None) -> int:
             "ocrScore": r["ocr_match_score"] if r["ocr_match_score"] is not None else None,
             "side": "front",
         }
-        if r["mini_image_path"] and os.path.exists(r["mini_image_path"]):
-            field_data["_src_image"] = r["mini_image_path"]
-            field_data["imageUrl"] = get_extraction_image_url(ttb_id, field_name)
+        image_url = place_image(conn, ttb_id, field_name, r["mini_image_path"])
+        if image_url:
+            field_data["imageUrl"] = image_url
+        if r["atlas_rect"]:
+            field_data["atlasRect"] = json.loads(r["atlas_rect"])
         fields[field_name] = field_data
 
     if close_conn:
@@ -107,26 +172,17 @@ def export_one(ttb_id: str, conn=None) -> int:
     if not fields:
         return 0
 
-    # Copy mini-images
-    images_count = 0
-    img_dir = get_extraction_image_dir(ttb_id)
-    for field_name, field_data in fields.items():
-        src_path = field_data.pop("_src_image", None)
-        if src_path and os.path.exists(src_path):
-            dst_path = os.path.join(img_dir, f"{field_name}.png")
-            shutil.copy2(src_path, dst_path)
-            images_count += 1
+    images_count = sum(1 for field_data in fields.values() if "imageUrl" in field_data or "atlasRect" in field_data)
 
     # Write results JSON
-    json_path = get_verification_result_path(ttb_id)
-    with open(json_path, "w") as f:
-        json.dump({"status": "processed", "fields": fields}, f, indent=2)
+    write_result(ttb_id, fields)
 
     return images_count
 
 
 def main():
     conn = sqlite3.connect(PROCESSING_DB)
+    ensure_atlas_column(conn)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
 
@@ -140,9 +196,10 @@ def main():
     apps = {r["ttbId"]: {"fields": {}} for r in c.fetchall()}
 
     # Get all extracted fields
+    images_count = 0
     c.execute("""
         SELECT ttbId, field_name, extracted_text, confidence,
-               mini_image_path, ocr_text, ocr_match_score
+               mini_image_path, ocr_text, ocr_match_score, atlas_rect
         FROM extracted_fields
     """)
 
@@ -166,10 +223,13 @@ def main():
             "side": side,
         }
 
-        # Store mini_image_path for later copying
-        if r["mini_image_path"] and os.path.exists(r["mini_image_path"]):
-            field_data["_src_image"] = r["mini_image_path"]
-            field_data["imageUrl"] = get_extraction_image_url(ttb_id, field_name)
+        image_url = place_image(conn, ttb_id, field_name, r["mini_image_path"])
+        if image_url:
+            field_data["imageUrl"] = image_url
+        if r["atlas_rect"]:
+            field_data["atlasRect"] = json.loads(r["atlas_rect"])
+        if "imageUrl" in field_data or "atlasRect" in field_data:
+            images_count += 1
 
         apps[ttb_id]["fields"][field_name] = field_data
 
@@ -177,29 +237,17 @@ def main():
 
     # Export to verification API
     results_count = 0
-    images_count = 0
 
     for ttb_id, data in apps.items():
         if not data["fields"]:
             continue
 
-        # Copy mini-images to extractions directory
-        img_dir = get_extraction_image_dir(ttb_id)
-        for field_name, field_data in data["fields"].items():
-            src_path = field_data.pop("_src_image", None)
-            if src_path and os.path.exists(src_path):
-                dst_path = os.path.join(img_dir, f"{field_name}.png")
-                shutil.copy2(src_path, dst_path)
-                images_count += 1
-
         # Write results JSON
-        json_path = get_verification_result_path(ttb_id)
-        with open(json_path, "w") as f:
-            json.dump({"status": "processed", "fields": data["fields"]}, f, indent=2)
+        write_result(ttb_id, data["fields"])
         results_count += 1
 
     print(f"Exported {results_count} result files to {VERIFICATION_BASE}/results/")
-    print(f"Copied {images_count} extraction images to {VERIFICATION_BASE}/extractions/")
+    print(f"Linked {images_count} extraction images in {VERIFICATION_BASE}/extractions/")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+"""
+Incremental parser for a streamed JSON array of objects.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    The Vision reply is a JSON array of field objects, possibly inside a
+    markdown fence. With --stream, process_labels.py feeds the text deltas
+    from messages.stream() into JsonArrayStream, which returns each
+    top-level element as soon as its closing brace arrives, so matching and
+    cropping start on the first field instead of after the last.
+
+    The scanner only tracks string/escape state and nesting depth; each
+    completed element is handed to json.loads, so values are parsed exactly
+    as parse_vision_text() would. An object or array element is complete
+    at its closing bracket; a top-level scalar (string, number, literal)
+    at the ',' or ']' after it. Anything before the opening '[' (a fence,
+    a stray sentence) is skipped.
+
+Inputs:
+    - Text chunks of the reply, in order (feed())
+
+Outputs:
+    - Completed array elements (parsed JSON values), in order
+
+Usage:
+    parser = JsonArrayStream()
+    for chunk in stream.text_stream:
+        for field in parser.feed(chunk):
+            handle(field)
+
+Created: February 2026
+"""
+
+import json
+
+
+class JsonArrayStream:
+    """Feed text chunks; get back each top-level array element once it is complete."""
+
+    def __init__(self):
+        self.started = False  # seen the opening '['
+        self.finished = False  # seen the closing ']'
+        self.count = 0  # elements returned so far
+        self._element = []  # characters of the element being read
+        self._depth = 0  # nesting inside the current element
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk of the reply; returns the elements it completed."""
+        done = []
+        for ch in chunk:
+            if self.finished:
+                break
+            if not self.started:
+                self.started = ch == "["
+                continue
+
+            if self._in_string:
+                self._element.append(ch)
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                if ch in ",]":
+                    if self._element:  # a scalar element ends at its separator
+                        done.append(self._complete())
+                    self.finished = ch == "]"
+                    continue
+                if ch in " \t\r\n":
+                    continue
+
+            self._element.append(ch)
+            if ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    done.append(self._complete())
+        return done
+
+    def _complete(self):
+        text = "".join(self._element)
+        self._element = []
+        self.count += 1
+        return json.loads(text)
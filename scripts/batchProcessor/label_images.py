@@ -0,0 +1,111 @@
+"""
+Per-application decoded label images, shared by OCR and cropping.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    crop_region() used to Image.open() the full label for every extracted
+    field, and EasyOCR decoded it again from the path - a dozen decodes of
+    the same PNG per app. AppImages reads each side's bytes once, hashes
+    them (for the OCR cache key), and decodes them lazily on first use; the
+    same PIL image is cropped for every field and the same RGB array is
+    handed to EasyOCR.
+
+    Use it as a context manager around one application so the pixel
+    buffers are released as soon as the app is done:
+
+        with AppImages() as images:
+            front = images.get(front_path)     # LabelImage or None
+            ocr_batcher.submit(front.rgb_array())
+            crop_region(front.image, bbox, out_path)
+
+Inputs:
+    - Label image paths
+
+Outputs:
+    - LabelImage objects: .path, .sha256, .image (PIL), .rgb_array()
+
+Created: February 2026
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
+
+
+class LabelImage:
+    """One label side: file bytes read once, decoded on first use."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._data = f.read()
+        self.sha256 = hashlib.sha256(self._data).hexdigest()
+        self._image = None
+        self._rgb = None
+
+    @property
+    def image(self) -> Image.Image:
+        """Decoded image in its original mode (crops handle RGBA themselves)."""
+        if self._image is None:
+            from PIL import Image
+
+            self._image = Image.open(io.BytesIO(self._data))
+            self._image.load()
+            self._data = None  # decoded now; drop the compressed copy
+        return self._image
+
+    def rgb_array(self) -> np.ndarray:
+        """HxWx3 uint8 RGB array for EasyOCR (alpha dropped, as EasyOCR does for files).
+
+        RGB, not the BGR that readtext() assumes for arrays: OCR it with
+        ocr_batcher.readtext_rgb() (or OcrBatcher.submit()).
+        """
+        if self._rgb is None:
+            import numpy as np
+
+            img = self.image
+            self._rgb = np.asarray(img if img.mode == "RGB" else img.convert("RGB"))
+        return self._rgb
+
+    def close(self):
+        if self._image is not None:
+            self._image.close()
+        self._image = self._rgb = self._data = None
+
+
+class AppImages:
+    """The label images of one application, each loaded at most once."""
+
+    def __init__(self):
+        self._images = {}
+
+    def get(self, path: str | None) -> LabelImage | None:
+        if not path or not os.path.exists(path):
+            return None
+        if path not in self._images:
+            self._images[path] = LabelImage(path)
+        return self._images[path]
+
+    def close(self):
+        for label in self._images.values():
+            label.close()
+        self._images.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,220 @@
+"""
+Lease-based claiming of pending applications across worker processes.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    process_labels.py used to SELECT the pending list up front and only
+    flip each row to 'processing' when it got to it, so two invocations
+    processed the same apps, and a row left in 'processing' by a crash
+    stayed there forever.
+
+    Now every claim is atomic: inside BEGIN IMMEDIATE (SQLite's write
+    lock) a worker reclaims expired leases, picks pending rows and marks
+    them 'processing' with its worker_id and lease_expires_at. N processes
+    on one host can run `process_labels.py` side by side and pull disjoint
+    work. A heartbeat thread renews this process's leases every
+    LEASE_SECONDS / 5; if the process dies, its rows fall back to
+    'pending' once the lease expires and the next claim picks them up.
+
+    Apps waiting in an open Message Batch (vision_batch_items status
+    'submitted') are never reclaimed - the batch owns them until it is
+    collected, even though the submitting process has exited.
+
+Inputs:
+    - data/processing.db: processing_results (+ vision_batch_items if present)
+    - config.py: LEASE_SECONDS
+
+Actions:
+    - Adds worker_id / lease_expires_at / heartbeat_at columns (idempotent)
+    - claim(), LeaseQueue: claim pending rows as they are consumed
+    - start_heartbeat(): renew leases while the process is alive
+    - release_unfinished(): return claimed-but-unstarted rows on exit
+
+Outputs:
+    - Database updates: processing_results lease columns and status
+
+Created: February 2026
+"""
+
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import LEASE_SECONDS
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_heartbeat_stop = threading.Event()
+
+
+def ensure_lease_columns(conn: sqlite3.Connection):
+    """Add the lease columns to processing_results if missing."""
+    for column in ("worker_id TEXT", "lease_expires_at REAL", "heartbeat_at REAL"):
+        try:
+            conn.execute(f"ALTER TABLE processing_results ADD COLUMN {column}")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+    conn.commit()
+
+
+def _held_by_batch_clause(conn: sqlite3.Connection) -> str:
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='vision_batch_items'"
+    ).fetchone()
+    if not exists:
+        return ""
+    return " AND ttbId NOT IN (SELECT ttbId FROM vision_batch_items WHERE status='submitted')"
+
+
+def reclaim_expired(conn: sqlite3.Connection) -> int:
+    """Return rows whose lease has expired (or that have none) to 'pending'.
+
+    Runs inside the caller's transaction. Returns the number reclaimed.
+    """
+    cur = conn.execute(
+        """UPDATE processing_results
+           SET status='pending', worker_id=NULL, lease_expires_at=NULL, heartbeat_at=NULL
+           WHERE status='processing' AND (lease_expires_at IS NULL OR lease_expires_at < ?)"""
+        + _held_by_batch_clause(conn),
+        (time.time(),),
+    )
+    return cur.rowcount
+
+
+def lease(conn: sqlite3.Connection, ttb_id: str):
+    """Mark one app 'processing' under this worker's lease (no commit)."""
+    now = time.time()
+    conn.execute(
+        """UPDATE processing_results
+           SET status='processing', worker_id=?, lease_expires_at=?, heartbeat_at=?
+           WHERE ttbId=?""",
+        (WORKER_ID, now + LEASE_SECONDS, now, ttb_id),
+    )
+
+
+def claim(conn: sqlite3.Connection, count: int = 1) -> list[tuple]:
+    """Atomically claim up to `count` pending apps. Returns (ttbId, front, back) rows."""
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        reclaimed = reclaim_expired(conn)
+        rows = conn.execute(
+            """SELECT a.ttbId, a.front_image_path, a.back_image_path
+               FROM applications a
+               JOIN processing_results p ON a.ttbId = p.ttbId
+               WHERE p.status = 'pending'
+               ORDER BY a.ttbId
+               LIMIT ?""",
+            (count,),
+        ).fetchall()
+        for ttb_id, _, _ in rows:
+            lease(conn, ttb_id)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    if reclaimed:
+        print(f"Reclaimed {reclaimed} app(s) with expired leases")
+    return rows
+
+
+class LeaseQueue:
+    """Pending apps, claimed one at a time as the run modes iterate.
+
+    Thread-safe iteration; len() is claimed-so-far plus what is still
+    pending in the database (other processes may take some of it).
+    """
+
+    def __init__(self, db_path: str, limit: int = 0):
+        self.db_path = db_path
+        self.limit = limit
+        self.claimed = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+
+    def __iter__(self):
+        while True:
+            row = self.next()
+            if row is None:
+                return
+            yield row
+
+    def next(self) -> tuple | None:
+        with self._lock:
+            if self.limit and self.claimed >= self.limit:
+                return None
+            rows = claim(self._conn, 1)
+            if not rows:
+                return None
+            self.claimed += 1
+            return rows[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            waiting = self._conn.execute(
+                "SELECT COUNT(*) FROM processing_results WHERE status='pending'"
+            ).fetchone()[0]
+            total = self.claimed + waiting
+            return min(total, self.limit) if self.limit else total
+
+    def close(self):
+        self._conn.close()
+
+
+def renew(conn: sqlite3.Connection) -> int:
+    """Extend every lease this process holds. Returns rows renewed."""
+    now = time.time()
+    cur = conn.execute(
+        """UPDATE processing_results SET lease_expires_at=?, heartbeat_at=?
+           WHERE worker_id=? AND status='processing'""",
+        (now + LEASE_SECONDS, now, WORKER_ID),
+    )
+    conn.commit()
+    return cur.rowcount
+
+
+def start_heartbeat(db_path: str) -> threading.Thread:
+    """Renew this process's leases every LEASE_SECONDS / 5 until stop_heartbeat()."""
+    _heartbeat_stop.clear()
+
+    def beat():
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            while not _heartbeat_stop.wait(LEASE_SECONDS / 5):
+                try:
+                    renew(conn)
+                except sqlite3.Error as e:
+                    print(f"  Lease heartbeat failed: {e}")
+        finally:
+            conn.close()
+
+    thread = threading.Thread(target=beat, name="lease-heartbeat", daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_heartbeat():
+    _heartbeat_stop.set()
+
+
+def release_unfinished(conn: sqlite3.Connection) -> int:
+    """Return rows this process claimed but didn't finish (STOP, shutdown) to 'pending'."""
+    cur = conn.execute(
+        """UPDATE processing_results
+           SET status='pending', worker_id=NULL, lease_expires_at=NULL, heartbeat_at=NULL
+           WHERE worker_id=? AND status='processing'"""
+        + _held_by_batch_clause(conn),
+        (WORKER_ID,),
+    )
+    conn.commit()
+    return cur.rowcount
@@ -0,0 +1,147 @@
+"""
+Batched EasyOCR service shared by all in-flight applications.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    ocr_image() used to call reader.readtext() on one image at a time from
+    whichever worker thread needed it, so the CRAFT detector always ran
+    with a batch of one and the recognizer with batch_size=1.
+
+    OcrBatcher runs one service thread that owns the reader. Callers
+    submit() decoded RGB arrays (front and back together) and get a Future
+    back. The service collects requests from every in-flight application
+    for up to OCR_BATCH_WAIT_MS (or OCR_BATCH_MAX_IMAGES images), groups
+    them by image shape, and runs:
+
+        same-shape group   one detector pass over the stacked arrays
+        single image       one detector pass
+
+    then the recognizer per image, with batch_size=OCR_RECOGNIZE_BATCH_SIZE.
+    An image file path can be submitted too; it is read by EasyOCR itself
+    and OCR'd on its own.
+
+    Arrays go through reader.detect() / reader.recognize() (readtext_rgb())
+    rather than readtext(), which takes a 3-channel array to be BGR and
+    would give the recognizer a greyscale image with red and blue swapped.
+    This way the detector sees RGB and the recognizer true luminance, as
+    when EasyOCR reads the label file itself, so results match the
+    path-based readtext() the pipeline used before images were decoded once.
+
+    EasyOCR's public API recognizes one image per call, so text-box crops
+    are batched within an image, not pooled across images; detection is
+    what gets batched across applications. Labels in this dataset are
+    almost all the same size, so most batches take the batched path.
+
+Inputs:
+    - HxWx3 uint8 RGB arrays (LabelImage.rgb_array()), or image paths
+    - config.py: OCR_BATCH_MAX_IMAGES, OCR_BATCH_WAIT_MS, OCR_RECOGNIZE_BATCH_SIZE
+
+Outputs:
+    - Future per image: list of (bbox_polygon, text, confidence) tuples
+    - counters(): images, batches, largest batch
+
+Created: February 2026
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import OCR_BATCH_MAX_IMAGES, OCR_BATCH_WAIT_MS, OCR_RECOGNIZE_BATCH_SIZE
+
+
+def readtext_rgb(reader, images: list, batch_size: int = 1) -> list[list]:
+    """readtext() results for HxWx3 uint8 RGB arrays, read as EasyOCR reads image files.
+
+    Arrays of the same shape get one detector pass between them.
+    """
+    import cv2  # installed with easyocr
+    import numpy as np
+
+    batch = images[0] if len(images) == 1 else np.stack(images)
+    horizontal, free = reader.detect(batch, reformat=False)
+    return [
+        reader.recognize(cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY), boxes, free_boxes,
+                         batch_size=batch_size, reformat=False)
+        for rgb, boxes, free_boxes in zip(images, horizontal, free)
+    ]
+
+
+class OcrBatcher:
+    """One thread running EasyOCR over batches collected from many callers."""
+
+    def __init__(self, reader_factory, max_images: int = OCR_BATCH_MAX_IMAGES,
+                 wait_ms: float = OCR_BATCH_WAIT_MS, recognize_batch_size: int = OCR_RECOGNIZE_BATCH_SIZE):
+        self._reader_factory = reader_factory
+        self.max_images = max(1, max_images)
+        self.wait = wait_ms / 1000
+        self.recognize_batch_size = recognize_batch_size
+        self._requests = queue.Queue()
+        self._counters = {"images": 0, "batches": 0, "largest_batch": 0}
+        self._counters_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="ocr-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, rgb) -> Future:
+        """Queue one image; the Future resolves to readtext()-style results."""
+        future = Future()
+        self._requests.put((rgb, future))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.wait
+        while len(batch) < self.max_images:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                reader = self._reader_factory()
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            groups = {}
+            for rgb, future in batch:
+                # Paths have no shape to batch by, so each is its own group
+                groups.setdefault(getattr(rgb, "shape", None) or id(future), []).append((rgb, future))
+
+            for group in groups.values():
+                try:
+                    if isinstance(group[0][0], str):
+                        results = [reader.readtext(group[0][0], batch_size=self.recognize_batch_size)]
+                    else:
+                        results = readtext_rgb(reader, [rgb for rgb, _ in group], self.recognize_batch_size)
+                except Exception as e:
+                    for _, future in group:
+                        future.set_exception(e)
+                    continue
+                for (_, future), result in zip(group, results):
+                    future.set_result(result)
+
+            with self._counters_lock:
+                self._counters["images"] += len(batch)
+                self._counters["batches"] += 1
+                self._counters["largest_batch"] = max(self._counters["largest_batch"], len(batch))
+
+    def counters(self) -> dict:
+        with self._counters_lock:
+            return dict(self._counters)
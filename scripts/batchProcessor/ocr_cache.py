@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Persistent EasyOCR result cache shared by extraction and verification.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    EasyOCR detection + recognition on a 1+ MB label PNG is the dominant
+    CPU cost per app, and it was redone on every reprocess. This cache
+    stores the {text, bbox_polygon, confidence} list for an image, keyed by
+    SHA-256 of:
+
+        image bytes + reader languages + EasyOCR version (+ precision,
+        when not int8) + readtext settings
+
+    Both process_labels.py (full labels) and verify_extractions.py
+    (mini-images) read and write it, so re-matching or re-verifying an
+    unchanged image skips inference entirely.
+
+    Entries are small binary files (one per image) so that concurrent
+    worker processes can share the cache without a database lock:
+
+        header   b"OCR1" + uint32 item count
+        per item float32 confidence, 8 x int32 polygon coords,
+                 uint16 text length, UTF-8 text
+
+    Writes go to a temp file and are renamed into place, so readers never
+    see a partial entry.
+
+Inputs:
+    - Image paths and reader settings (for the key)
+    - OCR item lists (to store)
+
+Actions:
+    - get() / put() with hit/miss counters for the current process
+    - CLI: --stats, --clear
+
+Outputs:
+    - data/ocr_cache/{key[:2]}/{key}.bin
+
+Usage:
+    cd scripts && python3 batchProcessor/ocr_cache.py --stats
+    cd scripts && python3 batchProcessor/ocr_cache.py --clear
+
+Created: February 2026
+"""
+
+import argparse
+import functools
+import hashlib
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import OCR_CACHE_DIR, OCR_PRECISION
+from batchProcessor.vision_cache import file_sha256
+
+MAGIC = b"OCR1"
+_HEADER = struct.Struct("<4sI")
+_ITEM = struct.Struct("<f8iH")
+
+_counters = {"hits": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _easyocr_version() -> str:
+    from importlib import metadata  # pulls in email/zipfile; only needed once keys are made
+
+    try:
+        return metadata.version("easyocr")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def make_key(image_path: str, languages: list[str], **settings) -> str:
+    """Cache key over the image bytes, reader languages/version and readtext settings."""
+    return key_for_digest(file_sha256(image_path), languages, **settings)
+
+
+def key_for_digest(image_sha256: str, languages: list[str], **settings) -> str:
+    """make_key() for an image whose SHA-256 is already known."""
+    h = hashlib.sha256()
+    h.update(image_sha256.encode())
+    reader = "|".join(languages) + "|" + _easyocr_version()
+    if OCR_PRECISION != "int8":
+        reader += "|" + OCR_PRECISION  # int8 keys predate the setting (easyocr always quantized on CPU)
+    h.update(reader.encode())
+    for name in sorted(settings):
+        h.update(f"|{name}={settings[name]}".encode())
+    return h.hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(OCR_CACHE_DIR, key[:2], f"{key}.bin")
+
+
+def encode(items: list[dict]) -> bytes:
+    parts = [_HEADER.pack(MAGIC, len(items))]
+    for item in items:
+        text = item["text"].encode("utf-8")[:0xFFFF]
+        coords = [int(v) for pt in item["bbox_polygon"] for v in pt]
+        parts.append(_ITEM.pack(float(item["confidence"]), *coords, len(text)))
+        parts.append(text)
+    return b"".join(parts)
+
+
+def decode(data: bytes) -> list[dict]:
+    magic, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("not an OCR cache entry")
+    offset = _HEADER.size
+    items = []
+    for _ in range(count):
+        conf, x1, y1, x2, y2, x3, y3, x4, y4, n = _ITEM.unpack_from(data, offset)
+        offset += _ITEM.size
+        text = data[offset:offset + n].decode("utf-8")
+        offset += n
+        items.append({
+            "text": text,
+            "bbox_polygon": [[x1, y1], [x2, y2], [x3, y3], [x4, y4]],
+            "confidence": conf,
+        })
+    return items
+
+
+def get(key: str) -> list[dict] | None:
+    """Return cached OCR items, or None on a miss (or an unreadable entry)."""
+    items = None
+    try:
+        with open(_entry_path(key), "rb") as f:
+            items = decode(f.read())
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        pass
+
+    with _counters_lock:
+        _counters["hits" if items is not None else "misses"] += 1
+    return items
+
+
+def put(key: str, items: list[dict]):
+    """Store OCR items atomically."""
+    path = _entry_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(encode(items))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def counters() -> dict:
+    """Hits and misses in this process."""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def summary() -> dict:
+    entries = size = 0
+    if os.path.exists(OCR_CACHE_DIR):
+        for root, _, files in os.walk(OCR_CACHE_DIR):
+            for name in files:
+                if name.endswith(".bin"):
+                    entries += 1
+                    size += os.path.getsize(os.path.join(root, name))
+    return {"entries": entries, "size_bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR result cache maintenance")
+    parser.add_argument("--stats", action="store_true", help="Show cache size")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached OCR result")
+    args = parser.parse_args()
+
+    if args.clear and os.path.exists(OCR_CACHE_DIR):
+        shutil.rmtree(OCR_CACHE_DIR)
+        print(f"Removed {OCR_CACHE_DIR}")
+    s = summary()
+    print(f"{OCR_CACHE_DIR}: {s['entries']} images, {s['size_bytes'] / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
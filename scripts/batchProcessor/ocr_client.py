@@ -0,0 +1,265 @@
+"""
+Client for the warm OCR daemon, with in-process EasyOCR as the fallback.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Every process_labels.py / verify_extractions.py run (and every
+    `make process` started by api_server.py) built its own easyocr.Reader,
+    loading torch and the detector/recognizer weights before the first
+    label. When miniServer/ocr_daemon.py is running, these scripts send
+    their readtext() calls to it over OCR_DAEMON_SOCKET instead and never
+    load the model themselves.
+
+    Protocol: one JSON object per line each way, any number of requests
+    per connection (each thread keeps its own connection).
+
+        {"op": "ping"}
+            → {"ok": true, "languages": [...], "precision": "int8", "pid": N, "images": N}
+        {"op": "readtext", "path": "/abs/label.png"}
+        {"op": "readtext", "shm": name, "shape": [h, w, 3]}
+            → {"ok": true, "results": [[bbox_polygon, text, confidence], ...]}
+            → {"ok": false, "error": "..."}
+
+    Decoded RGB arrays travel through a multiprocessing.shared_memory
+    block (created and unlinked here; the daemon copies the pixels out
+    before replying), so a 10 MB label is not pushed through the socket.
+
+    available() pings the daemon once per process and checks it reads the
+    same OCR_LANGUAGES at the same OCR_PRECISION (the OCR cache keys depend
+    on them). If the daemon is missing, refuses, or stops answering mid-run,
+    callers fall back to their own reader: DaemonOcr switches to an
+    in-process OcrBatcher, and readtext() raises DaemonUnavailable for the
+    caller to handle.
+
+    A daemon that is busy is slow, not gone: when a reply takes longer than
+    OCR_DAEMON_TIMEOUT the client pings it on a fresh connection (pings
+    don't queue behind OCR) and keeps waiting while it answers. Only a
+    closed connection or a failed ping counts as unavailable.
+
+Inputs:
+    - config.py: OCR_DAEMON_ENABLED, OCR_DAEMON_SOCKET, OCR_DAEMON_TIMEOUT,
+      OCR_LANGUAGES, OCR_PRECISION, OCR_BATCH_MAX_IMAGES
+    - Image paths or HxWx3 uint8 RGB arrays
+
+Outputs:
+    - readtext()-style results: [(bbox_polygon, text, confidence), ...]
+    - counters(): images OCR'd by the daemon and in-process fallbacks, and
+      how often a slow reply was waited out
+
+Usage:
+    from batchProcessor import ocr_client
+    if ocr_client.available():
+        results = ocr_client.readtext(rgb_array)
+
+Created: February 2026
+"""
+
+import json
+import os
+import select
+import socket
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    OCR_BATCH_MAX_IMAGES,
+    OCR_DAEMON_ENABLED,
+    OCR_DAEMON_SOCKET,
+    OCR_DAEMON_TIMEOUT,
+    OCR_LANGUAGES,
+    OCR_PRECISION,
+)
+
+
+class DaemonUnavailable(Exception):
+    """The OCR daemon is not running, or stopped answering."""
+
+
+_local = threading.local()  # per-thread connection
+_state_lock = threading.Lock()
+_state = {"checked": False, "up": False}
+_counts = {"daemon_images": 0, "fallback_images": 0, "slow_waits": 0}
+
+PING_TIMEOUT = 10  # seconds for the liveness ping while waiting on a slow reply
+
+
+# ── Connection ──
+
+def _connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(OCR_DAEMON_TIMEOUT)
+        try:
+            sock.connect(OCR_DAEMON_SOCKET)
+        except OSError as e:
+            sock.close()
+            raise DaemonUnavailable(f"OCR daemon not reachable at {OCR_DAEMON_SOCKET}: {e}") from e
+        conn = _local.conn = (sock, sock.makefile("rwb"))
+    return conn
+
+
+def _drop_connection():
+    conn = getattr(_local, "conn", None)
+    _local.conn = None
+    if conn is not None:
+        try:
+            conn[1].close()  # flushes, so a dead daemon can raise here too
+        except OSError:
+            pass
+        conn[0].close()
+
+
+def _wait_for_reply(sock: socket.socket):
+    """Block until a reply is readable, for as long as the daemon still answers pings."""
+    while True:
+        ready, _, _ = select.select([sock], [], [], OCR_DAEMON_TIMEOUT)
+        if ready:
+            return
+        try:
+            request({"op": "ping"}, OCR_DAEMON_SOCKET, timeout=PING_TIMEOUT)
+        except (DaemonUnavailable, ValueError) as e:
+            raise DaemonUnavailable(f"no reply in {OCR_DAEMON_TIMEOUT:.0f}s and ping failed: {e}") from e
+        with _state_lock:
+            _counts["slow_waits"] += 1
+        print(f"  OCR daemon busy (no reply in {OCR_DAEMON_TIMEOUT:.0f}s); still waiting")
+
+
+def request(message: dict, socket_path: str | None = None, timeout: float | None = None) -> dict:
+    """Send one request and return the reply (DaemonUnavailable on any transport failure)."""
+    if socket_path is not None:
+        # One-off connection (status checks and liveness pings)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout or OCR_DAEMON_TIMEOUT)
+            try:
+                sock.connect(socket_path)
+                with sock.makefile("rwb") as stream:
+                    stream.write(json.dumps(message).encode() + b"\n")
+                    stream.flush()
+                    line = stream.readline()
+            except OSError as e:
+                raise DaemonUnavailable(str(e)) from e
+        if not line:
+            raise DaemonUnavailable("OCR daemon closed the connection")
+        return json.loads(line)
+
+    try:
+        sock, stream = _connection()
+        stream.write(json.dumps(message).encode() + b"\n")
+        stream.flush()
+        _wait_for_reply(sock)
+        line = stream.readline()
+    except (OSError, DaemonUnavailable) as e:
+        _drop_connection()
+        raise DaemonUnavailable(f"OCR daemon connection failed: {e}") from e
+    if not line:
+        _drop_connection()
+        raise DaemonUnavailable("OCR daemon closed the connection")
+    return json.loads(line)
+
+
+def available() -> bool:
+    """Whether the daemon is up and reads OCR_LANGUAGES at OCR_PRECISION (checked once per process)."""
+    with _state_lock:
+        if _state["checked"]:
+            return _state["up"]
+        _state["checked"] = True
+        if not OCR_DAEMON_ENABLED or not os.path.exists(OCR_DAEMON_SOCKET):
+            return False
+    try:
+        reply = request({"op": "ping"})
+        up = (reply.get("ok") and reply.get("languages") == list(OCR_LANGUAGES)
+              and reply.get("precision", "int8") == OCR_PRECISION)
+    except (DaemonUnavailable, ValueError):
+        up = False
+    with _state_lock:
+        _state["up"] = bool(up)
+    return bool(up)
+
+
+def mark_down():
+    """Stop using the daemon for the rest of this process."""
+    with _state_lock:
+        _state["checked"], _state["up"] = True, False
+
+
+# ── OCR ──
+
+def readtext(image) -> list:
+    """OCR an image path or RGB array on the daemon; raises DaemonUnavailable."""
+    if isinstance(image, str):
+        reply = request({"op": "readtext", "path": os.path.abspath(image)})
+    else:
+        from multiprocessing import shared_memory
+
+        import numpy as np
+
+        rgb = np.ascontiguousarray(image, dtype=np.uint8)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, rgb.nbytes))
+        try:
+            np.ndarray(rgb.shape, dtype=np.uint8, buffer=shm.buf)[...] = rgb
+            reply = request({"op": "readtext", "shm": shm.name, "shape": list(rgb.shape)})
+        finally:
+            shm.close()
+            shm.unlink()
+    if not reply.get("ok"):
+        raise RuntimeError(f"OCR daemon: {reply.get('error')}")
+    with _state_lock:
+        _counts["daemon_images"] += 1
+    return [(bbox, text, conf) for bbox, text, conf in reply["results"]]
+
+
+class DaemonOcr:
+    """OcrBatcher stand-in that OCRs on the daemon, or in-process once it is gone.
+
+    The daemon batches requests from every process itself, so images are
+    simply sent from a few threads here. `fallback_factory` builds the
+    in-process OcrBatcher, and is only called if the daemon stops answering.
+    """
+
+    def __init__(self, fallback_factory):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._fallback_factory = fallback_factory
+        self._fallback = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, OCR_BATCH_MAX_IMAGES), thread_name_prefix="ocr-daemon")
+
+    def _local_batcher(self):
+        with self._lock:
+            if self._fallback is None:
+                self._fallback = self._fallback_factory()
+        return self._fallback
+
+    def _run(self, rgb):
+        if available():
+            try:
+                return readtext(rgb)
+            except DaemonUnavailable as e:
+                print(f"  OCR daemon unavailable ({e}); continuing with in-process OCR")
+                mark_down()
+        with _state_lock:
+            _counts["fallback_images"] += 1
+        return self._local_batcher().submit(rgb).result()
+
+    def submit(self, rgb):
+        """Queue one image; the returned Future resolves to readtext()-style results."""
+        return self._pool.submit(self._run, rgb)
+
+    def counters(self) -> dict:
+        """The in-process batcher's counters (zero while the daemon is serving)."""
+        if self._fallback is not None:
+            return self._fallback.counters()
+        return {"images": 0, "batches": 0, "largest_batch": 0}
+
+
+def counters() -> dict:
+    with _state_lock:
+        return dict(_counts)
@@ -0,0 +1,180 @@
+"""
+Indexed fuzzy matching of extracted field text against one image's OCR.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    The original matcher re-normalized every OCR item for every field, ran
+    SequenceMatcher on each item against the whole field, a word x word
+    SequenceMatcher loop, and a consecutive-group search - 14 fields, both
+    sides. On dense back labels that is most of the non-OCR CPU per app.
+
+    OcrIndex normalizes an image's OCR items once (text, words, character
+    counts). find_regions() makes exactly the same decisions as the
+    original, but skips SequenceMatcher whenever a cheap upper bound
+    already settles the comparison:
+
+        - length bound   ratio <= 2*min(len a, len b) / (len a + len b)
+        - multiset bound ratio <= 2*|chars(a) & chars(b)| / (len a + len b)
+                         (difflib's quick_ratio, from precomputed counts)
+
+    An item whose bounds can't reach the word score or min_similarity, or a
+    group that can't beat the current best, is never scored in full. Word
+    pair results are memoized (OCR words repeat across items and fields),
+    and one SequenceMatcher per field keeps difflib's analysis of the
+    field text instead of rebuilding it for every item.
+
+    Scores are still difflib ratios, not edit distances: the match
+    thresholds (0.3 / 0.6 and the group comparison) were tuned on them, and
+    swapping the metric would move crops on real labels.
+
+Inputs:
+    - OCR items {text, bbox_polygon, confidence} for one image
+    - Extracted field text
+
+Outputs:
+    - Matching OCR items (same as the original find_ocr_regions_for_field)
+
+Created: February 2026
+"""
+
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+_PUNCT = re.compile(r"[./,;:_|!']")
+
+
+def normalize(s: str) -> str:
+    """Normalize text for fuzzy matching — strip punctuation and collapse whitespace."""
+    s = s.upper()
+    # Replace common OCR confusions and punctuation with canonical forms
+    s = _PUNCT.sub("", s)
+    return " ".join(s.split())
+
+
+class OcrIndex:
+    """One image's OCR items, normalized once for matching many fields."""
+
+    def __init__(self, ocr_items: list[dict]):
+        self.items = ocr_items
+        # (original position, item, normalized text, words, character counts)
+        self.entries = []
+        for i, item in enumerate(ocr_items):
+            norm = normalize(item["text"])
+            if norm:
+                self.entries.append((i, item, norm, norm.split(), Counter(norm)))
+
+
+def _counts_bound(a_counts: Counter, a_len: int, b_counts: Counter, b_len: int) -> float:
+    """difflib quick_ratio() from precomputed character counts (>= ratio())."""
+    if len(a_counts) > len(b_counts):
+        a_counts, b_counts = b_counts, a_counts
+    common = sum(min(n, b_counts[c]) for c, n in a_counts.items() if c in b_counts)
+    return 2.0 * common / (a_len + b_len)
+
+
+@lru_cache(maxsize=1 << 16)
+def _words_similar(item_word: str, field_word: str) -> bool:
+    """SequenceMatcher(None, item_word, field_word).ratio() > 0.6, skipping hopeless pairs."""
+    la, lb = len(item_word), len(field_word)
+    if 2.0 * min(la, lb) / (la + lb) <= 0.6:
+        return False
+    return SequenceMatcher(None, item_word, field_word).ratio() > 0.6
+
+
+def find_regions(index: OcrIndex, field_text: str, min_similarity: float = 0.3) -> list[dict]:
+    """Find OCR regions that match the extracted field text.
+
+    For short fields (brand, alc content), we look for the best matching single
+    or consecutive group of OCR items.
+    For long fields (qualifications), we gather all matching items.
+
+    Returns list of matching OCR items.
+    """
+    if not field_text or not index.items:
+        return []
+
+    field_norm = normalize(field_text)
+    field_words = field_norm.split()
+    field_len = len(field_norm)
+    field_counts = Counter(field_norm)
+
+    # Keeps difflib's preprocessing of the field text across all comparisons
+    matcher = SequenceMatcher(None)
+    matcher.set_seq2(field_norm)
+
+    word_hits = {}
+
+    # Score each OCR item by how much of its text appears in the field text
+    scored_items = []
+    for i, item, norm, words, counts in index.entries:
+        # Check if OCR text appears in the field text
+        if norm in field_norm:
+            score = len(norm) / max(field_len, 1)
+            scored_items.append((i, score, item, norm))
+            continue
+
+        # Word-level fuzzy matching (handles OCR char errors like I8→18)
+        fuzzy_word_matches = 0
+        for iw in words:
+            hit = word_hits.get(iw)
+            if hit is None:
+                hit = word_hits[iw] = any(_words_similar(iw, fw) for fw in field_words)
+            fuzzy_word_matches += hit
+        word_score = fuzzy_word_matches / max(len(words), 1) * 0.8
+
+        # String-level ratio only when it could change the score
+        ratio_bound = _counts_bound(counts, len(norm), field_counts, field_len) * 0.6
+        if ratio_bound <= word_score:
+            score = word_score
+        elif ratio_bound < min_similarity and word_score < min_similarity:
+            continue
+        else:
+            matcher.set_seq1(norm)
+            score = max(matcher.ratio() * 0.6, word_score)
+        if score >= min_similarity:
+            scored_items.append((i, score, item, norm))
+
+    if not scored_items:
+        return []
+
+    # Sort by position in the image (top-to-bottom, left-to-right)
+    scored_items.sort(key=lambda x: (x[2]["bbox_polygon"][0][1], x[2]["bbox_polygon"][0][0]))
+
+    # For short fields, try to find the best contiguous group
+    if len(field_words) <= 6:
+        # Find best single item or pair
+        best_score = 0
+        best_items = []
+        for _, score, item, _ in scored_items:
+            if score > best_score:
+                best_score = score
+                best_items = [item]
+
+        # Also try consecutive pairs/triples from the scored items
+        for i in range(len(scored_items)):
+            for j in range(i + 1, min(i + 4, len(scored_items) + 1)):
+                group = scored_items[i:j]
+                combined = " ".join(s[3] for s in group)
+                combined_len = len(combined)
+                if 2.0 * min(combined_len, field_len) / (combined_len + field_len) <= best_score:
+                    continue
+                if _counts_bound(Counter(combined), combined_len, field_counts, field_len) <= best_score:
+                    continue
+                matcher.set_seq1(combined)
+                ratio = matcher.ratio()
+                if ratio > best_score:
+                    best_score = ratio
+                    best_items = [s[2] for s in group]
+
+        return best_items
+
+    # For long fields (qualifications), return all matching items
+    return [item for _, _, item, _ in scored_items]
@@ -0,0 +1,145 @@
+"""
+EasyOCR reader construction: fp32 or int8 weights, with the int8 modules cached on disk.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    We run EasyOCR with gpu=False, and recognition dominates per-app CPU
+    time in ocr_image() and ocr_mini_image(). process_labels.py,
+    verify_extractions.py and the OCR daemon all build their reader here,
+    at OCR_PRECISION:
+
+        fp32   the published weights as loaded
+        int8   torch dynamic quantization of the detector and recognizer:
+               LSTM/Linear weights stored as int8, activations quantized
+               on the fly (no calibration data needed)
+
+    int8 is what easyocr.Reader has always done on CPU (quantize=True is
+    its default), so it stays the default and its OCR cache keys are
+    unchanged; fp32 is there to compare against and as a fallback. Only
+    the recognizer's BiLSTM/Linear layers are covered by dynamic
+    quantization; the CRAFT detector is all convolutions, which it leaves
+    as fp32 (quantized_layers() reports the counts).
+
+    The reader is built from the fp32 weights (quantize=False) and the
+    int8 modules are swapped in from OCR_MODEL_DIR, so processes skip the
+    quantization pass and all of them run the same int8 weights. The cache
+    file is keyed by the easyocr and torch versions and the languages; an
+    unreadable or stale file is rebuilt. Writes go to a temp file and are
+    renamed into place.
+
+    tools/validate_ocr_precision.py compares int8 against fp32 on the
+    fixture labels (match scores and speed).
+
+Inputs:
+    - config.py: OCR_LANGUAGES, OCR_PRECISION, OCR_MODEL_DIR
+    - EasyOCR model weights (~/.EasyOCR/model)
+
+Outputs:
+    - easyocr.Reader instances
+    - data/ocr_models/int8-{key}.pt (quantized detector + recognizer)
+
+Usage:
+    from batchProcessor import ocr_reader
+    reader = ocr_reader.new_reader()          # OCR_PRECISION
+    reader = ocr_reader.new_reader("fp32")
+
+Created: February 2026
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import OCR_LANGUAGES, OCR_PRECISION, OCR_MODEL_DIR
+
+PRECISIONS = ("int8", "fp32")
+
+
+def _versions() -> str:
+    from importlib import metadata
+
+    parts = []
+    for package in ("easyocr", "torch"):
+        try:
+            parts.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            parts.append(f"{package}=unknown")
+    return "|".join(parts)
+
+
+def quantized_path(languages: list[str] | None = None) -> str:
+    """Cache file for the int8 modules of a reader with these languages."""
+    tag = _versions() + "|" + "|".join(languages or OCR_LANGUAGES)
+    return os.path.join(OCR_MODEL_DIR, f"int8-{hashlib.sha256(tag.encode()).hexdigest()[:16]}.pt")
+
+
+def quantize(module):
+    """Dynamic int8 copy of a network (the same call easyocr makes with quantize=True)."""
+    import torch
+
+    return torch.quantization.quantize_dynamic(module, dtype=torch.qint8)
+
+
+def quantized_layers(reader) -> dict:
+    """Number of int8 layers in the reader's detector and recognizer."""
+    return {
+        name: sum(1 for m in getattr(reader, name).modules() if ".quantized" in type(m).__module__)
+        for name in ("detector", "recognizer")
+    }
+
+
+def _load_quantized(path: str) -> dict | None:
+    import torch
+
+    if not os.path.exists(path):
+        return None
+    try:
+        modules = torch.load(path, map_location="cpu", weights_only=False)
+    except Exception as e:  # truncated file, or pickled by an incompatible easyocr/torch
+        print(f"  Rebuilding quantized OCR models ({os.path.basename(path)}: {e})")
+        return None
+    if not isinstance(modules, dict) or not {"detector", "recognizer"} <= modules.keys():
+        return None
+    return modules
+
+
+def _save_quantized(path: str, modules: dict):
+    import torch
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            torch.save(modules, f)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def new_reader(precision: str | None = None):
+    """A CPU easyocr.Reader for OCR_LANGUAGES at `precision` (default OCR_PRECISION)."""
+    import easyocr
+
+    precision = precision or OCR_PRECISION
+    if precision not in PRECISIONS:
+        raise ValueError(f"OCR precision must be one of {', '.join(PRECISIONS)}, not {precision!r}")
+
+    reader = easyocr.Reader(OCR_LANGUAGES, gpu=False, verbose=False, quantize=False)
+    if precision == "int8":
+        path = quantized_path()
+        modules = _load_quantized(path)
+        if modules is None:
+            modules = {"detector": quantize(reader.detector), "recognizer": quantize(reader.recognizer)}
+            _save_quantized(path, modules)
+        reader.detector = modules["detector"].eval()
+        reader.recognizer = modules["recognizer"].eval()
+    return reader
@@ -0,0 +1,252 @@
+"""
+Staged extraction pipeline with bounded queues between stages.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Runs the per-application steps of process_labels.py as separate stages
+    so that different applications overlap: app N+1's Claude Vision call is
+    in flight while app N is being OCR'd and app N-1 is being cropped and
+    exported.
+
+        feeder ──▶ [vision_q] ──▶ Vision (I/O thread pool)
+               ──▶ [ocr_q]    ──▶ EasyOCR (CPU process pool)
+               ──▶ [write_q]  ──▶ match/crop/DB/export (single writer)
+
+    Queues are bounded, so a slow stage applies back-pressure instead of
+    piling up decoded work in memory. A Vision failure skips OCR and goes
+    straight to the writer, which records the error.
+
+    OCR processes are spawned rather than forked, so they start without
+    copies of the parent's open SQLite connections.
+
+Inputs:
+    - List of pending (ttbId, front_image, back_image) rows
+    - Stage callables supplied by process_labels.py
+
+Actions:
+    - Checks the STOP file before feeding each application
+    - Tracks per-stage items, busy time and queue depths
+
+Outputs:
+    - Per-app elapsed times, stopped flag, and a per-stage report
+      printed alongside the TIMING SUMMARY
+
+Created: February 2026
+"""
+
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+_DONE = object()  # Sentinel that shuts a stage's threads down
+
+
+class StageStats:
+    """Counters for one pipeline stage and the queue that feeds it."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.first_start = None
+        self.last_end = None
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.depth_max = 0
+        self._lock = threading.Lock()
+
+    def sample_depth(self, depth: int):
+        with self._lock:
+            self.depth_total += depth
+            self.depth_samples += 1
+            self.depth_max = max(self.depth_max, depth)
+
+    def record(self, start: float, end: float):
+        with self._lock:
+            self.items += 1
+            self.busy_seconds += end - start
+            self.first_start = start if self.first_start is None else min(self.first_start, start)
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def summary(self) -> dict:
+        active = (self.last_end - self.first_start) if self.items else 0.0
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "avg_seconds": round(self.busy_seconds / self.items, 2) if self.items else 0.0,
+            "items_per_min": round(self.items / active * 60, 1) if active > 0 else 0.0,
+            "avg_queue_depth": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+            "max_queue_depth": self.depth_max,
+        }
+
+
+def _put(q: queue.Queue, item, stage: StageStats):
+    q.put(item)
+    stage.sample_depth(q.qsize())
+
+
+def _init_ocr_process(threads: int):
+    """Keep each OCR process from claiming every core for torch."""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def run_pipeline(pending: list, db_path: str, stop_file: str, begin, vision, ocr, finish,
+                 vision_workers: int = 4, ocr_processes: int = 2) -> tuple[list[float], bool, list[dict]]:
+    """Run pending apps through the Vision → OCR → writer stages.
+
+    Args:
+        pending: (ttbId, front_img, back_img) rows
+        db_path: SQLite database (feeder and writer each open a connection)
+        stop_file: Path checked before each app is fed
+        begin(conn, ttb_id, front_img, back_img) -> (front_path, back_path): marks the app started
+        vision(front_path, back_path, ttb_id=) -> fields: network-bound, runs on threads
+        ocr(front_path, back_path, ttb_id=) -> (front_ocr, back_ocr): picklable, runs in processes
+        finish(conn, job): stores results or the error in job["error"]
+        vision_workers: Vision calls in flight at once
+        ocr_processes: EasyOCR worker processes (each loads its own model unless the OCR daemon is running)
+
+    Returns (per-app elapsed times, stopped_early, per-stage summaries).
+    """
+    queue_size = max(2, vision_workers)
+    vision_q = queue.Queue(maxsize=queue_size)
+    ocr_q = queue.Queue(maxsize=queue_size)
+    write_q = queue.Queue(maxsize=queue_size)
+
+    vision_stats = StageStats("vision", vision_workers)
+    ocr_stats = StageStats("ocr", ocr_processes)
+    write_stats = StageStats("write", 1)
+
+    stop = threading.Event()
+    app_times = []
+
+    def feeder():
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            for n, (ttb_id, front_img, back_img) in enumerate(pending, 1):
+                # Check for stop signal before each label
+                if os.path.exists(stop_file):
+                    stop.set()
+                    break
+                print(f"[{n}/{len(pending)}] Queued {ttb_id}")
+                front_path, back_path = begin(conn, ttb_id, front_img or "", back_img or "")
+                job = {
+                    "n": n,
+                    "ttb_id": ttb_id,
+                    "front_path": front_path,
+                    "back_path": back_path,
+                    "start": time.time(),
+                    "error": None,
+                }
+                _put(vision_q, job, vision_stats)
+        finally:
+            conn.close()
+
+    def vision_worker():
+        while True:
+            job = vision_q.get()
+            if job is _DONE:
+                return
+            start = time.time()
+            try:
+                job["fields"] = vision(job["front_path"], job["back_path"], ttb_id=job["ttb_id"])
+            except Exception as e:
+                job["error"] = e
+                job["error_stage"] = "vision"
+            vision_stats.record(start, time.time())
+            if job["error"] is None:
+                _put(ocr_q, job, ocr_stats)
+            else:
+                _put(write_q, job, write_stats)
+
+    cpu = os.cpu_count() or 1
+    # Spawned, not forked: a forked child inherits SQLite's per-process lock
+    # bookkeeping for this process's open connections, and after writing
+    # stage_outputs it can keep a SHARED lock that blocks the writer
+    pool = ProcessPoolExecutor(
+        max_workers=ocr_processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_ocr_process,
+        initargs=(max(1, cpu // ocr_processes),),
+    )
+
+    def ocr_worker():
+        while True:
+            job = ocr_q.get()
+            if job is _DONE:
+                return
+            start = time.time()
+            try:
+                job["front_ocr"], job["back_ocr"] = pool.submit(ocr, job["front_path"], job["back_path"], ttb_id=job["ttb_id"]).result()
+            except Exception as e:
+                job["error"] = e
+                job["error_stage"] = "ocr"
+            ocr_stats.record(start, time.time())
+            _put(write_q, job, write_stats)
+
+    def writer():
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            while True:
+                job = write_q.get()
+                if job is _DONE:
+                    return
+                start = time.time()
+                print(f"[{job['n']}/{len(pending)}] Writing {job['ttb_id']}...")
+                finish(conn, job)
+                end = time.time()
+                write_stats.record(start, end)
+                app_times.append(end - job["start"])
+                print(f"  ⏱ {end - job['start']:.1f}s for {job['ttb_id']}")
+        finally:
+            conn.close()
+
+    def start_threads(target, count, name):
+        threads = [threading.Thread(target=target, name=f"{name}-{k}", daemon=True) for k in range(count)]
+        for t in threads:
+            t.start()
+        return threads
+
+    try:
+        feed_thread = start_threads(feeder, 1, "feeder")
+        vision_threads = start_threads(vision_worker, vision_workers, "vision")
+        ocr_threads = start_threads(ocr_worker, ocr_processes, "ocr")
+        writer_thread = start_threads(writer, 1, "writer")
+
+        # Drain stage by stage: each stage shuts down once its upstream is done
+        for stage_threads, q in [(feed_thread, None), (vision_threads, vision_q), (ocr_threads, ocr_q), (writer_thread, write_q)]:
+            if q is not None:
+                for _ in stage_threads:
+                    q.put(_DONE)
+            for t in stage_threads:
+                t.join()
+    finally:
+        pool.shutdown(wait=True)
+
+    return app_times, stop.is_set(), [s.summary() for s in (vision_stats, ocr_stats, write_stats)]
+
+
+def print_stage_report(stage_summaries: list[dict]):
+    """Print per-stage throughput and queue depth."""
+    print(f"\n{'Stage':<8} {'Workers':>7} {'Items':>6} {'Avg s':>7} {'Busy s':>8} {'Items/min':>10} {'Avg Q':>6} {'Max Q':>6}")
+    for s in stage_summaries:
+        print(
+            f"{s['stage']:<8} {s['workers']:>7} {s['items']:>6} {s['avg_seconds']:>7.2f} "
+            f"{s['busy_seconds']:>8.1f} {s['items_per_min']:>10.1f} {s['avg_queue_depth']:>6.1f} {s['max_queue_depth']:>6}"
+        )
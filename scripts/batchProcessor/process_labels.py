@@ -33,27 +33,55 @@ Inputs:
 Actions:
     - Queries database for pending applications
     - Sends front+back label images to Claude Vision for text extraction
-    - Runs EasyOCR on both images for bounding box detection
+      (or reuses a cached reply for identical images/prompt/model)
+    - Runs EasyOCR on both images for bounding box detection, in the
+      background while the Vision request is in flight (results are
+      cached on disk by image hash, see ocr_cache.py; on the warm OCR
+      daemon when it is running, see miniServer/ocr_daemon.py; int8
+      or fp32 weights per OCR_PRECISION, see ocr_reader.py)
     - Fuzzy-matches Claude text to OCR regions (handles OCR errors like I→1)
     - Crops mini-images with padding and rotation correction
     - Updates database with extracted fields and mini-image paths
     - Exports results immediately for real-time UI updates
+    - With --workers N, adapts Vision requests in flight (up to N) to API
+      latency and 429/529/timeout errors (AIMD, see concurrency.py)
+    - Retries transient Vision errors with jittered backoff / Retry-After, and
+      optionally hedges slow requests (--hedge, see api_retry.py)
+    - Optionally streams the Vision reply and matches/crops each field as
+      it is parsed, with OCR running meanwhile (--stream, json_stream.py)
+    - Optionally keeps up to N applications in flight (--workers N), or
+      runs Vision/OCR/export as overlapping pipeline stages (--pipeline),
+      or drives everything from one asyncio event loop (--async), or
+      submits Vision requests as Message Batches for backfills (--batch-api)
     - Supports graceful stop via STOP file signal
 
 Outputs:
     - Database updates: extracted_fields table with text, confidence, bbox
-    - output/extracted/{ttbId}_{fieldName}.png: Cropped mini-images
+    - htdocs/verification/extractions/{sharded}/{fieldName}.png (or .webp,
+      CROP_FORMAT): Cropped mini-images, written in place for the UI, and/or
+      atlas.png packing all of an app's crops (CROP_OUTPUT, crop_atlas.py)
     - htdocs/verification/stats.json: Real-time processing statistics
     - htdocs/verification/events.json: Operational event log
+    - Database updates: stage_timings per-app stage durations (report with
+      batchProcessor/stage_timings.py)
 
 Usage:
     cd scripts && python3 batchProcessor/process_labels.py
     cd scripts && python3 batchProcessor/process_labels.py --limit 5
     cd scripts && python3 batchProcessor/process_labels.py --ttb-id 24001001000101
+    cd scripts && python3 batchProcessor/process_labels.py --workers 4
+    cd scripts && python3 batchProcessor/process_labels.py --workers 8 --no-adaptive
+    cd scripts && python3 batchProcessor/process_labels.py --workers 4 --hedge
+    cd scripts && python3 batchProcessor/process_labels.py --ttb-id 24001001000101 --stream
+    cd scripts && python3 batchProcessor/process_labels.py --pipeline --workers 4 --ocr-processes 2
+    cd scripts && python3 batchProcessor/process_labels.py --async --workers 8 --rpm 50 --itpm 30000
+    cd scripts && python3 batchProcessor/process_labels.py --batch-api --poll-interval 60
 
 Created: February 2026
 """
 
+from __future__ import annotations
+
 import argparse
 import base64
 import json
@@ -61,27 +89,54 @@ import math
 import os
 import sqlite3
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
 from datetime import datetime, timezone
-from difflib import SequenceMatcher
+from typing import TYPE_CHECKING
 
-import anthropic
-import easyocr
-import numpy as np
-from PIL import Image, ImageOps
+# anthropic, easyocr (torch), numpy and PIL are imported where they are used,
+# so --help, lookups and runs served from caches don't pay for them
+if TYPE_CHECKING:
+    import anthropic
+    import easyocr
+    from PIL import Image
 
 # Add parent directory for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
     ANTHROPIC_MODEL,
+    API_REQUESTS_PER_MIN,
+    API_INPUT_TOKENS_PER_MIN,
     PROCESSING_DB,
     IMAGES_DIR,
-    OUTPUT_DIR,
+    OCR_LANGUAGES,
+    CROP_FORMAT,
+    CROP_OUTPUT,
+    CROP_PNG_COMPRESS_LEVEL,
+    CROP_WEBP_METHOD,
     VERIFY_FIELDS,
     STOP_FILE,
 )
 import stats
 import events
+from paths import get_extraction_image_path
 from batchProcessor.export_extractions import export_one
+from batchProcessor import vision_cache
+from batchProcessor import ocr_cache
+from batchProcessor import ocr_reader
+from batchProcessor import upload_prep
+from batchProcessor.label_images import AppImages, LabelImage
+from batchProcessor.ocr_matcher import OcrIndex, find_regions
+from batchProcessor.ocr_batcher import OcrBatcher
+from batchProcessor import ocr_client
+from batchProcessor import leases
+from batchProcessor import stage_outputs
+from batchProcessor.concurrency import AimdController
+from batchProcessor import api_retry
+from batchProcessor import stage_timings
+from batchProcessor import crop_atlas
+from batchProcessor.json_stream import JsonArrayStream
 
 # ── Vision prompt: text extraction only, no bboxes ──
 
@@ -152,124 +207,119 @@ For EACH field found, return:
 Return ONLY a JSON array. Include only fields that are visible on the labels."""
 
 
+VISION_MAX_TOKENS = 4096
+
+# The instructions go in a cached system block ahead of the images, so every
+# request shares the same prefix. Bump when the request layout changes (part
+# of the Vision cache key).
+VISION_REQUEST_LAYOUT = "system-cached-v1"
+VISION_USER_TEXT = "Extract the label fields from these images."
+
+
 # ── EasyOCR reader (lazy singleton) ──
 
 _ocr_reader = None
+_ocr_reader_lock = threading.Lock()
 
 
 def get_ocr_reader() -> easyocr.Reader:
     global _ocr_reader
-    if _ocr_reader is None:
-        _ocr_reader = easyocr.Reader(["en"], gpu=False, verbose=False)
+    # Lock so concurrent workers don't each load the model weights
+    with _ocr_reader_lock:
+        if _ocr_reader is None:
+            _ocr_reader = ocr_reader.new_reader()  # at OCR_PRECISION
     return _ocr_reader
 
 
-# ── OCR the image and get word-level bounding boxes ──
-
-def ocr_image(image_path: str) -> list[dict]:
-    """Run EasyOCR on an image and return list of {text, bbox_polygon, confidence}.
-
-    bbox_polygon is [[x1,y1], [x2,y2], [x3,y3], [x4,y4]] — four corners.
-    """
-    if not image_path or not os.path.exists(image_path):
-        return []
-
-    reader = get_ocr_reader()
-    results = reader.readtext(image_path)
+_ocr_batcher = None
 
-    ocr_items = []
-    for bbox_polygon, text, conf in results:
-        coords = [[int(p) for p in pt] for pt in bbox_polygon]
-        ocr_items.append({"text": text, "bbox_polygon": coords, "confidence": conf})
 
-    return ocr_items
+def get_ocr_batcher() -> OcrBatcher | ocr_client.DaemonOcr:
+    """Batched OCR service shared by every worker thread in this process.
 
+    When the OCR daemon is running, images go to it and this process never
+    loads the model (unless the daemon goes away mid-run).
+    """
+    global _ocr_batcher
+    with _ocr_reader_lock:
+        if _ocr_batcher is None:
+            if ocr_client.available():
+                _ocr_batcher = ocr_client.DaemonOcr(lambda: OcrBatcher(get_ocr_reader))
+            else:
+                _ocr_batcher = OcrBatcher(get_ocr_reader)
+    return _ocr_batcher
 
-# ── Match extracted field text to OCR regions ──
 
-def normalize(s: str) -> str:
-    """Normalize text for fuzzy matching — strip punctuation and collapse whitespace."""
-    import re
-    s = s.upper()
-    # Replace common OCR confusions and punctuation with canonical forms
-    s = re.sub(r"[./,;:_|!']", "", s)
-    return " ".join(s.split())
+# ── OCR the image and get word-level bounding boxes ──
 
+def ocr_key(image: LabelImage) -> str:
+    """OCR cache key (and stage_outputs input hash) for a loaded image."""
+    return ocr_cache.key_for_digest(image.sha256, OCR_LANGUAGES)
 
-def find_ocr_regions_for_field(field_text: str, ocr_items: list[dict], min_similarity: float = 0.3) -> list[dict]:
-    """Find OCR regions that match the extracted field text.
 
-    For short fields (brand, alc content), we look for the best matching single
-    or consecutive group of OCR items.
-    For long fields (qualifications), we gather all matching items.
+def ocr_images(images: list[LabelImage | None], seconds: list[float] | None = None) -> list[list[dict]]:
+    """Run EasyOCR on several images, returning a list of {text, bbox_polygon, confidence} per image.
 
-    Returns list of matching OCR items.
+    bbox_polygon is [[x1,y1], [x2,y2], [x3,y3], [x4,y4]] — four corners.
+    Results are cached on disk by image content, so reprocessing skips inference.
+    Cache misses are submitted to the batched OCR service together, so they
+    can share detector batches with other in-flight applications.
+    If `seconds` is given it receives, per image, the time until its result was ready.
     """
-    if not field_text or not ocr_items:
-        return []
-
-    field_norm = normalize(field_text)
-    field_words = field_norm.split()
+    import time
 
-    # Score each OCR item by how much of its text appears in the field text
-    scored_items = []
-    for i, item in enumerate(ocr_items):
-        item_norm = normalize(item["text"])
-        if not item_norm:
+    start = time.perf_counter()
+    results = [[] for _ in images]
+    ready = [0.0 for _ in images]
+    pending = []
+    for i, image in enumerate(images):
+        if image is None:
             continue
-
-        # Check if OCR text appears in the field text
-        if item_norm in field_norm:
-            score = len(item_norm) / max(len(field_norm), 1)
-            scored_items.append((i, score, item))
+        cache_key = ocr_key(image)
+        cached = ocr_cache.get(cache_key)
+        if cached is not None:
+            results[i] = cached
+            ready[i] = time.perf_counter() - start
         else:
-            # Fuzzy match at string level
-            ratio = SequenceMatcher(None, item_norm, field_norm).ratio()
-
-            # Word-level fuzzy matching (handles OCR char errors like I8→18)
-            item_words = item_norm.split()
-            fuzzy_word_matches = 0
-            for iw in item_words:
-                for fw in field_words:
-                    if SequenceMatcher(None, iw, fw).ratio() > 0.6:
-                        fuzzy_word_matches += 1
-                        break
-            word_score = fuzzy_word_matches / max(len(item_words), 1)
-
-            score = max(ratio * 0.6, word_score * 0.8)
-            if score >= min_similarity:
-                scored_items.append((i, score, item))
-
-    if not scored_items:
-        return []
+            pending.append((i, cache_key, get_ocr_batcher().submit(image.rgb_array())))
+
+    for i, cache_key, future in pending:
+        ocr_items = []
+        for bbox_polygon, text, conf in future.result():
+            coords = [[int(p) for p in pt] for pt in bbox_polygon]
+            ocr_items.append({"text": text, "bbox_polygon": coords, "confidence": float(conf)})
+        ocr_cache.put(cache_key, ocr_items)
+        results[i] = ocr_items
+        ready[i] = time.perf_counter() - start
+    if seconds is not None:
+        seconds[:] = ready
+    return results
+
+
+def ocr_image(image: str | LabelImage | None) -> list[dict]:
+    """OCR a single image, given a path or an already-loaded LabelImage (whose pixels are reused)."""
+    if isinstance(image, str):
+        if not os.path.exists(image):
+            return []
+        label = LabelImage(image)
+        try:
+            return ocr_images([label])[0]
+        finally:
+            label.close()
+    return ocr_images([image])[0]
 
-    # Sort by position in the image (top-to-bottom, left-to-right)
-    scored_items.sort(key=lambda x: (x[2]["bbox_polygon"][0][1], x[2]["bbox_polygon"][0][0]))
 
-    # For short fields, try to find the best contiguous group
-    if len(field_words) <= 6:
-        # Find best single item or pair
-        best_score = 0
-        best_items = []
-        for idx, score, item in scored_items:
-            if score > best_score:
-                best_score = score
-                best_items = [item]
-
-        # Also try consecutive pairs/triples from the scored items
-        for i in range(len(scored_items)):
-            for j in range(i + 1, min(i + 4, len(scored_items) + 1)):
-                group = [s[2] for s in scored_items[i:j]]
-                combined = " ".join(normalize(it["text"]) for it in group)
-                ratio = SequenceMatcher(None, combined, field_norm).ratio()
-                if ratio > best_score:
-                    best_score = ratio
-                    best_items = group
+# ── Match extracted field text to OCR regions ──
 
-        return best_items
+def find_ocr_regions_for_field(field_text: str, ocr_items: list[dict] | OcrIndex,
+                               min_similarity: float = 0.3) -> list[dict]:
+    """Find OCR regions that match the extracted field text (see ocr_matcher.py).
 
-    # For long fields (qualifications), return all matching items
-    return [item for _, _, item in scored_items]
+    Pass an OcrIndex to normalize an image's OCR items once across all fields.
+    Returns list of matching OCR items.
+    """
+    index = ocr_items if isinstance(ocr_items, OcrIndex) else OcrIndex(ocr_items)
+    return find_regions(index, field_text, min_similarity)
 
 
 def compute_text_angle(polygon: list) -> float:
@@ -303,6 +353,8 @@ def merge_bboxes(ocr_items: list[dict]) -> dict:
     if not ocr_items:
         return None
 
+    import numpy as np
+
     all_points = []
     angles = []
 
@@ -344,12 +396,38 @@ def merge_bboxes(ocr_items: list[dict]) -> dict:
 
 # ── Image cropping with rotation handling ──
 
-def crop_region(image_path: str, bbox: dict, output_path: str, padding_px: int = 8):
-    """Crop a region from the image with padding, de-rotate if needed."""
-    if not os.path.exists(image_path):
+CROP_EXT = "webp" if CROP_FORMAT == "WEBP" else "png"
+
+
+def save_crop(image: Image.Image, output_path: str):
+    """Encode a mini-image for speed over size: PNG at a low zlib level or lossless WebP."""
+    if output_path.endswith(".webp"):
+        image.save(output_path, "WEBP", lossless=True, method=CROP_WEBP_METHOD)
+    else:
+        image.save(output_path, "PNG", compress_level=CROP_PNG_COMPRESS_LEVEL)
+
+def crop_region(image: str | Image.Image, bbox: dict, output_path: str, padding_px: int = 8):
+    """Crop a region from the image (a path or decoded image) with padding, de-rotate if needed."""
+    if isinstance(image, str):
+        if not os.path.exists(image):
+            return False
+        from PIL import Image
+
+        with Image.open(image) as img:
+            return crop_region(img, bbox, output_path, padding_px)
+
+    cropped = crop_image(image, bbox, padding_px)
+    if cropped is None:
         return False
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    save_crop(cropped, output_path)
+    return True
+
+
+def crop_image(img: Image.Image, bbox: dict, padding_px: int = 8) -> Image.Image | None:
+    """The padded, de-rotated, contrast-lifted crop of a region (None if it is empty)."""
+    from PIL import Image, ImageOps
 
-    img = Image.open(image_path)
     img_w, img_h = img.size
 
     x, y, w, h = bbox["x"], bbox["y"], bbox["w"], bbox["h"]
@@ -367,7 +445,7 @@ def crop_region(image_path: str, bbox: dict, output_path: str, padding_px: int =
     y2 = min(img_h, y + h + pad)
 
     if x2 - x1 <= 0 or y2 - y1 <= 0:
-        return False
+        return None
 
     cropped = img.crop((x1, y1, x2, y2))
 
@@ -393,24 +471,21 @@ def crop_region(image_path: str, bbox: dict, output_path: str, padding_px: int =
     except Exception:
         pass  # Skip if auto-contrast fails (e.g., single-color image)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    cropped.save(output_path)
-    return True
+    return cropped
 
 
 # ── Claude Vision API ──
 
 def encode_image(path: str) -> tuple[str, str]:
-    ext = os.path.splitext(path)[1].lower()
-    media_types = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp"}
-    media_type = media_types.get(ext, "image/png")
-    with open(path, "rb") as f:
+    """Base64 of the right-sized upload for a label (see upload_prep.py)."""
+    upload = upload_prep.prepare_upload(path)
+    with open(upload["path"], "rb") as f:
         data = base64.standard_b64encode(f.read()).decode("ascii")
-    return data, media_type
+    return data, upload["media_type"]
 
 
-def call_vision_api(client: anthropic.Anthropic, front_path: str | None, back_path: str | None) -> list[dict]:
-    """Send label images to Claude Vision for text extraction only."""
+def build_vision_content(front_path: str | None, back_path: str | None) -> list[dict]:
+    """Build the user message content: labelled front/back images (instructions are in the system block)."""
     content = []
 
     for label, path in [("FRONT LABEL", front_path), ("BACK LABEL", back_path)]:
@@ -425,19 +500,13 @@ def call_vision_api(client: anthropic.Anthropic, front_path: str | None, back_pa
     if not content:
         return []
 
-    content.append({"type": "text", "text": VISION_PROMPT})
+    content.append({"type": "text", "text": VISION_USER_TEXT})
+    return content
 
-    import time as _time
-    api_start = _time.time()
-    response = client.messages.create(
-        model=ANTHROPIC_MODEL,
-        max_tokens=4096,
-        messages=[{"role": "user", "content": content}],
-    )
-    api_elapsed = _time.time() - api_start
-    events.api_response(api_elapsed)
 
-    text = response.content[0].text.strip()
+def parse_vision_text(text: str) -> list[dict]:
+    """Parse Claude's JSON array reply, stripping a markdown fence if present."""
+    text = text.strip()
     if text.startswith("```"):
         text = text.split("\n", 1)[1] if "\n" in text else text[3:]
         if text.endswith("```"):
@@ -447,119 +516,690 @@ def call_vision_api(client: anthropic.Anthropic, front_path: str | None, back_pa
     return json.loads(text)
 
 
-# ── Main processing ──
+def vision_request_params(front_path: str | None, back_path: str | None) -> dict | None:
+    """Build messages.create() parameters, or None if there are no images."""
+    content = build_vision_content(front_path, back_path)
+    if not content:
+        return None
+    return {
+        "model": ANTHROPIC_MODEL,
+        "max_tokens": VISION_MAX_TOKENS,
+        # Static instructions as a cacheable prefix (only cached once it
+        # reaches the model's minimum cacheable length)
+        "system": [{"type": "text", "text": VISION_PROMPT, "cache_control": {"type": "ephemeral"}}],
+        "messages": [{"role": "user", "content": content}],
+    }
 
-def process_one(client: anthropic.Anthropic, conn: sqlite3.Connection, ttb_id: str, front_img: str, back_img: str):
-    """Process a single application: Claude Vision → EasyOCR → crop."""
-    c = conn.cursor()
-    c.execute("UPDATE processing_results SET status='processing' WHERE ttbId=?", (ttb_id,))
-    conn.commit()
 
+def vision_cache_key(front_path: str | None, back_path: str | None, images: AppImages | None = None) -> str:
+    """Key for the Vision response cache: image bytes + everything in the request that shapes the reply.
+
+    With `images`, the labels' SHA-256s come from the already loaded bytes
+    instead of reading and hashing the files again.
+    """
+    digests = []
+    for path in (front_path, back_path):
+        label = images.get(path) if images is not None else None
+        digests.append(label.sha256 if label is not None else vision_cache.file_sha256(path))
+    return vision_cache.key_for_digests(digests, VISION_PROMPT, ANTHROPIC_MODEL, VISION_MAX_TOKENS,
+                                        upload_prep.settings_key(), VISION_REQUEST_LAYOUT)
+
+
+def cached_vision_fields(front_path: str | None, back_path: str | None,
+                         ttb_id: str | None = None, key: str | None = None) -> list[dict] | None:
+    """Fields from this app's stored Vision reply, or the Vision cache, or None."""
+    key = key or vision_cache_key(front_path, back_path)
+    stored = stage_outputs.get(ttb_id, "vision", key)
+    if stored is not None:
+        if stored["fields"] is not None:
+            print("  Vision: resumed from stored reply")
+            return stored["fields"]
+        try:
+            fields = parse_vision_text(stored["raw_text"])
+            print("  Vision: resumed from stored reply")
+            return fields
+        except (ValueError, TypeError, AttributeError):
+            # The same text would fail the same way on every rerun; ask again
+            print("  Vision: stored reply doesn't parse; requesting again")
+            stage_outputs.delete(ttb_id, "vision")
+
+    fields = vision_cache.get(key)
+    if fields is not None:
+        print("  Vision: cache hit")
+    return fields
+
+
+def remember_vision_fields(front_path: str | None, back_path: str | None, fields: list[dict] | None,
+                           ttb_id: str | None = None, raw_text: str | None = None, key: str | None = None):
+    """Store a Vision reply: raw text per app (before parsing, fields=None) and parsed fields in the cache."""
+    key = key or vision_cache_key(front_path, back_path)
+    stage_outputs.put(ttb_id, "vision", key, {"raw_text": raw_text, "fields": fields})
+    if fields is not None:
+        vision_cache.put(key, fields)
+
+
+_usage = {"requests": 0, "input_tokens": 0, "output_tokens": 0,
+          "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+_usage_lock = threading.Lock()
+
+
+def record_usage(usage):
+    """Add one response's token usage (incl. prompt cache reads/writes) to the run totals."""
+    with _usage_lock:
+        _usage["requests"] += 1
+        for name in ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"):
+            _usage[name] += getattr(usage, name, None) or 0
+
+
+def usage_totals() -> dict:
+    with _usage_lock:
+        return dict(_usage)
+
+
+# Adaptive limit on Vision requests in flight (set up in main() when --workers > 1)
+_concurrency: AimdController | None = None
+# Duplicate Vision requests that run past the p95 response time (--hedge)
+_hedge = False
+# Stream Vision replies and match/crop each field as it arrives (--stream)
+_stream = False
+
+
+def api_error_kind(e: Exception) -> str | None:
+    """Overload signal carried by an API exception: 429, 529 or a timeout."""
+    import anthropic
+
+    if isinstance(e, anthropic.APITimeoutError):
+        return "timeout"
+    return {429: "rate_limited", 529: "overloaded"}.get(getattr(e, "status_code", None))
+
+
+def report_api_outcome(api_elapsed: float | None = None, error: Exception | None = None):
+    """Feed one request's latency or overload error to the adaptive controller."""
+    if _concurrency is None:
+        return
+    if error is not None:
+        kind = api_error_kind(error)
+        if kind:
+            _concurrency.record_error(kind)
+    else:
+        _concurrency.record_success(api_elapsed)
+
+
+def call_vision_api(client: anthropic.Anthropic, front_path: str | None, back_path: str | None,
+                    ttb_id: str | None = None, key: str | None = None) -> list[dict]:
+    """Send label images to Claude Vision for text extraction only.
+
+    `key` is the app's vision_cache_key(), if the caller already has it.
+    """
+    key = key or vision_cache_key(front_path, back_path)
+    fields = cached_vision_fields(front_path, back_path, ttb_id, key)
+    if fields is not None:
+        return fields
+
+    with stage_timings.timed(ttb_id, "encode"):
+        params = vision_request_params(front_path, back_path)
+    if params is None:
+        return []
+
+    import time as _time
+
+    def send(attempt: api_retry.Attempt):
+        with _concurrency.slot() if _concurrency else nullcontext():
+            attempt.begin()
+            api_start = _time.time()
+            try:
+                response = client.messages.create(**params)
+            except Exception as e:
+                report_api_outcome(error=e)
+                raise
+            api_elapsed = _time.time() - api_start
+        report_api_outcome(api_elapsed)
+        api_retry.record_latency(api_elapsed)
+        events.api_response(api_elapsed)
+        record_usage(response.usage)
+        return response
+
+    # Retries retryable errors with backoff / Retry-After, hedges slow attempts
+    with stage_timings.timed(ttb_id, "vision"):
+        response = api_retry.call(send, hedge=_hedge)
+
+    # Keep the paid reply before anything that can fail
+    text = response.content[0].text
+    remember_vision_fields(front_path, back_path, None, ttb_id, text, key)
+    fields = parse_vision_text(text)
+    remember_vision_fields(front_path, back_path, fields, ttb_id, text, key)
+    return fields
+
+
+def stream_vision_api(client: anthropic.Anthropic, front_path: str | None, back_path: str | None,
+                      ttb_id: str | None = None, on_field=None, key: str | None = None) -> list[dict]:
+    """call_vision_api() over messages.stream(), calling on_field(field) as each one is parsed.
+
+    Retries work as in call_vision_api(); a retried reply repeats fields
+    already handed on, so each field_name is passed to on_field once.
+    Requests are never hedged (a duplicate would stream a second copy).
+    A cached or stored reply is handed on whole. Returns all fields.
+
+    If a field fails to parse or on_field raises, the rest of the reply is
+    still read and stored before the error is raised, so it is not paid
+    for again.
+    """
+    key = key or vision_cache_key(front_path, back_path)
+    fields = cached_vision_fields(front_path, back_path, ttb_id, key)
+    if fields is not None:
+        for field in fields:
+            on_field(field)
+        return fields
+
+    with stage_timings.timed(ttb_id, "encode"):
+        params = vision_request_params(front_path, back_path)
+    if params is None:
+        return []
+
+    import time as _time
+
+    delivered = set()  # field names already handed to on_field
+
+    def send(attempt: api_retry.Attempt):
+        with _concurrency.slot() if _concurrency else nullcontext():
+            attempt.begin()
+            api_start = _time.time()
+            parser = JsonArrayStream()
+            failure = None  # from parsing or on_field; raised once the reply is stored
+            try:
+                with client.messages.stream(**params) as stream:
+                    for chunk in stream.text_stream:
+                        if failure is not None:
+                            continue  # keep reading: the whole reply is paid for either way
+                        try:
+                            for field in parser.feed(chunk):
+                                if not delivered:
+                                    stage_timings.add(ttb_id, "first_field", _time.time() - api_start)
+                                name = field.get("field_name") if isinstance(field, dict) else None
+                                if name not in delivered:
+                                    delivered.add(name)
+                                    on_field(field)
+                        except Exception as e:
+                            failure = e
+                    response = stream.get_final_message()
+            except Exception as e:
+                report_api_outcome(error=e)
+                raise
+            api_elapsed = _time.time() - api_start
+        report_api_outcome(api_elapsed)
+        api_retry.record_latency(api_elapsed)
+        events.api_response(api_elapsed)
+        record_usage(response.usage)
+        if failure is not None:
+            remember_vision_fields(front_path, back_path, None, ttb_id, response.content[0].text, key)
+            raise failure
+        return response
+
+    with stage_timings.timed(ttb_id, "vision"):
+        response = api_retry.call(send, hedge=False)
+
+    # Keep the paid reply before anything that can fail
+    text = response.content[0].text
+    remember_vision_fields(front_path, back_path, None, ttb_id, text, key)
+    fields = parse_vision_text(text)
+    remember_vision_fields(front_path, back_path, fields, ttb_id, text, key)
+    return fields
+
+
+def estimate_input_tokens(front_path: str | None, back_path: str | None) -> int:
+    """Estimate request input tokens for rate limiting, before anything is sent.
+
+    Images cost about (width * height) / 750 tokens at the size actually
+    uploaded, capped at ~1600 per image. Only the PNG header is read here.
+    """
+    from PIL import Image
+
+    tokens = len(VISION_PROMPT) // 4 + len(VISION_USER_TEXT) // 4 + 20
+    for path in (front_path, back_path):
+        if path and os.path.exists(path):
+            with Image.open(path) as img:
+                w, h = upload_prep.target_size(*img.size)
+            tokens += min(int(w * h / 750), 1600)
+    return tokens
+
+
+async def call_vision_api_async(client: anthropic.AsyncAnthropic, limiter, front_path: str | None,
+                                back_path: str | None, ttb_id: str | None = None) -> list[dict]:
+    """Async variant of call_vision_api() for the asyncio engine.
+
+    Reading/base64-encoding the images runs in the default executor, and the
+    request waits on the adaptive limit, then on `limiter` (concurrency +
+    requests/min + input tokens/min).
+    """
+    import asyncio
+    import time as _time
+
+    loop = asyncio.get_running_loop()
+    key = await loop.run_in_executor(None, vision_cache_key, front_path, back_path)
+    fields = await loop.run_in_executor(None, cached_vision_fields, front_path, back_path, ttb_id, key)
+    if fields is not None:
+        return fields
+
+    with stage_timings.timed(ttb_id, "encode"):
+        params = await loop.run_in_executor(None, vision_request_params, front_path, back_path)
+    if params is None:
+        return []
+    estimated = await loop.run_in_executor(None, estimate_input_tokens, front_path, back_path)
+
+    async def send(attempt: api_retry.Attempt):
+        async with _concurrency.async_slot() if _concurrency else nullcontext():
+            async with limiter.slot(estimated) as slot:
+                attempt.begin()
+                api_start = _time.time()
+                try:
+                    response = await client.messages.create(**params)
+                except Exception as e:
+                    report_api_outcome(error=e)
+                    raise
+                api_elapsed = _time.time() - api_start
+                slot.actual_tokens = response.usage.input_tokens
+        report_api_outcome(api_elapsed)
+        api_retry.record_latency(api_elapsed)
+        events.api_response(api_elapsed)
+        record_usage(response.usage)
+        return response
+
+    with stage_timings.timed(ttb_id, "vision"):
+        response = await api_retry.call_async(send, hedge=_hedge)
+
+    text = response.content[0].text
+    await loop.run_in_executor(None, remember_vision_fields, front_path, back_path, None, ttb_id, text, key)
+    fields = parse_vision_text(text)
+    await loop.run_in_executor(None, remember_vision_fields, front_path, back_path, fields, ttb_id, text, key)
+    return fields
+
+
+# ── Main processing ──
+
+def image_paths(front_img: str, back_img: str) -> tuple[str | None, str | None]:
+    """Resolve an application's label image names to paths under IMAGES_DIR."""
     front_path = os.path.join(IMAGES_DIR, front_img) if front_img else None
     back_path = os.path.join(IMAGES_DIR, back_img) if back_img else None
+    return front_path, back_path
 
-    # Step 1: Claude Vision extracts field text
-    try:
-        fields = call_vision_api(client, front_path, back_path)
-    except anthropic.APITimeoutError as e:
-        c.execute(
-            "UPDATE processing_results SET status='error', processed_at=?, error_message=? WHERE ttbId=?",
-            (datetime.now(timezone.utc).isoformat(), str(e), ttb_id),
-        )
-        conn.commit()
+
+def mark_processing(conn: sqlite3.Connection, ttb_id: str):
+    """Mark the app 'processing' under this process's lease (see leases.py)."""
+    leases.lease(conn, ttb_id)
+    conn.commit()
+
+
+def mark_error(conn: sqlite3.Connection, ttb_id: str, message: str):
+    conn.execute(
+        "UPDATE processing_results SET status='error', processed_at=?, error_message=? WHERE ttbId=?",
+        (datetime.now(timezone.utc).isoformat(), message, ttb_id),
+    )
+    conn.commit()
+    log_to_stats(ttb_id, "error", message)
+
+
+def record_vision_error(conn: sqlite3.Connection, ttb_id: str, e: Exception):
+    """Mark an app as errored after the Vision call failed, and emit the API event."""
+    import anthropic
+
+    mark_error(conn, ttb_id, str(e))
+    if isinstance(e, anthropic.APITimeoutError):
         events.api_timeout(str(e))
-        log_to_stats(ttb_id, "error", str(e))
         print(f"  ERROR (timeout): {e}")
-        return
-    except Exception as e:
-        c.execute(
-            "UPDATE processing_results SET status='error', processed_at=?, error_message=? WHERE ttbId=?",
-            (datetime.now(timezone.utc).isoformat(), str(e), ttb_id),
-        )
-        conn.commit()
+    else:
         events.api_error(str(e))
-        log_to_stats(ttb_id, "error", str(e))
         print(f"  ERROR (vision): {e}")
-        return
 
-    # Step 2: OCR both images for precise bounding boxes
-    print("  Running OCR...")
-    front_ocr = ocr_image(front_path)
-    back_ocr = ocr_image(back_path)
 
-    # Step 3: For each field, match text to OCR regions and crop
-    extracted_count = 0
-    for field in fields:
+def ocr_pair(front_path: str | None, back_path: str | None, images: AppImages | None = None,
+             ttb_id: str | None = None) -> tuple[list[dict], list[dict]]:
+    """OCR both label images for precise bounding boxes.
+
+    With `images`, the decoded pixels are kept there for the crops that follow.
+    With `ttb_id`, each side's items are stored in (and resumed from) stage_outputs.
+    """
+    if images is None:
+        with AppImages() as own:
+            return ocr_pair(front_path, back_path, own, ttb_id)
+
+    import time
+
+    start = time.perf_counter()
+    sides = [("ocr_front", images.get(front_path)), ("ocr_back", images.get(back_path))]
+    results = [[], []]
+    todo = []
+    for i, (stage, label) in enumerate(sides):
+        if label is None:
+            continue
+        stored = stage_outputs.get(ttb_id, stage, ocr_key(label))
+        if stored is not None:
+            results[i] = stored
+            stage_timings.add(ttb_id, stage, time.perf_counter() - start)
+        else:
+            todo.append(i)
+
+    if todo:
+        ocr_start = time.perf_counter()
+        seconds = []
+        for i, ocr_items in zip(todo, ocr_images([sides[i][1] for i in todo], seconds)):
+            stage, label = sides[i]
+            stage_outputs.put(ttb_id, stage, ocr_key(label), ocr_items)
+            results[i] = ocr_items
+        for i, ready in zip(todo, seconds):
+            stage_timings.add(ttb_id, sides[i][0], ocr_start - start + ready)
+    # Written here too: in --pipeline this runs in an OCR process
+    stage_timings.flush(ttb_id)
+    return results[0], results[1]
+
+
+# ── OCR alongside the Vision request ──
+
+# Runs each app's ocr_pair() while its Vision request is in flight (sized in run_workers())
+_ocr_overlap: ThreadPoolExecutor | None = None
+_ocr_overlap_lock = threading.Lock()
+_overlap_counts = {"apps": 0, "saved_seconds": 0.0}
+
+
+def get_ocr_overlap() -> ThreadPoolExecutor:
+    global _ocr_overlap
+    with _ocr_overlap_lock:
+        if _ocr_overlap is None:
+            _ocr_overlap = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr-overlap")
+    return _ocr_overlap
+
+
+def timed_ocr_pair(front_path: str | None, back_path: str | None, images: AppImages,
+                   ttb_id: str | None) -> tuple[list[dict], list[dict], float]:
+    """ocr_pair() plus the seconds it took, for the overlap executor."""
+    import time
+
+    start = time.perf_counter()
+    front_ocr, back_ocr = ocr_pair(front_path, back_path, images, ttb_id)
+    return front_ocr, back_ocr, time.perf_counter() - start
+
+
+def record_ocr_overlap(ttb_id: str | None, vision_seconds: float, ocr_seconds: float, elapsed: float):
+    """Record how much sooner Vision + OCR finished together than one after the other."""
+    saved = max(0.0, vision_seconds + ocr_seconds - elapsed)
+    stage_timings.add(ttb_id, "ocr_overlap", saved)
+    with _ocr_overlap_lock:
+        _overlap_counts["apps"] += 1
+        _overlap_counts["saved_seconds"] += saved
+
+
+def overlap_counters() -> dict:
+    with _ocr_overlap_lock:
+        return dict(_overlap_counts)
+
+
+class FieldMatcher:
+    """Field → OCR region matching against one app's OCR, normalized once for all fields."""
+
+    def __init__(self, front_path: str | None, back_path: str | None,
+                 front_ocr: list[dict], back_ocr: list[dict]):
+        self.indexes = {"front": OcrIndex(front_ocr), "back": OcrIndex(back_ocr)}
+        self.positions = {side: {id(item): i for i, item in enumerate(index.items)}
+                          for side, index in self.indexes.items()}
+        self.side_paths = {"front": front_path, "back": back_path}
+
+    def decide(self, field_index: int, field: dict) -> dict | None:
+        """Decision for one field, or None for fields we don't verify."""
         field_name = field.get("field_name", "")
         if field_name not in VERIFY_FIELDS:
-            continue
+            return None
 
         extracted_text = field.get("extracted_text", "")
 
         # Don't enforce field locations — TTB allows fields on ANY label
         # Use the side Claude detected, but fall back to other side if no OCR match
         image_side = field.get("image_side", "front")
-
-        if image_side == "back" and back_path:
-            source_path = back_path
-            ocr_items = back_ocr
-        else:
-            source_path = front_path
-            ocr_items = front_ocr
+        source = "back" if image_side == "back" and self.side_paths["back"] else "front"
 
         # Try to find OCR match on detected side
-        matching_regions = find_ocr_regions_for_field(extracted_text, ocr_items)
+        matching_regions = find_ocr_regions_for_field(extracted_text, self.indexes[source])
 
         # If no match, try the other image
         if not matching_regions:
-            alt_ocr = front_ocr if image_side == "back" else back_ocr
-            alt_path = front_path if image_side == "back" else back_path
-            if alt_path and alt_ocr:
-                alt_regions = find_ocr_regions_for_field(extracted_text, alt_ocr)
+            alt = "front" if image_side == "back" else "back"
+            if self.side_paths[alt] and self.indexes[alt].items:
+                alt_regions = find_ocr_regions_for_field(extracted_text, self.indexes[alt])
                 if alt_regions:
                     matching_regions = alt_regions
-                    source_path = alt_path
-                    image_side = "front" if image_side == "back" else "back"
+                    source = alt
+                    image_side = alt
+
+        return {
+            "field_index": field_index,
+            "field_name": field_name,
+            "image_side": image_side,
+            "source": source,
+            "regions": [self.positions[source][id(item)] for item in matching_regions],
+        }
+
+
+def match_fields(fields: list[dict], front_path: str | None, back_path: str | None,
+                 front_ocr: list[dict], back_ocr: list[dict]) -> list[dict]:
+    """Decide which OCR regions (and which side) each extracted field comes from.
+
+    Returns one decision per field: {field_index, field_name, image_side,
+    source, regions}, where `source` is the side whose image/OCR is used and
+    `regions` are indices into that side's OCR items.
+    """
+    matcher = FieldMatcher(front_path, back_path, front_ocr, back_ocr)
+    decisions = [matcher.decide(i, field) for i, field in enumerate(fields)]
+    return [d for d in decisions if d is not None]
+
+
+class FieldSaver:
+    """Crops and stores one app's fields, a decision at a time, then marks it processed.
+
+    save_fields() feeds it every decision at once; with --stream,
+    process_one() feeds it each field as the Vision reply arrives (add()).
+    Rows are only written by finish(), so a failure part way leaves nothing.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, ttb_id: str, fields: list[dict],
+                 front_path: str | None, back_path: str | None,
+                 front_ocr: list[dict], back_ocr: list[dict], images: AppImages):
+        self.conn = conn
+        self.ttb_id = ttb_id
+        self.fields = fields
+        self.front_path, self.back_path = front_path, back_path
+        self.front_ocr, self.back_ocr = front_ocr, back_ocr
+        self.images = images
+        self.side_ocr = {"front": front_ocr, "back": back_ocr}
+        self.side_paths = {"front": front_path, "back": back_path}
+        self.decisions = []
+        self.crops = {}  # field → crop, for the atlas
+        self.rows = []
+        self._matcher = None
+
+    def add(self, field: dict):
+        """Match, crop and queue one more field (streamed in)."""
+        self.fields.append(field)
+        with stage_timings.timed(self.ttb_id, "match"):
+            if self._matcher is None:
+                self._matcher = FieldMatcher(self.front_path, self.back_path, self.front_ocr, self.back_ocr)
+            decision = self._matcher.decide(len(self.fields) - 1, field)
+        if decision is not None:
+            self.decisions.append(decision)
+            self.save(decision)
+
+    def save(self, decision: dict):
+        """Crop one decided field and queue its row."""
+        ttb_id = self.ttb_id
+        field_name = decision["field_name"]
+        field = self.fields[decision["field_index"]]
+        extracted_text = field.get("extracted_text", "")
+        matching_regions = [self.side_ocr[decision["source"]][i] for i in decision["regions"]]
+        source_path = self.side_paths[decision["source"]]
 
         merged_bbox = merge_bboxes(matching_regions) if matching_regions else None
         rotation = merged_bbox["rotation_degrees"] if merged_bbox else 0
 
-        mini_path = os.path.join(OUTPUT_DIR, f"{ttb_id}_{field_name}.png")
+        mini_path = get_extraction_image_path(ttb_id, field_name, CROP_EXT)
         saved = False
 
-        if merged_bbox and source_path and os.path.exists(source_path):
-            try:
-                saved = crop_region(source_path, merged_bbox, mini_path)
-            except Exception as e:
-                print(f"  Crop error for {field_name}: {e}")
+        with stage_timings.timed(ttb_id, "crop"):
+            source = self.images.get(source_path) if merged_bbox else None
+            if source is not None:
+                try:
+                    cropped = crop_image(source.image, merged_bbox)
+                    if cropped is not None:
+                        if CROP_OUTPUT != "files":
+                            self.crops[field_name] = cropped
+                        if CROP_OUTPUT in ("files", "both"):
+                            save_crop(cropped, mini_path)
+                            saved = True
+                except Exception as e:
+                    print(f"  Crop error for {field_name}: {e}")
 
         bbox_json = json.dumps([merged_bbox["x"], merged_bbox["y"], merged_bbox["w"], merged_bbox["h"]]) if merged_bbox else None
-
-        c.execute(
-            """INSERT INTO extracted_fields
-               (ttbId, field_name, extracted_text, confidence, mini_image_path, region_bbox, rotation_degrees)
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (
-                ttb_id,
-                field_name,
-                extracted_text,
-                field.get("confidence", 0),
-                mini_path if saved else None,
-                bbox_json,
-                rotation,
-            ),
-        )
-        extracted_count += 1
+        self.rows.append([ttb_id, field_name, extracted_text, field.get("confidence", 0),
+                          mini_path if saved else None, bbox_json, rotation, None])
         match_status = f"matched {len(matching_regions)} OCR regions" if matching_regions else "NO OCR MATCH"
-        print(f"  {field_name}: \"{extracted_text[:50]}\" ({match_status}, side={image_side})")
+        print(f"  {field_name}: \"{extracted_text[:50]}\" ({match_status}, side={decision['image_side']})")
+
+    def finish(self) -> int:
+        """Write the atlas and every row, and mark the app processed. Returns fields stored."""
+        ttb_id = self.ttb_id
+        if self.crops:
+            with stage_timings.timed(ttb_id, "crop"):
+                atlas, rects = crop_atlas.pack(self.crops)
+                atlas_path = get_extraction_image_path(ttb_id, crop_atlas.ATLAS_NAME, CROP_EXT)
+                save_crop(atlas, atlas_path)
+            for row in self.rows:
+                if row[1] in rects:
+                    row[4] = row[4] or atlas_path
+                    row[7] = json.dumps(rects[row[1]])
+
+        with stage_timings.timed(ttb_id, "db_write"):
+            c = self.conn.cursor()
+            c.executemany(
+                """INSERT INTO extracted_fields
+                   (ttbId, field_name, extracted_text, confidence, mini_image_path, region_bbox, rotation_degrees,
+                    atlas_rect)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                self.rows,
+            )
+            now = datetime.now(timezone.utc).isoformat()
+            c.execute(
+                "UPDATE processing_results SET status='processed', processed_at=? WHERE ttbId=?",
+                (now, ttb_id),
+            )
+            self.conn.commit()
+        log_to_stats(ttb_id, "processed", f"Extracted {len(self.rows)} fields")
+        return len(self.rows)
+
+
+def save_fields(conn: sqlite3.Connection, ttb_id: str, fields: list[dict],
+                front_path: str | None, back_path: str | None,
+                front_ocr: list[dict], back_ocr: list[dict],
+                images: AppImages | None = None) -> int:
+    """Match each extracted field to OCR regions, crop it, and store it.
+
+    Match decisions are stored in stage_outputs, so a rerun after a crop or
+    insert failure skips matching. Each label side is decoded once (or taken
+    from `images`) for all crops. Crops go to per-field files, an atlas
+    image, or both (CROP_OUTPUT, see crop_atlas.py). Marks the app
+    processed. Returns the number of fields stored.
+    """
+    if images is None:
+        with AppImages() as own:
+            return save_fields(conn, ttb_id, fields, front_path, back_path, front_ocr, back_ocr, own)
 
-    now = datetime.now(timezone.utc).isoformat()
-    c.execute(
-        "UPDATE processing_results SET status='processed', processed_at=? WHERE ttbId=?",
-        (now, ttb_id),
-    )
-    conn.commit()
-    log_to_stats(ttb_id, "processed", f"Extracted {extracted_count} fields")
+    with stage_timings.timed(ttb_id, "match"):
+        match_key = stage_outputs.input_hash(fields, front_ocr, back_ocr, front_path or "", back_path or "")
+        decisions = stage_outputs.get(ttb_id, "match", match_key)
+        if decisions is None:
+            decisions = match_fields(fields, front_path, back_path, front_ocr, back_ocr)
+            stage_outputs.put(ttb_id, "match", match_key, decisions)
+
+    saver = FieldSaver(conn, ttb_id, fields, front_path, back_path, front_ocr, back_ocr, images)
+    for decision in decisions:
+        saver.save(decision)
+    return saver.finish()
+
+
+def process_one(client: anthropic.Anthropic, conn: sqlite3.Connection, ttb_id: str, front_img: str, back_img: str):
+    """Process a single application: Claude Vision → EasyOCR → crop."""
+    mark_processing(conn, ttb_id)
+
+    front_path, back_path = image_paths(front_img, back_img)
+    if _stream:
+        process_one_streaming(client, conn, ttb_id, front_path, back_path)
+        return
+
+    import time
+
+    # OCR and cropping share one decode of each label, released when the app is done
+    with AppImages() as images:
+        # Loads both labels before OCR starts on them, so the key reuses their hashes
+        key = vision_cache_key(front_path, back_path, images)
+
+        # Step 1: OCR both images for precise bounding boxes, in the background...
+        print("  Running OCR...")
+        start = time.perf_counter()
+        ocr = get_ocr_overlap().submit(timed_ocr_pair, front_path, back_path, images, ttb_id)
+
+        # Step 2: ...while Claude Vision extracts field text
+        try:
+            fields = call_vision_api(client, front_path, back_path, ttb_id, key)
+        except Exception as e:
+            wait([ocr])  # OCR still holds the images (its results are cached for the retry)
+            record_vision_error(conn, ttb_id, e)
+            return
+        vision_seconds = time.perf_counter() - start
+        front_ocr, back_ocr, ocr_seconds = ocr.result()
+        record_ocr_overlap(ttb_id, vision_seconds, ocr_seconds, time.perf_counter() - start)
+
+        # Step 3: For each field, match text to OCR regions and crop
+        save_fields(conn, ttb_id, fields, front_path, back_path, front_ocr, back_ocr, images)
+
+
+def process_one_streaming(client: anthropic.Anthropic, conn: sqlite3.Connection, ttb_id: str,
+                          front_path: str | None, back_path: str | None):
+    """process_one() with a streamed Vision reply (--stream).
+
+    The Vision stream is read on a helper thread while this thread runs
+    OCR, then each field is matched and cropped as soon as it is parsed
+    rather than after the whole reply.
+    """
+    import queue
+
+    arrived = queue.Queue()  # fields, then `done` or the Vision error
+    done = object()
+
+    def read_stream(key: str):
+        try:
+            stream_vision_api(client, front_path, back_path, ttb_id, on_field=arrived.put, key=key)
+            arrived.put(done)
+        except Exception as e:
+            arrived.put(e)
+
+    with AppImages() as images:
+        reader = threading.Thread(target=read_stream, args=(vision_cache_key(front_path, back_path, images),),
+                                  name=f"vision-stream-{ttb_id}", daemon=True)
+        reader.start()
+
+        print("  Running OCR...")
+        front_ocr, back_ocr = ocr_pair(front_path, back_path, images, ttb_id)
+
+        saver = FieldSaver(conn, ttb_id, [], front_path, back_path, front_ocr, back_ocr, images)
+        while True:
+            item = arrived.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                reader.join()
+                record_vision_error(conn, ttb_id, item)
+                return
+            saver.add(item)
+        reader.join()
+
+        match_key = stage_outputs.input_hash(saver.fields, front_ocr, back_ocr, front_path or "", back_path or "")
+        stage_outputs.put(ttb_id, "match", match_key, saver.decisions)
+        saver.finish()
 
 
 def log_to_stats(ttb_id: str, action: str, message: str):
@@ -585,23 +1225,172 @@ def update_stats_summary():
     )
 
 
+def open_db() -> sqlite3.Connection:
+    """Open processing.db, waiting on locks held by other workers."""
+    return sqlite3.connect(PROCESSING_DB, timeout=30)
+
+
+def record_failure(conn: sqlite3.Connection, ttb_id: str, e: Exception):
+    """Record an unexpected error so one bad app doesn't take down a worker."""
+    conn.rollback()
+    mark_error(conn, ttb_id, str(e))
+    events.system_error(str(e), ttb_id)
+    print(f"  ERROR ({ttb_id}): {e}")
+
+
+def process_and_export(client: anthropic.Anthropic, conn: sqlite3.Connection, n: int, total: int,
+                       ttb_id: str, front_img: str, back_img: str) -> float:
+    """Process and export one application. Returns elapsed seconds."""
+    import time
+
+    app_start = time.time()
+    print(f"[{n}/{total}] Processing {ttb_id}...")
+    try:
+        process_one(client, conn, ttb_id, front_img or "", back_img or "")
+    except Exception as e:
+        record_failure(conn, ttb_id, e)
+
+    # Export this app's data immediately so it's available in the UI
+    with stage_timings.timed(ttb_id, "export"):
+        export_one(ttb_id, conn)
+    stage_timings.flush(ttb_id)
+
+    app_elapsed = time.time() - app_start
+    print(f"  ⏱ {app_elapsed:.1f}s for {ttb_id}")
+
+    # Update stats after each app for real-time UI feedback
+    update_stats_summary()
+    return app_elapsed
+
+
+def run_workers(client: anthropic.Anthropic, pending: list, workers: int = 1) -> tuple[list[float], bool]:
+    """Process pending apps with up to `workers` applications in flight.
+
+    All workers share one Anthropic client (it is thread-safe and pools
+    connections); each worker opens its own SQLite connection. The STOP
+    file is checked before each app is started, so in-flight apps finish.
+
+    Returns (per-app elapsed times, stopped_early).
+    """
+    # pending may be a LeaseQueue that claims rows as they are taken
+    work = enumerate(pending, 1)
+    work_lock = threading.Lock()
+
+    stop = threading.Event()
+    times_lock = threading.Lock()
+    app_times = []
+
+    def worker():
+        conn = open_db()
+        try:
+            while not stop.is_set():
+                # Check for stop signal before each label
+                if os.path.exists(STOP_FILE):
+                    stop.set()
+                    break
+                with work_lock:
+                    n, (ttb_id, front_img, back_img) = next(work, (None, (None, None, None)))
+                if n is None:
+                    break
+                elapsed = process_and_export(client, conn, n, len(pending), ttb_id, front_img, back_img)
+                with times_lock:
+                    app_times.append(elapsed)
+        finally:
+            conn.close()
+
+    threads = [
+        threading.Thread(target=worker, name=f"worker-{k}", daemon=True)
+        for k in range(max(1, min(workers, len(pending))))
+    ]
+    # One OCR thread per worker, so no app's OCR waits behind another's
+    global _ocr_overlap
+    with _ocr_overlap_lock:
+        _ocr_overlap = ThreadPoolExecutor(max_workers=len(threads), thread_name_prefix="ocr-overlap")
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    _ocr_overlap.shutdown()
+
+    if stop.is_set():
+        done = len(app_times)
+        print(f"\n*** STOP file detected - halting after {done} applications ***")
+        events.processing_stopped(done, len(pending) - done)
+
+    return app_times, stop.is_set()
+
+
+def begin_job(conn: sqlite3.Connection, ttb_id: str, front_img: str, back_img: str) -> tuple[str | None, str | None]:
+    """Pipeline feeder stage: mark the app started and resolve its images."""
+    mark_processing(conn, ttb_id)
+    return image_paths(front_img, back_img)
+
+
+def finish_job(conn: sqlite3.Connection, job: dict):
+    """Pipeline writer stage: match/crop/store fields (or record the error), then export."""
+    ttb_id = job["ttb_id"]
+    try:
+        if job["error"] is not None and job.get("error_stage") == "vision":
+            record_vision_error(conn, ttb_id, job["error"])
+        elif job["error"] is not None:
+            raise job["error"]
+        else:
+            save_fields(conn, ttb_id, job["fields"], job["front_path"], job["back_path"],
+                        job["front_ocr"], job["back_ocr"])
+    except Exception as e:
+        record_failure(conn, ttb_id, e)
+
+    with stage_timings.timed(ttb_id, "export"):
+        export_one(ttb_id, conn)
+    stage_timings.flush(ttb_id)
+    update_stats_summary()
+
+
 def main():
     import time
 
     parser = argparse.ArgumentParser(description="Process pending COLA label images")
     parser.add_argument("--limit", type=int, default=0, help="Max apps to process (0=all)")
     parser.add_argument("--ttb-id", type=str, help="Process single TTB ID (reprocess even if already done)")
+    parser.add_argument("--workers", type=int, default=1, help="Applications to keep in flight at once (default 1)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Run Vision, OCR and export as overlapping stages (--workers sets Vision calls in flight)")
+    parser.add_argument("--ocr-processes", type=int, default=2, help="EasyOCR processes for --pipeline (default 2)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio engine (--workers sets Vision requests in flight)")
+    parser.add_argument("--batch-api", action="store_true",
+                        help="Submit via Message Batches, poll, then OCR/crop/export (resumes open batches)")
+    parser.add_argument("--poll-interval", type=float, default=60, help="--batch-api: seconds between polls (default 60)")
+    parser.add_argument("--rpm", type=float, default=API_REQUESTS_PER_MIN,
+                        help=f"--async: API requests/min (default {API_REQUESTS_PER_MIN})")
+    parser.add_argument("--itpm", type=float, default=API_INPUT_TOKENS_PER_MIN,
+                        help=f"--async: API input tokens/min (default {API_INPUT_TOKENS_PER_MIN})")
+    parser.add_argument("--no-adaptive", action="store_true",
+                        help="Keep all --workers Vision requests in flight instead of adapting to API latency")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Send a duplicate Vision request when one runs past the p95 response time")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream Vision replies and match/crop each field as it arrives (default and --workers modes)")
     args = parser.parse_args()
+    if args.stream and (args.pipeline or args.use_async or args.batch_api):
+        parser.error("--stream works with the default and --workers modes only")
 
     if not os.path.exists(PROCESSING_DB):
         print("processing.db not found. Run make_demo_db.py first.")
         return
 
     total_start = time.time()
+    stage_timings.start_run()
 
-    client = anthropic.Anthropic()
+    import anthropic
 
-    conn = sqlite3.connect(PROCESSING_DB)
+    # Vision calls retry in api_retry (backoff, Retry-After, hedging); keep the SDK's own
+    # retries only for the Message Batches endpoints
+    client = anthropic.Anthropic(max_retries=2 if args.batch_api else 0)
+
+    conn = open_db()
+    leases.ensure_lease_columns(conn)
+    crop_atlas.ensure_atlas_column(conn)
     c = conn.cursor()
 
     if args.ttb_id:
@@ -616,56 +1405,107 @@ def main():
             return
         # Reset status to pending so it gets reprocessed
         c.execute("UPDATE processing_results SET status = 'pending' WHERE ttbId = ?", (args.ttb_id,))
-        # Clear existing extracted fields
+        # Clear existing extracted fields and stored stage outputs
         c.execute("DELETE FROM extracted_fields WHERE ttbId = ?", (args.ttb_id,))
+        stage_outputs.clear(conn, args.ttb_id)
         conn.commit()
         pending = [row]
     else:
-        query = """
-            SELECT a.ttbId, a.front_image_path, a.back_image_path
-            FROM applications a
-            JOIN processing_results p ON a.ttbId = p.ttbId
-            WHERE p.status = 'pending'
-        """
-        if args.limit > 0:
-            query += f" LIMIT {args.limit}"
-
-        c.execute(query)
-        pending = c.fetchall()
+        # Claimed atomically one app at a time, so several processes can share the backlog
+        pending = leases.LeaseQueue(PROCESSING_DB, max(0, args.limit))
 
     print(f"Found {len(pending)} pending applications")
+    if args.batch_api:
+        print(f"Message Batches mode: polling every {args.poll_interval:g}s")
+    elif args.use_async:
+        print(f"Async engine: {args.workers} requests in flight, {args.rpm:g} req/min, {args.itpm:g} input tokens/min")
+    elif args.pipeline:
+        print(f"Pipeline: {args.workers} Vision workers, {args.ocr_processes} OCR processes")
+    elif args.workers > 1:
+        print(f"Using {args.workers} workers")
 
     # Emit batch_started event (only if there's work to do)
     if pending:
         events.batch_started(len(pending))
         events.reset_api_state()
 
-    app_times = []
-    error_count = 0
-    stopped_early = False
-
-    for i, (ttb_id, front_img, back_img) in enumerate(pending, 1):
-        # Check for stop signal before each label
-        if os.path.exists(STOP_FILE):
-            print(f"\n*** STOP file detected - halting after {i-1} applications ***")
-            events.processing_stopped(i - 1, len(pending) - (i - 1))
-            stopped_early = True
-            break
-
-        app_start = time.time()
-        print(f"[{i}/{len(pending)}] Processing {ttb_id}...")
-        process_one(client, conn, ttb_id, front_img or "", back_img or "")
-
-        # Export this app's data immediately so it's available in the UI
-        export_one(ttb_id, conn)
-
-        app_elapsed = time.time() - app_start
-        app_times.append(app_elapsed)
-        print(f"  ⏱ {app_elapsed:.1f}s for this app")
+    global _concurrency, _hedge, _stream
+    _hedge = args.hedge
+    _stream = args.stream
+    if args.workers > 1 and not args.batch_api and not args.no_adaptive:
+        # --workers becomes the ceiling; the controller finds the level the API sustains
+        _concurrency = AimdController(args.workers)
 
-        # Update stats after each app for real-time UI feedback
-        update_stats_summary()
+    leases.start_heartbeat(PROCESSING_DB)
 
+    stage_summaries = []
+    try:
+        if args.batch_api:
+            from batchProcessor.batch_api import run_batch_api
+
+            # Runs even with nothing pending so open batches from a previous run are collected
+            app_times, stopped_early = run_batch_api(
+                client, pending, PROCESSING_DB, STOP_FILE,
+                begin=begin_job,
+                build_params=vision_request_params,
+                paths=image_paths,
+                parse=parse_vision_text,
+                ocr=ocr_pair,
+                finish=finish_job,
+                fail=mark_error,
+                cached=cached_vision_fields,
+                remember=remember_vision_fields,
+                cache_key=vision_cache_key,
+                usage=record_usage,
+                poll_interval=args.poll_interval,
+            )
+            if stopped_early:
+                events.processing_stopped(len(app_times), len(pending) - len(app_times))
+        elif args.use_async and pending:
+            from batchProcessor.async_engine import run_async
+
+            async_client = anthropic.AsyncAnthropic(max_retries=0)
+            app_times, stopped_early = run_async(
+                pending, PROCESSING_DB, STOP_FILE,
+                begin=begin_job,
+                vision_async=lambda front_path, back_path, limiter, ttb_id=None: call_vision_api_async(
+                    async_client, limiter, front_path, back_path, ttb_id),
+                ocr=ocr_pair,
+                finish=finish_job,
+                fail=record_failure,
+                concurrency=max(1, args.workers),
+                requests_per_min=args.rpm,
+                input_tokens_per_min=args.itpm,
+                ocr_threads=max(2, args.workers),
+            )
+            if stopped_early:
+                done = len(app_times)
+                print(f"\n*** STOP file detected - halting after {done} applications ***")
+                events.processing_stopped(done, len(pending) - done)
+        elif args.pipeline and pending:
+            from batchProcessor.pipeline import run_pipeline
+
+            app_times, stopped_early, stage_summaries = run_pipeline(
+                pending, PROCESSING_DB, STOP_FILE,
+                begin=begin_job,
+                vision=lambda front_path, back_path, ttb_id=None: call_vision_api(client, front_path, back_path, ttb_id),
+                ocr=ocr_pair,
+                finish=finish_job,
+                vision_workers=max(1, args.workers),
+                ocr_processes=max(1, args.ocr_processes),
+            )
+            if stopped_early:
+                done = len(app_times)
+                print(f"\n*** STOP file detected - halting after {done} applications ***")
+                events.processing_stopped(done, len(pending) - done)
+        else:
+            app_times, stopped_early = run_workers(client, pending, args.workers)
+    finally:
+        # Even when a runner raises, stop renewing leases and hand back what this process claimed
+        leases.stop_heartbeat()
+        released = leases.release_unfinished(conn)
+        if released:
+            print(f"Released {released} claimed app(s) back to pending")
     # Count errors from this batch
     c = conn.cursor()
     c.execute("SELECT COUNT(*) FROM processing_results WHERE status='error'")
@@ -679,17 +1519,95 @@ def main():
     total_elapsed = time.time() - total_start
 
     # Emit batch_complete event (only if we processed something)
+    usage = usage_totals()
     if app_times and not stopped_early:
-        events.batch_complete(len(app_times), total_elapsed, error_count)
+        events.batch_complete(len(app_times), total_elapsed, error_count, usage if usage["requests"] else None,
+                              api_retry.counters())
 
     print(f"\n{'='*50}")
     print(f"TIMING SUMMARY")
     print(f"{'='*50}")
-    print(f"Total applications: {len(pending)}")
+    print(f"Total applications: {max(len(pending), len(app_times))}")
     print(f"Total time: {total_elapsed:.1f}s ({total_elapsed/60:.1f} min)")
     if app_times:
         print(f"Average per app: {sum(app_times)/len(app_times):.1f}s")
         print(f"Min/Max: {min(app_times):.1f}s / {max(app_times):.1f}s")
+        if args.workers > 1 or args.pipeline or args.use_async:
+            print(f"Workers: {args.workers} ({len(app_times) / total_elapsed * 60:.1f} apps/min)")
+    cache = vision_cache.counters()
+    if cache["hits"] or cache["misses"]:
+        print(f"Vision cache: {cache['hits']} hits, {cache['misses']} misses")
+    ocr_counts = ocr_cache.counters()
+    if ocr_counts["hits"] or ocr_counts["misses"]:
+        print(f"OCR cache: {ocr_counts['hits']} hits, {ocr_counts['misses']} misses")
+    if _ocr_batcher is not None:
+        batches = _ocr_batcher.counters()
+        if batches["batches"]:
+            print(
+                f"OCR batches: {batches['images']} images in {batches['batches']} batches "
+                f"(avg {batches['images'] / batches['batches']:.1f}, max {batches['largest_batch']})"
+            )
+    daemon = ocr_client.counters()
+    if daemon["daemon_images"] or daemon["fallback_images"]:
+        waits = f", pinged {daemon['slow_waits']}x while waiting on slow replies" if daemon["slow_waits"] else ""
+        print(f"OCR daemon: {daemon['daemon_images']} images, {daemon['fallback_images']} fell back to in-process OCR{waits}")
+    if usage["requests"]:
+        print(
+            f"API tokens: {usage['input_tokens']} input + {usage['cache_read_input_tokens']} cache read"
+            f" + {usage['cache_creation_input_tokens']} cache write, {usage['output_tokens']} output"
+            f" ({usage['requests']} requests)"
+        )
+    retries = api_retry.counters()
+    if retries["retries"] or retries["hedges"]:
+        print(
+            f"Retries: {retries['retries']} ({retries['retry_after_waits']} honoring Retry-After), "
+            f"{retries['recovered']} calls recovered, {retries['gave_up']} gave up"
+        )
+        print(
+            f"Hedges: {retries['hedges']} sent, {retries['hedge_wins']} won, "
+            f"{retries['hedge_saved_seconds']:.1f}s saved"
+        )
+    if _concurrency is not None:
+        limits = _concurrency.summary()
+        print(
+            f"Concurrency: ended at {limits['limit']}/{limits['maximum']} in flight "
+            f"({limits['increases']} raises, {limits['decreases']} cuts)"
+        )
+    overlap = overlap_counters()
+    if overlap["apps"]:
+        print(
+            f"OCR overlap: {overlap['saved_seconds']:.1f}s saved by running OCR during Vision requests "
+            f"({overlap['saved_seconds'] / overlap['apps']:.2f}s/app)"
+        )
+    resumed = stage_outputs.counters()["resumed"]
+    if resumed:
+        print(f"Stage outputs: {resumed} stages resumed from a previous run")
+    upload_bytes = upload_prep.counters()
+    if upload_bytes["original_bytes"]:
+        print(
+            f"Uploads: {upload_bytes['upload_bytes'] / 1024 / 1024:.1f} MB sent for "
+            f"{upload_bytes['original_bytes'] / 1024 / 1024:.1f} MB of label images "
+            f"({upload_bytes['upload_bytes'] / upload_bytes['original_bytes']:.0%})"
+        )
+    if app_times:
+        timing_conn = sqlite3.connect(PROCESSING_DB, timeout=30)
+        try:
+            print()
+            stage_timings.print_report(stage_timings.report(timing_conn, stage_timings.RUN_ID),
+                                       f"run {stage_timings.RUN_ID}")
+        finally:
+            timing_conn.close()
+    if stage_summaries:
+        from batchProcessor.pipeline import print_stage_report
+
+        print_stage_report(stage_summaries)
+
+    if isinstance(pending, leases.LeaseQueue):
+        pending.close()
+
+    evicted = vision_cache.evict()
+    if evicted:
+        print(f"Vision cache: evicted {evicted} old entries")
     print("Done.")
 
 
@@ -0,0 +1,152 @@
+"""
+Per-application store of raw stage outputs, so reruns resume mid-app.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    When anything after the Vision call failed (OCR, matching, cropping,
+    the DB inserts), the app was marked error and the next run started
+    again from the API call. This table keeps each stage's raw output per
+    app as soon as the stage completes:
+
+        vision     {"raw_text": reply text, "fields": parsed list or null}
+        ocr_front  OCR items for the front label
+        ocr_back   OCR items for the back label
+        match      per-field decisions: side and matched OCR item indices
+
+    Each row carries the hash of the stage's inputs (images, prompt/model,
+    upstream outputs). A rerun uses a stored output only when its input
+    hash still matches, so changed images or settings redo the stage.
+
+    The raw Vision text is stored before it is parsed, so a reply is never
+    paid for twice just because a later stage failed. A stored reply that
+    doesn't parse is deleted and the request sent again.
+
+    Reprocessing one app (--ttb-id), clear_processing.py and the API
+    server's forget action delete the app's rows, so they start from the
+    API call.
+
+    Rows live in processing.db (table stage_outputs) and are written on
+    short-lived connections, so any thread or OCR process can record its
+    stage without sharing a connection.
+
+Inputs:
+    - ttbId, stage name, input hash, JSON-serializable output
+    - delete() / clear() to drop stored outputs
+
+Outputs:
+    - data/processing.db: stage_outputs table
+
+Created: February 2026
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PROCESSING_DB
+
+_counters = {"resumed": 0}
+_counters_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(PROCESSING_DB, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stage_outputs (
+            ttbId TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            input_hash TEXT NOT NULL,
+            output_json TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (ttbId, stage)
+        )
+    """)
+    return conn
+
+
+def input_hash(*parts) -> str:
+    """SHA-256 over stage inputs (strings or JSON-serializable values)."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update((part if isinstance(part, str) else json.dumps(part, sort_keys=True)).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def get(ttb_id: str | None, stage: str, key: str):
+    """Stored output for this app/stage if its inputs are unchanged, else None."""
+    if not ttb_id:
+        return None
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT output_json FROM stage_outputs WHERE ttbId=? AND stage=? AND input_hash=?",
+            (ttb_id, stage, key),
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    with _counters_lock:
+        _counters["resumed"] += 1
+    return json.loads(row[0])
+
+
+def put(ttb_id: str | None, stage: str, key: str, output):
+    """Record a completed stage's output (replacing any older one)."""
+    if not ttb_id:
+        return
+    conn = _connect()
+    try:
+        conn.execute(
+            """INSERT OR REPLACE INTO stage_outputs (ttbId, stage, input_hash, output_json, created_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            (ttb_id, stage, key, json.dumps(output), datetime.now(timezone.utc).isoformat()),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def delete(ttb_id: str | None, stage: str):
+    """Drop one stored stage output (e.g. a Vision reply that can't be used)."""
+    if not ttb_id:
+        return
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM stage_outputs WHERE ttbId=? AND stage=?", (ttb_id, stage))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def clear(conn: sqlite3.Connection, ttb_id: str | None = None) -> int:
+    """Delete one app's stored outputs (or every app's) on the caller's connection; returns rows deleted.
+
+    The caller commits, so this resets along with its own processing_results changes.
+    """
+    try:
+        if ttb_id is None:
+            cursor = conn.execute("DELETE FROM stage_outputs")
+        else:
+            cursor = conn.execute("DELETE FROM stage_outputs WHERE ttbId=?", (ttb_id,))
+    except sqlite3.OperationalError:  # no stage has been stored yet
+        return 0
+    return cursor.rowcount
+
+
+def counters() -> dict:
+    """Stages resumed from stored output in this process."""
+    with _counters_lock:
+        return dict(_counters)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Per-application stage durations, and a percentile report over them.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    process_labels.py only printed the whole-app time, and events.py only
+    saw the Vision latency. Every app now records how long each stage took
+    into the stage_timings table in processing.db:
+
+        encode     downsizing / base64 of both labels for the request
+        vision     the Vision call, including slot waits, retries and hedges
+        first_field  (--stream) request sent → first field parsed
+        ocr_front  front label OCR (cache, stored output or EasyOCR)
+        ocr_back   back label OCR
+        match      field text → OCR region matching
+        crop       cropping and saving the field mini-images
+        db_write   extracted_fields inserts and the status update
+        export     export_one() to the verification API
+        ocr_overlap  time saved by running OCR during the Vision request
+                   (vision + OCR minus the time both took together); a
+                   saving, so it is left out of the share column
+
+    Stages are wall-clock latency for that app: front and back OCR run in
+    the same batch, so they overlap rather than add up. A stage skipped
+    because its result came from a cache still records the (short) time
+    the lookup took.
+
+    Durations are accumulated in memory per app and written with one
+    short-lived connection per flush(), so the pipeline's OCR processes
+    record their own stages. Rows carry a run_id (start time + pid),
+    assigned by start_run() when process_labels.py starts and inherited by
+    child processes through STAGE_RUN_ID; export it to give several
+    processes one run. Importing this module to read the report leaves
+    the environment alone.
+
+Inputs:
+    - Durations from process_labels.py (start_run(), timed(), add())
+    - data/processing.db: stage_timings (for the report)
+
+Outputs:
+    - data/processing.db: stage_timings table
+    - Console report: count, mean, p50 / p95 / p99, max and total per stage
+
+Usage:
+    cd scripts && python3 batchProcessor/stage_timings.py                 # latest run
+    cd scripts && python3 batchProcessor/stage_timings.py --since 2h      # all runs in a window
+    cd scripts && python3 batchProcessor/stage_timings.py --run 20260214T101500-4242
+    cd scripts && python3 batchProcessor/stage_timings.py --runs
+
+Created: February 2026
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PROCESSING_DB
+
+STAGES = ["encode", "vision", "first_field", "ocr_front", "ocr_back", "match", "crop", "db_write", "export"]
+SAVINGS = ["ocr_overlap"]  # recorded like stages, but time not spent
+
+# Set by start_run() in the process that records; the pipeline's OCR processes inherit it
+RUN_ID = os.environ.get("STAGE_RUN_ID")
+
+_pending = {}  # ttbId → {stage: seconds} not yet written
+_pending_lock = threading.Lock()
+
+
+def _connect(db_path: str = PROCESSING_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stage_timings (
+            ttbId TEXT NOT NULL,
+            run_id TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            recorded_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_stage_timings_run ON stage_timings (run_id, stage)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_stage_timings_time ON stage_timings (recorded_at)")
+    return conn
+
+
+# ── Recording ──
+
+def start_run() -> str:
+    """Record under STAGE_RUN_ID if exported, else a new run ID, and export it for child processes."""
+    global RUN_ID
+    RUN_ID = os.environ.setdefault("STAGE_RUN_ID", f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}")
+    return RUN_ID
+
+
+def add(ttb_id: str | None, stage: str, seconds: float):
+    """Add time to one stage of an app (repeated calls accumulate)."""
+    if not ttb_id:
+        return
+    with _pending_lock:
+        stages = _pending.setdefault(ttb_id, {})
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(ttb_id: str | None, stage: str):
+    """Time the enclosed block as (part of) `stage` for this app."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(ttb_id, stage, time.perf_counter() - start)
+
+
+def flush(ttb_id: str | None):
+    """Write this process's accumulated stage times for the app."""
+    if not ttb_id:
+        return
+    with _pending_lock:
+        stages = _pending.pop(ttb_id, None)
+    if not stages:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    conn = _connect()
+    try:
+        conn.executemany(
+            "INSERT INTO stage_timings (ttbId, run_id, stage, seconds, recorded_at) VALUES (?, ?, ?, ?, ?)",
+            [(ttb_id, RUN_ID, stage, seconds, now) for stage, seconds in stages.items()],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ── Report ──
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(ordered) * p // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+def parse_time(value: str) -> str:
+    """'90m', '2h', '3d' or an ISO timestamp (that long ago) → ISO UTC."""
+    units = {"m": "minutes", "h": "hours", "d": "days"}
+    if value[-1:] in units and value[:-1].replace(".", "", 1).isdigit():
+        start = datetime.now(timezone.utc) - timedelta(**{units[value[-1]]: float(value[:-1])})
+        return start.isoformat()
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def list_runs(conn: sqlite3.Connection):
+    rows = conn.execute(
+        """SELECT run_id, MIN(recorded_at), MAX(recorded_at), COUNT(DISTINCT ttbId)
+           FROM stage_timings GROUP BY run_id ORDER BY MAX(recorded_at) DESC LIMIT 20"""
+    ).fetchall()
+    if not rows:
+        print("No stage timings recorded yet")
+        return
+    print(f"{'Run':<28}{'First':<22}{'Last':<22}{'Apps':>6}")
+    for run_id, first, last, apps in rows:
+        print(f"{run_id:<28}{first[:19]:<22}{last[:19]:<22}{apps:>6}")
+
+
+def report(conn: sqlite3.Connection, run_id: str | None = None, since: str | None = None,
+           until: str | None = None) -> dict:
+    """Per-stage stats for a run or time window: {stage: {n, mean, p50, p95, p99, max, total}}."""
+    where, params = [], []
+    if run_id:
+        where.append("run_id = ?")
+        params.append(run_id)
+    if since:
+        where.append("recorded_at >= ?")
+        params.append(since)
+    if until:
+        where.append("recorded_at < ?")
+        params.append(until)
+    sql = "SELECT stage, seconds FROM stage_timings"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+
+    by_stage = {}
+    for stage, seconds in conn.execute(sql, params):
+        by_stage.setdefault(stage, []).append(seconds)
+
+    result = {}
+    for stage in STAGES + sorted(set(by_stage) - set(STAGES) - set(SAVINGS)) + SAVINGS:
+        values = sorted(by_stage.get(stage, []))
+        if not values:
+            continue
+        result[stage] = {
+            "n": len(values),
+            "mean": sum(values) / len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+            "total": sum(values),
+        }
+    return result
+
+
+def print_report(stats: dict, title: str):
+    if not stats:
+        print(f"No stage timings for {title}")
+        return
+    grand_total = sum(s["total"] for stage, s in stats.items() if stage not in SAVINGS) or 1
+    print(f"Stage timings: {title}")
+    print(f"{'Stage':<11}{'n':>6}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'total':>10}{'share':>7}")
+    for stage, s in stats.items():
+        print(
+            f"{stage:<11}{s['n']:>6}{s['mean']:>8.3f}s{s['p50']:>8.3f}s{s['p95']:>8.3f}s"
+            f"{s['p99']:>8.3f}s{s['max']:>8.3f}s{s['total']:>9.1f}s"
+            + (f"{'—':>7}" if stage in SAVINGS else f"{s['total'] / grand_total:>7.0%}")
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage p50/p95/p99 from processing.db stage_timings")
+    parser.add_argument("--run", help="Run ID, or 'latest' (default when no --since is given)")
+    parser.add_argument("--since", help="Window start: 90m, 2h, 3d or an ISO timestamp")
+    parser.add_argument("--until", help="Window end (same formats as --since)")
+    parser.add_argument("--runs", action="store_true", help="List recent runs")
+    parser.add_argument("--db", default=PROCESSING_DB, help="Database path (default: data/processing.db)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"{args.db} not found")
+        return
+    conn = _connect(args.db)
+    try:
+        if args.runs:
+            list_runs(conn)
+            return
+
+        run_id = args.run
+        if run_id == "latest" or (run_id is None and not args.since):
+            row = conn.execute("SELECT run_id FROM stage_timings ORDER BY recorded_at DESC LIMIT 1").fetchone()
+            if row is None:
+                print("No stage timings recorded yet")
+                return
+            run_id = row[0]
+
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+        parts = [f"run {run_id}"] if run_id else []
+        if since:
+            parts.append(f"since {since[:19]} UTC")
+        if until:
+            parts.append(f"until {until[:19]} UTC")
+        print_report(report(conn, run_id, since, until), ", ".join(parts))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
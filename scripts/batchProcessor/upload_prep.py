@@ -0,0 +1,158 @@
+"""
+Right-size label images before they are uploaded to Claude Vision.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Applicant label PNGs are ~1.2 MB each and were base64-encoded and sent
+    as-is. Claude scales anything larger than ~1568 px on the long edge or
+    ~1.15 megapixels down on its side anyway, so extra resolution only
+    costs upload bytes, latency and input tokens.
+
+    prepare_upload() downsizes an image to fit UPLOAD_MAX_EDGE and
+    UPLOAD_MAX_PIXELS (never upsizing), flattens transparency onto white,
+    and re-encodes to UPLOAD_FORMAT (lossy WebP by default), which cuts the
+    fixture labels to a fraction of their PNG size. If re-encoding would
+    not help, the original file is sent unchanged.
+
+    Results are cached under data/upload_cache/ by SHA-256 of the original
+    bytes plus the settings, so each label is prepared once.
+
+    The original full-resolution file is still what EasyOCR reads and what
+    crops are cut from. The Vision reply is text-only, so no coordinates
+    need mapping back from the upload; its scale factor is still recorded
+    in the metadata.
+
+Inputs:
+    - Label image path
+    - config.py: UPLOAD_MAX_EDGE, UPLOAD_MAX_PIXELS, UPLOAD_FORMAT, UPLOAD_QUALITY
+
+Actions:
+    - Resizes / flattens / re-encodes on a cache miss
+    - Falls back to the original file when re-encoding would be larger
+
+Outputs:
+    - data/upload_cache/{sha[:2]}/{sha}-{settings}.{ext} + .json metadata
+    - Byte counters (original vs uploaded) for the TIMING SUMMARY
+
+Created: February 2026
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import UPLOAD_CACHE_DIR, UPLOAD_MAX_EDGE, UPLOAD_MAX_PIXELS, UPLOAD_FORMAT, UPLOAD_QUALITY
+from batchProcessor.vision_cache import file_sha256
+
+MEDIA_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg", "PNG": "image/png"}
+EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg", "PNG": ".png"}
+ORIGINAL_MEDIA_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp"}
+
+_counters = {"original_bytes": 0, "upload_bytes": 0}
+_counters_lock = threading.Lock()
+
+
+def settings_key() -> str:
+    """Short tag for the current preprocessing settings (part of every cache key)."""
+    return f"{UPLOAD_FORMAT}-q{UPLOAD_QUALITY}-e{UPLOAD_MAX_EDGE}-p{UPLOAD_MAX_PIXELS}"
+
+
+def target_size(width: int, height: int) -> tuple[int, int]:
+    """Largest size within the edge/pixel limits, keeping aspect ratio (never upsizes)."""
+    scale = min(
+        1.0,
+        UPLOAD_MAX_EDGE / max(width, height),
+        (UPLOAD_MAX_PIXELS / (width * height)) ** 0.5,
+    )
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _write_atomic(path: str, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def prepare_upload(path: str) -> dict:
+    """Return the right-sized upload for a label image.
+
+    Returns {path, media_type, scale, original_size, size}. `scale` is
+    upload pixels per original pixel (1.0 if not resized).
+    """
+    digest = file_sha256(path)
+    base = os.path.join(UPLOAD_CACHE_DIR, digest[:2], f"{digest}-{hashlib.sha1(settings_key().encode()).hexdigest()[:8]}")
+    meta_path = base + ".json"
+
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if os.path.exists(meta["path"]):
+            _count(path, meta["path"])
+            return meta
+
+    from PIL import Image
+
+    with Image.open(path) as img:
+        original_size = img.size
+        size = target_size(*img.size)
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            bg = Image.new("RGB", img.size, (255, 255, 255))
+            bg.paste(img, mask=img.split()[3])
+            img = bg
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        if size != original_size:
+            img = img.resize(size, Image.LANCZOS)
+
+        buf = io.BytesIO()
+        if UPLOAD_FORMAT == "PNG":
+            img.save(buf, "PNG", optimize=True)
+        else:
+            img.save(buf, UPLOAD_FORMAT, quality=UPLOAD_QUALITY)
+        encoded = buf.getvalue()
+
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    if size == original_size and len(encoded) >= os.path.getsize(path):
+        # Re-encoding didn't help - send the original bytes
+        upload_path = os.path.abspath(path)
+        media_type = ORIGINAL_MEDIA_TYPES.get(os.path.splitext(path)[1].lower(), "image/png")
+    else:
+        upload_path = base + EXTENSIONS[UPLOAD_FORMAT]
+        media_type = MEDIA_TYPES[UPLOAD_FORMAT]
+        _write_atomic(upload_path, encoded)
+
+    meta = {
+        "path": upload_path,
+        "media_type": media_type,
+        "scale": size[0] / original_size[0],
+        "original_size": list(original_size),
+        "size": list(size),
+    }
+    _write_atomic(meta_path, json.dumps(meta).encode())
+    _count(path, upload_path)
+    return meta
+
+
+def _count(original_path: str, upload_path: str):
+    with _counters_lock:
+        _counters["original_bytes"] += os.path.getsize(original_path)
+        _counters["upload_bytes"] += os.path.getsize(upload_path)
+
+
+def counters() -> dict:
+    """Original vs uploaded bytes in this process."""
+    with _counters_lock:
+        return dict(_counters)
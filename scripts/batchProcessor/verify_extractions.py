@@ -23,12 +23,14 @@ Description:
 
 Inputs:
     - data/processing.db: Database with extracted_fields records
-    - output/extracted/*.png: Cropped mini-images from extraction pass
+    - htdocs/verification/extractions/{sharded}/: Cropped mini-images from
+      the extraction pass (per-field files, or rects in the app's atlas)
 
 Actions:
     - Adds ocr_text and ocr_match_score columns if missing (idempotent)
     - For each extracted field:
-        * Runs EasyOCR on the mini-image
+        * Runs EasyOCR on the mini-image, or its rect of the atlas (or reads
+          the shared OCR cache; uses the warm OCR daemon when it is running)
         * Normalizes both Claude and OCR text (strip punctuation, uppercase)
         * Computes fuzzy match score using SequenceMatcher
     - Flags low-match fields (< 50%) with detailed comparison output
@@ -44,40 +46,75 @@ Usage:
 Created: February 2026
 """
 
+import json
 import os
 import re
 import sqlite3
 import sys
 from difflib import SequenceMatcher
 
-import easyocr
-
 # Add parent directory for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import PROCESSING_DB
+from config import PROCESSING_DB, OCR_LANGUAGES
+from batchProcessor import ocr_cache
+from batchProcessor import ocr_client
+from batchProcessor import ocr_reader
+from batchProcessor.ocr_batcher import readtext_rgb
+from batchProcessor.crop_atlas import ATLAS_NAME, ensure_atlas_column
 
 _reader = None
 
 def get_reader():
     global _reader
     if _reader is None:
-        _reader = easyocr.Reader(["en"], gpu=False, verbose=False)
+        _reader = ocr_reader.new_reader()  # at OCR_PRECISION
     return _reader
 
 
+def readtext(source) -> list:
+    """readtext() on the warm OCR daemon when it is running, else on this process's reader."""
+    if ocr_client.available():
+        try:
+            return ocr_client.readtext(source)
+        except ocr_client.DaemonUnavailable as e:
+            print(f"  OCR daemon unavailable ({e}); continuing with in-process OCR")
+            ocr_client.mark_down()
+    if isinstance(source, str):
+        return get_reader().readtext(source)
+    return readtext_rgb(get_reader(), [source])[0]
+
+
 def normalize(s: str) -> str:
     s = s.upper()
     s = re.sub(r"[./,;:_|!'\-\"\(\)]", "", s)
     return " ".join(s.split())
 
 
-def ocr_mini_image(path: str) -> str:
-    """OCR a mini-image and return combined text."""
+def ocr_mini_image(path: str, atlas_rect: list[int] | None = None) -> str:
+    """OCR a mini-image (or its [x, y, w, h] rect of an atlas) and return combined text."""
     if not path or not os.path.exists(path):
         return ""
-    reader = get_reader()
-    results = reader.readtext(path)
-    return " ".join(text for _, text, _ in results)
+
+    if atlas_rect:
+        cache_key = ocr_cache.make_key(path, OCR_LANGUAGES, rect=",".join(map(str, atlas_rect)))
+    else:
+        cache_key = ocr_cache.make_key(path, OCR_LANGUAGES)
+    items = ocr_cache.get(cache_key)
+    if items is None:
+        source = path
+        if atlas_rect:
+            import numpy as np
+            from PIL import Image
+
+            x, y, w, h = atlas_rect
+            with Image.open(path) as atlas:
+                source = np.array(atlas.convert("RGB").crop((x, y, x + w, y + h)))
+        items = [
+            {"text": text, "bbox_polygon": [[int(p) for p in pt] for pt in bbox], "confidence": float(conf)}
+            for bbox, text, conf in readtext(source)
+        ]
+        ocr_cache.put(cache_key, items)
+    return " ".join(item["text"] for item in items)
 
 
 def match_score(extracted: str, ocr_text: str) -> float:
@@ -105,14 +142,17 @@ def main():
     except sqlite3.OperationalError:
         pass
     conn.commit()
+    ensure_atlas_column(conn)
 
-    c.execute("SELECT id, ttbId, field_name, extracted_text, mini_image_path FROM extracted_fields")
+    c.execute("SELECT id, ttbId, field_name, extracted_text, mini_image_path, atlas_rect FROM extracted_fields")
     rows = c.fetchall()
 
     print(f"Verifying {len(rows)} extracted fields...")
 
-    for row_id, ttb_id, field_name, extracted_text, mini_path in rows:
-        ocr_text = ocr_mini_image(mini_path)
+    for row_id, ttb_id, field_name, extracted_text, mini_path, atlas_rect in rows:
+        # Per-field file when there is one, else the field's rect of the atlas
+        is_atlas = bool(mini_path) and os.path.splitext(os.path.basename(mini_path))[0] == ATLAS_NAME
+        ocr_text = ocr_mini_image(mini_path, json.loads(atlas_rect) if is_atlas and atlas_rect else None)
         score = match_score(extracted_text or "", ocr_text)
 
         c.execute(
@@ -141,6 +181,8 @@ def main():
     conn.close()
 
     print(f"\nSummary: {good}/{total} fields matched ({good/total:.0%}), {no_crop} had no crop")
+    cache = ocr_cache.counters()
+    print(f"OCR cache: {cache['hits']} hits, {cache['misses']} misses")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of Claude Vision responses.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Reprocessing an app (--ttb-id, /api/forget, make clean, or a rerun
+    after a crash) used to re-send both label images to Claude. This cache
+    stores the parsed field list keyed by a SHA-256 over everything that
+    determines the reply:
+
+        front image bytes + back image bytes + prompt + model + max_tokens
+
+    so a changed image, prompt or model is automatically a miss. It lives
+    in its own SQLite file (data/vision_cache.db), separate from
+    processing.db, so make clean / make db don't throw it away.
+
+    Eviction is by age (entries not used for VISION_CACHE_MAX_AGE_DAYS)
+    and by size (least recently used first, down to VISION_CACHE_MAX_MB).
+
+Inputs:
+    - Label image files and request settings (for the key)
+    - Parsed Vision field lists (to store)
+
+Actions:
+    - get() / put() with hit/miss counters for the current process
+    - evict() by age and total size
+    - CLI: --stats, --evict, --clear
+
+Outputs:
+    - data/vision_cache.db: vision_cache table
+
+Usage:
+    cd scripts && python3 batchProcessor/vision_cache.py --stats
+    cd scripts && python3 batchProcessor/vision_cache.py --evict
+    cd scripts && python3 batchProcessor/vision_cache.py --clear
+
+Created: February 2026
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import VISION_CACHE_DB, VISION_CACHE_MAX_MB, VISION_CACHE_MAX_AGE_DAYS
+
+_counters = {"hits": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(VISION_CACHE_DB), exist_ok=True)
+    conn = sqlite3.connect(VISION_CACHE_DB, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vision_cache (
+            key TEXT PRIMARY KEY,
+            fields_json TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    return conn
+
+
+def file_sha256(path: str | None) -> str:
+    """SHA-256 of a file's bytes ("" for a missing image)."""
+    if not path or not os.path.exists(path):
+        return ""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def make_key(image_paths: list[str | None], *settings) -> str:
+    """Cache key over the image contents (in order) and request settings."""
+    return key_for_digests([file_sha256(path) for path in image_paths], *settings)
+
+
+def key_for_digests(image_sha256s: list[str], *settings) -> str:
+    """make_key() for images whose SHA-256s are already known ("" for a missing image)."""
+    h = hashlib.sha256()
+    for digest in image_sha256s:
+        h.update(digest.encode())
+        h.update(b"\0")
+    for value in settings:
+        h.update(str(value).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def get(key: str) -> list[dict] | None:
+    """Return the cached field list, or None on a miss."""
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT fields_json FROM vision_cache WHERE key=?", (key,)).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE vision_cache SET last_used_at=?, hit_count=hit_count+1 WHERE key=?",
+                (time.time(), key),
+            )
+            conn.commit()
+    finally:
+        conn.close()
+
+    with _counters_lock:
+        _counters["hits" if row is not None else "misses"] += 1
+    return json.loads(row[0]) if row is not None else None
+
+
+def put(key: str, fields: list[dict]):
+    """Store a parsed field list."""
+    fields_json = json.dumps(fields)
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            """INSERT OR REPLACE INTO vision_cache (key, fields_json, size_bytes, created_at, last_used_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            (key, fields_json, len(fields_json), now, now),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def evict(max_mb: float = VISION_CACHE_MAX_MB, max_age_days: float = VISION_CACHE_MAX_AGE_DAYS) -> int:
+    """Drop entries unused for max_age_days, then LRU entries over max_mb. Returns count removed."""
+    conn = _connect()
+    try:
+        cutoff = time.time() - max_age_days * 86400
+        removed = conn.execute("DELETE FROM vision_cache WHERE last_used_at < ?", (cutoff,)).rowcount
+
+        max_bytes = int(max_mb * 1024 * 1024)
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM vision_cache").fetchone()[0]
+        if total > max_bytes:
+            to_delete = []
+            for key, size in conn.execute("SELECT key, size_bytes FROM vision_cache ORDER BY last_used_at"):
+                if total <= max_bytes:
+                    break
+                to_delete.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM vision_cache WHERE key=?", to_delete)
+            removed += len(to_delete)
+        conn.commit()
+    finally:
+        conn.close()
+    return removed
+
+
+def counters() -> dict:
+    """Hits and misses in this process."""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def summary() -> dict:
+    """Entry count, stored bytes and lifetime hits for the whole cache."""
+    conn = _connect()
+    try:
+        entries, size, hits = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(hit_count), 0) FROM vision_cache"
+        ).fetchone()
+    finally:
+        conn.close()
+    return {"entries": entries, "size_bytes": size, "lifetime_hits": hits}
+
+
+def clear() -> int:
+    conn = _connect()
+    try:
+        removed = conn.execute("DELETE FROM vision_cache").rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vision response cache maintenance")
+    parser.add_argument("--stats", action="store_true", help="Show cache size and lifetime hits")
+    parser.add_argument("--evict", action="store_true", help="Apply age/size eviction now")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached response")
+    args = parser.parse_args()
+
+    if args.clear:
+        print(f"Removed {clear()} cached responses")
+    if args.evict:
+        print(f"Evicted {evict()} cached responses")
+    s = summary()
+    print(f"{VISION_CACHE_DB}: {s['entries']} responses, {s['size_bytes'] / 1024:.1f} KB, {s['lifetime_hits']} lifetime hits")
+
+
+if __name__ == "__main__":
+    main()
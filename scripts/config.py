@@ -16,6 +16,29 @@ Description:
 Inputs:
     - Environment variable: ANTHROPIC_API_KEY (required for Claude API)
     - Environment variable: ANTHROPIC_MODEL (optional, defaults to claude-sonnet-4-20250514)
+    - Environment variables: API_REQUESTS_PER_MIN, API_INPUT_TOKENS_PER_MIN
+      (optional, rate limits for the async extraction engine)
+    - Environment variables: VISION_MAX_RETRIES, VISION_BACKOFF_BASE,
+      VISION_BACKOFF_MAX, VISION_HEDGE_PERCENTILE, VISION_HEDGE_MIN_SAMPLES
+      (optional, Vision retry backoff and hedged-request threshold)
+    - Environment variable: AIMD_LATENCY_TOLERANCE (optional, how far above
+      the baseline response time adaptive concurrency keeps growing)
+    - Environment variables: VISION_CACHE_MAX_MB, VISION_CACHE_MAX_AGE_DAYS
+      (optional, Vision response cache eviction limits)
+    - Environment variable: LEASE_SECONDS (optional, worker claim lease length)
+    - Environment variables: OCR_BATCH_MAX_IMAGES, OCR_BATCH_WAIT_MS,
+      OCR_RECOGNIZE_BATCH_SIZE (optional, batched OCR service sizing)
+    - Environment variables: OCR_DAEMON_SOCKET, OCR_DAEMON_TIMEOUT,
+      OCR_DAEMON (optional, warm OCR daemon socket; set OCR_DAEMON=0 to
+      always OCR in-process)
+    - Environment variable: OCR_PRECISION (optional, "int8" or "fp32"
+      EasyOCR weights on CPU)
+    - Environment variables: UPLOAD_MAX_EDGE, UPLOAD_MAX_PIXELS, UPLOAD_FORMAT,
+      UPLOAD_QUALITY (optional, label preprocessing before Vision upload)
+    - Environment variables: CROP_FORMAT, CROP_PNG_COMPRESS_LEVEL,
+      CROP_WEBP_METHOD (optional, field mini-image encoder)
+    - Environment variable: CROP_OUTPUT (optional, per-field mini-image files,
+      a per-app atlas, or both)
 
 Actions:
     - Sets up directory paths for data, output, and API directories
@@ -37,7 +60,7 @@ import os
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SCRIPTS_DIR = os.path.join(BASE_DIR, "scripts")
 DATA_DIR = os.path.join(BASE_DIR, "data")
-OUTPUT_DIR = os.path.join(BASE_DIR, "output", "extracted")  # Temp location for mini-images
+OUTPUT_DIR = os.path.join(BASE_DIR, "output", "extracted")  # Mini-images from before crops were written in place
 
 # TTB External API (their system - simulated for demo)
 TTB_EXTERNAL_DIR = os.path.join(BASE_DIR, "htdocs", "ttb-external")
@@ -49,6 +72,10 @@ VERIFICATION_DIR = os.path.join(BASE_DIR, "htdocs", "verification")
 
 PROCESSING_DB = os.path.join(DATA_DIR, "processing.db")
 
+# Lease on a claimed application - renewed by a heartbeat, reclaimed by other
+# workers if it expires (crashed process)
+LEASE_SECONDS = float(os.environ.get("LEASE_SECONDS", "300"))
+
 # Control file for batch processing - write "STOP" to halt, delete to allow run
 STOP_FILE = os.path.join(DATA_DIR, "STOP")
 
@@ -56,6 +83,68 @@ STOP_FILE = os.path.join(DATA_DIR, "STOP")
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 ANTHROPIC_MODEL = os.environ.get("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
 
+# API rate limits (used by process_labels.py --async to pace requests)
+API_REQUESTS_PER_MIN = int(os.environ.get("API_REQUESTS_PER_MIN", "50"))
+API_INPUT_TOKENS_PER_MIN = int(os.environ.get("API_INPUT_TOKENS_PER_MIN", "30000"))
+
+# Vision retries - full-jitter exponential backoff (seconds), or the server's Retry-After.
+# With --hedge, an attempt still running past this percentile of recent responses is duplicated.
+VISION_MAX_RETRIES = int(os.environ.get("VISION_MAX_RETRIES", "4"))
+VISION_BACKOFF_BASE = float(os.environ.get("VISION_BACKOFF_BASE", "1.0"))
+VISION_BACKOFF_MAX = float(os.environ.get("VISION_BACKOFF_MAX", "30"))
+VISION_HEDGE_PERCENTILE = float(os.environ.get("VISION_HEDGE_PERCENTILE", "95"))
+VISION_HEDGE_MIN_SAMPLES = int(os.environ.get("VISION_HEDGE_MIN_SAMPLES", "20"))
+
+# Adaptive concurrency - in-flight Vision requests grow while the rolling average
+# response stays within this multiple of events.API_BASELINE_RESPONSE
+AIMD_LATENCY_TOLERANCE = float(os.environ.get("AIMD_LATENCY_TOLERANCE", "1.5"))
+
+# Vision response cache - kept outside processing.db so resets don't clear it
+VISION_CACHE_DB = os.path.join(DATA_DIR, "vision_cache.db")
+VISION_CACHE_MAX_MB = float(os.environ.get("VISION_CACHE_MAX_MB", "200"))
+VISION_CACHE_MAX_AGE_DAYS = float(os.environ.get("VISION_CACHE_MAX_AGE_DAYS", "90"))
+
+# EasyOCR - reader languages, and where OCR results are cached by image hash
+OCR_LANGUAGES = ["en"]
+OCR_CACHE_DIR = os.path.join(DATA_DIR, "ocr_cache")
+
+# EasyOCR weights on CPU - "int8" (dynamic quantization of the LSTM/Linear
+# layers, as easyocr.Reader has always done on CPU) or "fp32". The quantized
+# modules are cached in OCR_MODEL_DIR.
+OCR_PRECISION = os.environ.get("OCR_PRECISION", "int8")
+OCR_MODEL_DIR = os.path.join(DATA_DIR, "ocr_models")
+
+# Batched OCR service - images from in-flight apps are collected for up to
+# OCR_BATCH_WAIT_MS and run through the detector together
+OCR_BATCH_MAX_IMAGES = int(os.environ.get("OCR_BATCH_MAX_IMAGES", "8"))
+OCR_BATCH_WAIT_MS = float(os.environ.get("OCR_BATCH_WAIT_MS", "25"))
+OCR_RECOGNIZE_BATCH_SIZE = int(os.environ.get("OCR_RECOGNIZE_BATCH_SIZE", "32"))
+
+# Warm OCR daemon (miniServer/ocr_daemon.py) - used when its socket answers,
+# otherwise each process loads its own EasyOCR reader
+OCR_DAEMON_ENABLED = os.environ.get("OCR_DAEMON", "1") != "0"
+OCR_DAEMON_SOCKET = os.environ.get("OCR_DAEMON_SOCKET", os.path.join(DATA_DIR, "ocr_daemon.sock"))
+# Seconds without a reply before the client pings the daemon; it keeps waiting while pings answer
+OCR_DAEMON_TIMEOUT = float(os.environ.get("OCR_DAEMON_TIMEOUT", "300"))
+
+# Vision uploads - labels are downsized/re-encoded before sending (OCR and crops use originals).
+# Claude scales images past ~1568 px long edge / ~1.15 MP down itself, so larger only costs bytes.
+UPLOAD_MAX_EDGE = int(os.environ.get("UPLOAD_MAX_EDGE", "1568"))
+UPLOAD_MAX_PIXELS = int(os.environ.get("UPLOAD_MAX_PIXELS", "1150000"))
+UPLOAD_FORMAT = os.environ.get("UPLOAD_FORMAT", "WEBP").upper()  # WEBP, JPEG or PNG
+UPLOAD_QUALITY = int(os.environ.get("UPLOAD_QUALITY", "90"))
+UPLOAD_CACHE_DIR = os.path.join(DATA_DIR, "upload_cache")
+
+# Field mini-images - written once, straight into htdocs/verification/extractions/.
+# PNG level 1 encodes ~3.5x faster than Pillow's default (6) for ~8% more bytes;
+# lossless WebP at method 0 is faster still and ~25% smaller than PNG.
+CROP_FORMAT = os.environ.get("CROP_FORMAT", "PNG").upper()  # PNG or WEBP (lossless)
+CROP_PNG_COMPRESS_LEVEL = int(os.environ.get("CROP_PNG_COMPRESS_LEVEL", "1"))
+CROP_WEBP_METHOD = int(os.environ.get("CROP_WEBP_METHOD", "0"))
+# files: one image per field; atlas: one packed image per app (rects in the results JSON); both.
+# The atlas is opt-in: packing and encoding it is extra work per app on the save path.
+CROP_OUTPUT = os.environ.get("CROP_OUTPUT", "files").lower()
+
 # Processing - fields to extract and verify
 # Note: Fields can appear on ANY label (front, back, side) per TTB rules
 VERIFY_FIELDS = [
@@ -23,7 +23,7 @@ Actions:
     - Creates fresh SQLite database (removes existing if present)
     - Creates three tables:
         * applications: All COLA application form data
-        * processing_results: Tracks processing status per application
+        * processing_results: Tracks processing status (and worker leases) per application
         * extracted_fields: Stores AI-extracted text and mini-image paths
     - Inserts all applications with status='pending'
 
@@ -161,7 +161,10 @@ def create_applications_db(apps: list[dict]):
             ttbId TEXT PRIMARY KEY REFERENCES applications(ttbId),
             status TEXT NOT NULL DEFAULT 'pending',
             processed_at TEXT,
-            error_message TEXT
+            error_message TEXT,
+            worker_id TEXT,
+            lease_expires_at REAL,
+            heartbeat_at REAL
         )
     """)
 
@@ -18,6 +18,8 @@ Description:
     - API performance issues (slow responses, timeouts, recoveries)
     - System errors and recoveries
     - Processing stopped/cleared events
+    - Message Batches submissions and completions
+    - Adaptive concurrency limit changes
 
 Inputs:
     - Batch processing counts and durations
@@ -30,17 +32,26 @@ Actions:
     - Detects API degradation (avg > 8s) and recovery (avg < 3s)
     - Manages state transitions for meaningful alerts
 
+    Events come from process_labels.py, its worker threads and the API
+    server: each load → change → save holds an exclusive flock on
+    events.json.lock, and saves go to a temp file renamed into place.
+
 Outputs:
     - htdocs/verification/events.json containing:
       - events: [{timestamp, type, message, details}, ...]
     - Event types: batch_started, batch_complete, api_degraded,
-      api_recovered, api_timeout, api_error, processing_stopped, cleared
+      api_recovered, api_timeout, api_error, processing_stopped, cleared,
+      batch_api_submitted, batch_api_ended, concurrency_changed
 
 Created: February 2026
 """
 
+import fcntl
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Optional
 
@@ -56,6 +67,9 @@ API_BASELINE_RESPONSE = 1.2  # Typical response time
 API_SLOW_THRESHOLD = 3.0     # Warn if response > this
 API_VERY_SLOW_THRESHOLD = 8.0  # Degraded if response > this
 
+# Serializes events.json writes and API state updates across worker threads
+_lock = threading.RLock()
+
 # Track API performance state for detecting changes
 _api_state = {
     "is_degraded": False,
@@ -63,6 +77,16 @@ _api_state = {
 }
 
 
+@contextmanager
+def _locked():
+    """Hold events.json for one load → change → save, against threads and other processes."""
+    with _lock:
+        os.makedirs(os.path.dirname(EVENTS_FILE), exist_ok=True)
+        with open(EVENTS_FILE + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+
 def _load_events() -> dict:
     """Load events from JSON file."""
     if os.path.exists(EVENTS_FILE):
@@ -77,14 +101,19 @@ def _load_events() -> dict:
 def _save_events(data: dict):
     """Save events to JSON file."""
     os.makedirs(os.path.dirname(EVENTS_FILE), exist_ok=True)
-    with open(EVENTS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(EVENTS_FILE), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600; the web server reads this file
+        os.replace(tmp, EVENTS_FILE)
+    except BaseException:
+        os.remove(tmp)
+        raise
 
 
 def _emit(event_type: str, message: str, details: Optional[dict] = None):
     """Emit an event to the log."""
-    data = _load_events()
-
     event = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "type": event_type,
@@ -93,13 +122,16 @@ def _emit(event_type: str, message: str, details: Optional[dict] = None):
     if details:
         event["details"] = details
 
-    # Prepend (newest first)
-    data["events"].insert(0, event)
+    with _locked():
+        data = _load_events()
+
+        # Prepend (newest first)
+        data["events"].insert(0, event)
 
-    # Trim to max
-    data["events"] = data["events"][:MAX_EVENTS]
+        # Trim to max
+        data["events"] = data["events"][:MAX_EVENTS]
 
-    _save_events(data)
+        _save_events(data)
 
 
 def _format_duration(seconds: float) -> str:
@@ -122,8 +154,14 @@ def batch_started(app_count: int):
     )
 
 
-def batch_complete(app_count: int, duration_seconds: float, errors: int = 0):
-    """Emit when batch processing completes."""
+def batch_complete(app_count: int, duration_seconds: float, errors: int = 0,
+                   token_usage: Optional[dict] = None, api_retries: Optional[dict] = None):
+    """Emit when batch processing completes.
+
+    token_usage: API token totals for the batch (input, output, prompt cache
+    read/write), included in the event details when given.
+    api_retries: Vision retry / hedge counts, included when any occurred.
+    """
     if app_count == 0:
         _emit("batch_complete", "Batch complete: no applications to process")
         return
@@ -136,16 +174,18 @@ def batch_complete(app_count: int, duration_seconds: float, errors: int = 0):
     else:
         msg = f"Batch complete: {app_count} apps in {dur} ({avg:.1f}s/app)"
 
-    _emit(
-        "batch_complete",
-        msg,
-        {
-            "app_count": app_count,
-            "duration_seconds": round(duration_seconds, 1),
-            "avg_seconds_per_app": round(avg, 1),
-            "errors": errors,
-        }
-    )
+    details = {
+        "app_count": app_count,
+        "duration_seconds": round(duration_seconds, 1),
+        "avg_seconds_per_app": round(avg, 1),
+        "errors": errors,
+    }
+    if token_usage:
+        details["token_usage"] = token_usage
+    if api_retries and (api_retries.get("retries") or api_retries.get("hedges")):
+        details["api_retries"] = api_retries
+
+    _emit("batch_complete", msg, details)
 
 
 def api_response(response_time: float):
@@ -154,8 +194,12 @@ def api_response(response_time: float):
     Call this after each API call to track performance trends.
     Only emits events when there's a meaningful state change.
     """
-    global _api_state
+    with _lock:
+        _track_api_response(response_time)
 
+
+def _track_api_response(response_time: float):
+    """Update the rolling window and emit state-change events (caller holds _lock)."""
     # Add to rolling window
     _api_state["last_response_times"].append(response_time)
     if len(_api_state["last_response_times"]) > 5:
@@ -216,6 +260,38 @@ def api_error(error_message: str):
     )
 
 
+def batch_api_submitted(batch_id: str, request_count: int):
+    """Emit when a Message Batches request is submitted."""
+    _emit(
+        "batch_api_submitted",
+        f"Message batch submitted: {request_count} applications ({batch_id})",
+        {"batch_id": batch_id, "request_count": request_count}
+    )
+
+
+def batch_api_ended(batch_id: str, succeeded: int, errored: int):
+    """Emit when a Message Batches request has been collected."""
+    _emit(
+        "batch_api_ended",
+        f"Message batch collected: {succeeded} succeeded, {errored} errored ({batch_id})",
+        {"batch_id": batch_id, "succeeded": succeeded, "errored": errored}
+    )
+
+
+def concurrency_changed(old_limit: int | None, new_limit: int, maximum: int, reason: str):
+    """Emit when the adaptive controller sets (old_limit None) or changes the in-flight request limit."""
+    if old_limit is None:
+        message = f"Concurrency starts at {new_limit}/{maximum} ({reason})"
+    else:
+        direction = "raised" if new_limit > old_limit else "lowered"
+        message = f"Concurrency {direction} to {new_limit}/{maximum} ({reason})"
+    _emit(
+        "concurrency_changed",
+        message,
+        {"old_limit": old_limit, "limit": new_limit, "maximum": maximum, "reason": reason}
+    )
+
+
 def processing_stopped(apps_completed: int, apps_remaining: int):
     """Emit when processing is stopped by STOP file."""
     _emit(
@@ -282,13 +358,15 @@ def get_events() -> list:
 
 def clear_events():
     """Clear all events."""
-    _save_events({"events": []})
+    with _locked():
+        _save_events({"events": []})
 
 
 def reset_api_state():
     """Reset API performance tracking state."""
     global _api_state
-    _api_state = {
-        "is_degraded": False,
-        "last_response_times": [],
-    }
+    with _lock:
+        _api_state = {
+            "is_degraded": False,
+            "last_response_times": [],
+        }
@@ -33,6 +33,8 @@ Actions:
 Outputs:
     - JSON responses with operation results and status
     - Background processing via subprocess (make process)
+    - With --ocr-daemon, a warm OCR daemon subprocess (miniServer/ocr_daemon.py)
+      that every `make process` run uses instead of loading EasyOCR
     - File-based stop signal (data/STOP)
     - CORS headers for cross-origin requests from localhost:8080
 
@@ -40,6 +42,7 @@ Usage:
     cd scripts && python3 miniServer/api_server.py
     cd scripts && make api
     cd scripts && make api PORT=8082  # Custom port
+    cd scripts && python3 miniServer/api_server.py --ocr-daemon  # Keep EasyOCR warm between runs
 
 Created: February 2026
 """
@@ -52,6 +55,7 @@ import signal
 import shutil
 import sqlite3
 import subprocess
+import sys
 import threading
 import time
 from pathlib import Path
@@ -204,8 +208,12 @@ def run_forget(count: int = 5) -> dict:
             "UPDATE processing_results SET status = 'pending', processed_at = NULL, error_message = NULL WHERE ttbId = ?",
             (ttb_id,)
         )
-        # Delete their extracted fields
+        # Delete their extracted fields and stored stage outputs (so Vision runs again)
         c.execute("DELETE FROM extracted_fields WHERE ttbId = ?", (ttb_id,))
+        try:
+            c.execute("DELETE FROM stage_outputs WHERE ttbId = ?", (ttb_id,))
+        except sqlite3.OperationalError:
+            pass  # table is created by the first process_labels.py run
 
         # Delete their verification output files
         # Sharded path: TTB ID 24028001000106 -> 2/4/0/2/8/0/0/1/000106
@@ -218,7 +226,7 @@ def run_forget(count: int = 5) -> dict:
         if extraction_dir.exists():
             shutil.rmtree(extraction_dir)
 
-        # Delete temp output images
+        # Delete mini-images left in output/extracted/ by older runs
         for img in OUTPUT_DIR.glob(f"{ttb_id}_*.png"):
             img.unlink()
 
@@ -230,18 +238,13 @@ def run_forget(count: int = 5) -> dict:
     conn.close()
 
     # Update stats file - both summary AND remove forgotten apps from log
-    stats_file = VERIFICATION_DIR / "stats.json"
-    if stats_file.exists():
-        with open(stats_file) as f:
-            stats = json.load(f)
-        stats["summary"]["totalProcessed"] = counts.get("processed", 0)
-        stats["summary"]["totalPending"] = counts.get("pending", 0)
-        stats["summary"]["totalErrors"] = counts.get("error", 0)
+    # (through stats.py, which locks the file against a running process_labels.py)
+    if (VERIFICATION_DIR / "stats.json").exists():
+        sys.path.insert(0, str(SCRIPTS_DIR))
+        import stats
+        stats.update_summary(counts.get("processed", 0), counts.get("pending", 0), counts.get("error", 0))
         # Remove log entries for forgotten apps so they disappear from RECENT COMPLETIONS
-        forgotten_set = set(to_forget)
-        stats["log"] = [entry for entry in stats.get("log", []) if entry.get("ttbId") not in forgotten_set]
-        with open(stats_file, "w") as f:
-            json.dump(stats, f, indent=2)
+        stats.remove_log_entries(to_forget)
 
     # Emit event
     try:
@@ -389,6 +392,8 @@ class APIHandler(http.server.BaseHTTPRequestHandler):
 def main():
     parser = argparse.ArgumentParser(description="API server for batch processing")
     parser.add_argument("--port", "-p", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--ocr-daemon", action="store_true",
+                        help="Also run the warm OCR daemon, so each processing run skips loading EasyOCR")
     args = parser.parse_args()
 
     port = args.port
@@ -416,11 +421,21 @@ def main():
             return
         raise
 
+    # The daemon exits on its own if one is already answering on the socket
+    ocr_daemon = None
+    if args.ocr_daemon:
+        ocr_daemon = subprocess.Popen([sys.executable, str(SCRIPTS_DIR / "miniServer" / "ocr_daemon.py")],
+                                      cwd=str(SCRIPTS_DIR))
+
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\nShutting down...")
         server.shutdown()
+    finally:
+        if ocr_daemon is not None:
+            ocr_daemon.terminate()
+            ocr_daemon.wait()
 
 
 if __name__ == "__main__":
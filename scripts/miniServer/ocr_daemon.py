@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Long-lived OCR daemon: keeps EasyOCR warm and serves readtext over a Unix socket.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Loading torch and the EasyOCR detector/recognizer weights takes several
+    seconds, and every process_labels.py and verify_extractions.py run (and
+    every --pipeline OCR process, and every `make process` started from
+    batch.html) paid it again. This daemon loads the reader once and
+    answers readtext requests from all of them over OCR_DAEMON_SOCKET
+    (data/ocr_daemon.sock by default). The scripts use it when the socket
+    answers and fall back to their own reader when it doesn't (see
+    batchProcessor/ocr_client.py for the protocol).
+
+    Requests from every connection go through one OcrBatcher, so labels
+    from different processes share detector batches just as in-flight apps
+    within one process do. Images arrive as file paths or as RGB pixels in
+    a shared-memory block named by the client; the pixels are copied out
+    before the reply, so the client may unlink the block as soon as it has
+    its answer.
+
+    A stale socket file (daemon killed) is replaced on start; if another
+    daemon is answering on it, this one exits. SIGTERM/SIGINT remove the
+    socket before exiting.
+
+Inputs:
+    - config.py: OCR_LANGUAGES, OCR_PRECISION, OCR_DAEMON_SOCKET
+    - Command line: --socket, --status, --stop
+
+Outputs:
+    - Unix socket serving ping / readtext / stop
+    - Console: startup time and one line per 100 images
+
+Usage:
+    cd scripts && python3 miniServer/ocr_daemon.py            # foreground
+    cd scripts && make ocr-daemon
+    cd scripts && python3 miniServer/ocr_daemon.py --status
+    cd scripts && python3 miniServer/ocr_daemon.py --stop
+
+Created: February 2026
+"""
+
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import OCR_LANGUAGES, OCR_PRECISION, OCR_DAEMON_SOCKET
+from batchProcessor import ocr_client
+from batchProcessor import ocr_reader
+from batchProcessor.ocr_batcher import OcrBatcher
+
+_reader = None
+_batcher = None
+_served = {"images": 0, "errors": 0}
+_served_lock = threading.Lock()
+
+
+def get_reader():
+    global _reader
+    if _reader is None:
+        _reader = ocr_reader.new_reader()
+    return _reader
+
+
+def attach_pixels(name: str, shape: list[int]):
+    """Copy an RGB image (numpy array) out of the client's shared-memory block."""
+    from multiprocessing import resource_tracker, shared_memory
+
+    import numpy as np
+
+    shm = shared_memory.SharedMemory(name=name)
+    # The client owns (and unlinks) the block; don't let this process's tracker unlink it too
+    resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        return np.ndarray(tuple(shape), dtype=np.uint8, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+
+def jsonable(results) -> list:
+    """readtext() output with numpy scalars turned into plain numbers."""
+    return [
+        [[[p.item() if hasattr(p, "item") else p for p in point] for point in bbox], text, float(conf)]
+        for bbox, text, conf in results
+    ]
+
+
+def handle(message: dict) -> dict:
+    op = message.get("op")
+    if op == "ping":
+        with _served_lock:
+            images = _served["images"]
+        return {"ok": True, "languages": list(OCR_LANGUAGES), "precision": OCR_PRECISION,
+                "pid": os.getpid(), "images": images}
+    if op == "readtext":
+        if "shm" in message:
+            image = attach_pixels(message["shm"], message["shape"])
+        elif os.path.exists(message.get("path", "")):
+            image = message["path"]
+        else:
+            return {"ok": False, "error": f"no such image: {message.get('path')}"}
+        results = _batcher.submit(image).result()
+        with _served_lock:
+            _served["images"] += 1
+            count = _served["images"]
+        if count % 100 == 0:
+            print(f"{count} images served")
+        return {"ok": True, "results": jsonable(results)}
+    if op == "stop":
+        return {"ok": True, "stopping": True}
+    return {"ok": False, "error": f"unknown op: {op}"}
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """One client connection: a JSON request per line, a JSON reply per line."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = handle(json.loads(line))
+            except Exception as e:
+                with _served_lock:
+                    _served["errors"] += 1
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+            if reply.get("stopping"):
+                # After the reply, so --stop hears back before the socket closes
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+_server = None
+
+
+def running(socket_path: str) -> dict | None:
+    """The ping reply of a daemon answering on socket_path, or None."""
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        return ocr_client.request({"op": "ping"}, socket_path)
+    except (ocr_client.DaemonUnavailable, ValueError):
+        return None
+
+
+def serve(socket_path: str):
+    global _server, _batcher
+
+    status = running(socket_path)
+    if status:
+        print(f"OCR daemon already running on {socket_path} (pid {status['pid']})")
+        return
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # left behind by a daemon that was killed
+
+    start = time.time()
+    print(f"Loading EasyOCR ({', '.join(OCR_LANGUAGES)}, {OCR_PRECISION})...")
+    get_reader()
+    _batcher = OcrBatcher(get_reader)
+    print(f"Model loaded in {time.time() - start:.1f}s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    _server = Server(socket_path, Handler)
+    os.chmod(socket_path, 0o600)
+
+    def stop(signum, frame):
+        threading.Thread(target=_server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"OCR daemon listening on {socket_path} (pid {os.getpid()})")
+    try:
+        _server.serve_forever()
+    finally:
+        _server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        batches = _batcher.counters()
+        print(f"OCR daemon stopped: {_served['images']} images in {batches['batches']} batches, "
+              f"{_served['errors']} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm EasyOCR daemon for the batch pipeline")
+    parser.add_argument("--socket", default=OCR_DAEMON_SOCKET, help="Unix socket path (default: OCR_DAEMON_SOCKET)")
+    parser.add_argument("--status", action="store_true", help="Report whether a daemon is answering, then exit")
+    parser.add_argument("--stop", action="store_true", help="Ask a running daemon to exit")
+    args = parser.parse_args()
+
+    if args.status or args.stop:
+        status = running(args.socket)
+        if status is None:
+            print(f"No OCR daemon on {args.socket}")
+            sys.exit(1)
+        if args.stop:
+            ocr_client.request({"op": "stop"}, args.socket)
+            print(f"Stopped OCR daemon (pid {status['pid']})")
+        else:
+            print(f"OCR daemon pid {status['pid']} on {args.socket}: "
+                  f"{', '.join(status['languages'])} {status.get('precision', 'int8')}, "
+                  f"{status['images']} images served")
+        return
+
+    serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
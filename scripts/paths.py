@@ -178,12 +178,27 @@ def get_extraction_image_dir(ttb_id: str) -> str:
     return path
 
 
-def get_extraction_image_url(ttb_id: str, field_name: str) -> str:
+def get_extraction_image_path(ttb_id: str, field_name: str, ext: str = "png") -> str:
+    """Get filesystem path for one field's extraction image.
+
+    Args:
+        ttb_id: 14-character TTB ID
+        field_name: Field name (e.g., "brandName")
+        ext: File extension ("png" or "webp")
+
+    Returns:
+        File path like: /htdocs/verification/extractions/2/4/0/0/1/0/0/1/000101/brandName.png
+    """
+    return os.path.join(get_extraction_image_dir(ttb_id), f"{field_name}.{ext}")
+
+
+def get_extraction_image_url(ttb_id: str, field_name: str, ext: str = "png") -> str:
     """Get URL path for an extraction image (for frontend fetch).
 
     Args:
         ttb_id: 14-character TTB ID
         field_name: Field name (e.g., "brandName")
+        ext: File extension ("png" or "webp")
 
     Returns:
         URL path like: /verification/extractions/2/4/0/0/1/0/0/1/000101/brandName.png
@@ -196,7 +211,7 @@ def get_extraction_image_url(ttb_id: str, field_name: str) -> str:
     suffix = ttb_id[8:]
     shard_path = "/".join(list(prefix))
 
-    return f"/verification/extractions/{shard_path}/{suffix}/{field_name}.png"
+    return f"/verification/extractions/{shard_path}/{suffix}/{field_name}.{ext}"
 
 
 def get_all_sharded_files(api_type: str, base_dir: str = None) -> list:
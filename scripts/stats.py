@@ -23,6 +23,12 @@ Actions:
     - Updates summary counts for dashboard display
     - Reads current stats for status queries
     - Clears log while preserving summary
+    - Drops the log entries of forgotten applications
+
+    process_labels.py, its worker threads and the API server all update
+    the file: each load → change → save holds an exclusive flock on
+    stats.json.lock, and saves go to a temp file renamed into place, so
+    the UI never reads a half-written file.
 
 Outputs:
     - htdocs/verification/stats.json containing:
@@ -32,8 +38,12 @@ Outputs:
 Created: February 2026
 """
 
+import fcntl
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
 # Stats file location - in verification API for frontend access
@@ -43,12 +53,28 @@ STATS_FILE = os.path.join(BASE_DIR, "htdocs", "verification", "stats.json")
 # Maximum log entries to keep
 MAX_LOG_ENTRIES = 500
 
+# Serializes read-modify-write of stats.json across worker threads
+_lock = threading.RLock()
+
+
+@contextmanager
+def _locked():
+    """Hold stats.json for one load → change → save, against threads and other processes."""
+    with _lock:
+        os.makedirs(os.path.dirname(STATS_FILE), exist_ok=True)
+        with open(STATS_FILE + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
 
 def _load_stats() -> dict:
     """Load stats from JSON file."""
     if os.path.exists(STATS_FILE):
-        with open(STATS_FILE, "r") as f:
-            return json.load(f)
+        try:
+            with open(STATS_FILE, "r") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            pass
     return {
         "summary": {
             "date": None,
@@ -63,14 +89,19 @@ def _load_stats() -> dict:
 def _save_stats(data: dict):
     """Save stats to JSON file."""
     os.makedirs(os.path.dirname(STATS_FILE), exist_ok=True)
-    with open(STATS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(STATS_FILE), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600; the web server reads this file
+        os.replace(tmp, STATS_FILE)
+    except BaseException:
+        os.remove(tmp)
+        raise
 
 
 def log_action(ttb_id: str | None, action: str, message: str):
     """Log a processing action."""
-    data = _load_stats()
-
     entry = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "ttbId": ttb_id,
@@ -78,27 +109,31 @@ def log_action(ttb_id: str | None, action: str, message: str):
         "message": message,
     }
 
-    # Prepend to log (newest first)
-    data["log"].insert(0, entry)
+    with _locked():
+        data = _load_stats()
+
+        # Prepend to log (newest first)
+        data["log"].insert(0, entry)
 
-    # Trim to max entries
-    data["log"] = data["log"][:MAX_LOG_ENTRIES]
+        # Trim to max entries
+        data["log"] = data["log"][:MAX_LOG_ENTRIES]
 
-    _save_stats(data)
+        _save_stats(data)
 
 
 def update_summary(total_processed: int, total_pending: int, total_errors: int):
     """Update the summary counts."""
-    data = _load_stats()
+    with _locked():
+        data = _load_stats()
 
-    data["summary"] = {
-        "date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
-        "totalProcessed": total_processed,
-        "totalPending": total_pending,
-        "totalErrors": total_errors,
-    }
+        data["summary"] = {
+            "date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+            "totalProcessed": total_processed,
+            "totalPending": total_pending,
+            "totalErrors": total_errors,
+        }
 
-    _save_stats(data)
+        _save_stats(data)
 
 
 def get_stats() -> dict:
@@ -108,6 +143,16 @@ def get_stats() -> dict:
 
 def clear_log():
     """Clear the log but keep summary."""
-    data = _load_stats()
-    data["log"] = []
-    _save_stats(data)
+    with _locked():
+        data = _load_stats()
+        data["log"] = []
+        _save_stats(data)
+
+
+def remove_log_entries(ttb_ids: list[str]):
+    """Drop log entries for these applications (e.g. after they are forgotten)."""
+    forgotten = set(ttb_ids)
+    with _locked():
+        data = _load_stats()
+        data["log"] = [entry for entry in data.get("log", []) if entry.get("ttbId") not in forgotten]
+        _save_stats(data)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark: process_labels.py against a fake Vision API.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Runs process_labels.main() over the fixture labels once per worker
+    count and reports apps/minute, per-stage times and peak RSS. Everything
+    after the API call is real: upload prep, EasyOCR, matching, cropping,
+    SQLite writes and export.
+
+    The Anthropic client is replaced by a deterministic fake: each request
+    sleeps for a latency drawn from --latency (seeded by ttbId, so a given
+    app always gets the same latency whatever the worker count or order)
+    and answers with that app's fields from applications.tsv, shaped like a
+    real Messages response. --tail-rate / --tail-factor add slow outliers.
+    With --mode stream the reply arrives as text deltas (first text after
+    ~30% of the latency), as tools/stub_anthropic_server.py streams it.
+
+    Each worker count runs in its own process inside a throwaway sandbox
+    (scripts/ and the label images symlinked; fresh data/, output/ and
+    htdocs/verification/), so processing.db and the caches in this
+    checkout are never touched and every run starts cold. The EasyOCR
+    model is loaded before the clock starts (except in --mode pipeline,
+    where the OCR processes load their own).
+
+    Results are written as JSON (commit, settings, one entry per worker
+    count) so two commits can be compared with --compare.
+
+Inputs:
+    - data/applications.tsv, htdocs/ttb-external/images/ (fixture labels)
+    - Command line: --workers, --limit, --mode, --latency, --tail-rate,
+      --tail-factor, --seed, --process-args, --out, --compare, --keep
+
+Outputs:
+    - Console: apps/min, wall time, peak RSS and stage p50/p95 per run
+    - data/benchmarks/e2e-{commit}-{timestamp}.json (or --out)
+
+Usage:
+    cd scripts && python3 tools/bench_e2e.py --workers 1,2,4 --limit 20
+    cd scripts && python3 tools/bench_e2e.py --latency lognormal:1.2,0.35 --tail-rate 0.03
+    cd scripts && python3 tools/bench_e2e.py --mode async --workers 4,8 --latency fixed:2
+    cd scripts && python3 tools/bench_e2e.py --mode stream --workers 2 --latency fixed:2
+    cd scripts && python3 tools/bench_e2e.py --compare ../data/benchmarks/old.json ../data/benchmarks/new.json
+
+Created: February 2026
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_OUT_DIR = os.path.join(BASE_DIR, "data", "benchmarks")
+MODES = {"workers": [], "pipeline": ["--pipeline"], "async": ["--async"], "stream": ["--stream"]}
+STREAM_CHUNK = 24  # characters per streamed text delta, as in the stub server
+
+
+# ── Latency model ──
+
+def parse_latency(spec: str):
+    """'fixed:S', 'uniform:LO,HI' or 'lognormal:MEDIAN,SIGMA' → rng → seconds."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise argparse.ArgumentTypeError(f"bad latency spec: {spec} (fixed:S, uniform:LO,HI, lognormal:MEDIAN,SIGMA)")
+
+
+class FakeVision:
+    """Deterministic stand-in for the Messages API, shared by the sync and async fakes."""
+
+    def __init__(self, latency, tail_rate: float, tail_factor: float, seed: int):
+        import anthropic
+        from stub_anthropic_server import TRUTH, make_message
+
+        self._message_type = anthropic.types.Message
+        self._make_message = make_message
+        self.latency = latency
+        self.tail_rate = tail_rate
+        self.tail_factor = tail_factor
+        self.seed = seed
+        self.by_image = {row[column]: ttb_id for ttb_id, row in TRUTH.items()
+                         for column in ("labelImageFront", "labelImageBack") if row.get(column)}
+        self.uploads = {}  # digest of base64 data → label file name
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def track_uploads(self, process_labels):
+        """Wrap encode_image so a request's images can be traced back to their app."""
+        encode = process_labels.encode_image
+
+        def tracked(path):
+            data, media_type = encode(path)
+            with self.lock:
+                self.uploads[hashlib.sha1(data.encode()).hexdigest()] = os.path.basename(path)
+            return data, media_type
+
+        process_labels.encode_image = tracked
+
+    def app_for(self, params: dict) -> str:
+        for message in params.get("messages", []):
+            for block in message.get("content", []):
+                if block.get("type") == "image":
+                    digest = hashlib.sha1(block["source"]["data"].encode()).hexdigest()
+                    with self.lock:
+                        return self.by_image.get(self.uploads.get(digest, ""), "")
+        return ""
+
+    def plan(self, params: dict):
+        """(seconds to wait, reply) for one request."""
+        ttb_id = self.app_for(params)
+        with self.lock:
+            attempt = self.attempts.get(ttb_id, 0)
+            self.attempts[ttb_id] = attempt + 1
+        rng = random.Random(f"{self.seed}:{ttb_id}:{attempt}")
+        seconds = self.latency(rng)
+        if rng.random() < self.tail_rate:
+            seconds *= self.tail_factor
+        usage = {"input_tokens": 3200}
+        return seconds, self._message_type.model_validate(self._make_message(ttb_id, usage))
+
+
+class FakeStream:
+    """messages.stream() stand-in: first text after ~30% of the latency, the rest spread out."""
+
+    def __init__(self, seconds: float, reply):
+        self.seconds = seconds
+        self.reply = reply
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        text = self.reply.content[0].text
+        chunks = [text[i:i + STREAM_CHUNK] for i in range(0, len(text), STREAM_CHUNK)]
+        time.sleep(self.seconds * 0.3)
+        for chunk in chunks:
+            time.sleep(self.seconds * 0.7 / len(chunks))
+            yield chunk
+
+    def get_final_message(self):
+        return self.reply
+
+
+def install_fake_clients(fake: FakeVision):
+    import anthropic
+
+    class Messages:
+        def create(self, **params):
+            seconds, reply = fake.plan(params)
+            time.sleep(seconds)
+            return reply
+
+        def stream(self, **params):
+            seconds, reply = fake.plan(params)
+            return FakeStream(seconds, reply)
+
+    class AsyncMessages:
+        async def create(self, **params):
+            seconds, reply = fake.plan(params)
+            await asyncio.sleep(seconds)
+            return reply
+
+    class FakeAnthropic:
+        def __init__(self, *args, **kwargs):
+            self.messages = Messages()
+
+    class FakeAsyncAnthropic:
+        def __init__(self, *args, **kwargs):
+            self.messages = AsyncMessages()
+
+    anthropic.Anthropic = FakeAnthropic
+    anthropic.AsyncAnthropic = FakeAsyncAnthropic
+
+
+# ── One run (child process, inside a sandbox) ──
+
+def run_child(args):
+    """Process --limit apps with --workers N in this sandbox; write the result JSON."""
+    import sqlite3
+    from batchProcessor import process_labels, stage_timings
+
+    fake = FakeVision(parse_latency(args.latency), args.tail_rate, args.tail_factor, args.seed)
+    install_fake_clients(fake)
+    fake.track_uploads(process_labels)
+    if args.mode != "pipeline":
+        process_labels.get_ocr_reader()  # model load is not part of throughput
+
+    sys.argv = (["process_labels.py", "--limit", str(args.limit), "--workers", str(args.child)]
+                + MODES[args.mode] + args.process_args.split())
+    start = time.perf_counter()
+    process_labels.main()
+    wall = time.perf_counter() - start
+
+    conn = sqlite3.connect(process_labels.PROCESSING_DB)
+    try:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM processing_results GROUP BY status").fetchall())
+        stages = stage_timings.report(conn, stage_timings.RUN_ID)
+    finally:
+        conn.close()
+
+    apps = counts.get("processed", 0) + counts.get("error", 0)
+    result = {
+        "workers": args.child,
+        "apps": apps,
+        "errors": counts.get("error", 0),
+        "wall_seconds": round(wall, 3),
+        "apps_per_min": round(apps / wall * 60, 2) if wall else 0,
+        "api_requests": process_labels.usage_totals()["requests"],
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_rss_children_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "stages": {name: {k: round(v, 4) for k, v in s.items()} for name, s in stages.items()},
+    }
+    with open(args.result, "w") as f:
+        json.dump(result, f)
+
+
+# ── Driver ──
+
+def make_sandbox(root: str) -> str:
+    """Directory tree where config.BASE_DIR resolves to `root` (symlinked code and labels)."""
+    os.makedirs(os.path.join(root, "data"))
+    os.makedirs(os.path.join(root, "htdocs", "verification"))
+    os.symlink(SCRIPTS_DIR, os.path.join(root, "scripts"))
+    os.symlink(os.path.join(BASE_DIR, "data", "applications.tsv"), os.path.join(root, "data", "applications.tsv"))
+    os.symlink(os.path.join(BASE_DIR, "htdocs", "ttb-external"), os.path.join(root, "htdocs", "ttb-external"))
+    subprocess.run([sys.executable, os.path.join(root, "scripts", "demoSetup", "make_demo_db.py")],
+                   cwd=os.path.join(root, "scripts"), check=True, stdout=subprocess.DEVNULL)
+    return root
+
+
+def run_one(args, workers: int, root: str) -> dict:
+    sandbox = make_sandbox(os.path.join(root, f"{args.mode}-w{workers}"))
+    result_path = os.path.join(sandbox, "result.json")
+    log_path = os.path.join(sandbox, "run.log")
+    command = [
+        sys.executable, os.path.join(sandbox, "scripts", "tools", "bench_e2e.py"),
+        "--child", str(workers), "--result", result_path,
+        "--limit", str(args.limit), "--mode", args.mode, "--latency", args.latency,
+        "--tail-rate", str(args.tail_rate), "--tail-factor", str(args.tail_factor),
+        "--seed", str(args.seed), "--process-args", args.process_args,
+    ]
+    with open(log_path, "w") as log:
+        proc = subprocess.run(command, cwd=os.path.join(sandbox, "scripts"), stdout=log, stderr=subprocess.STDOUT)
+    if proc.returncode != 0 or not os.path.exists(result_path):
+        with open(log_path) as f:
+            tail = f.read()[-2000:]
+        raise RuntimeError(f"{args.mode} with {workers} workers failed (exit {proc.returncode}):\n{tail}")
+    with open(result_path) as f:
+        return json.load(f)
+
+
+def git_commit() -> tuple[str, bool]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BASE_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def print_run(run: dict):
+    stages = run["stages"]
+    parts = [f"{name} {s['p50']:.2f}/{s['p95']:.2f}" for name, s in stages.items()]
+    print(
+        f"  workers {run['workers']:>2}: {run['apps_per_min']:7.1f} apps/min  {run['wall_seconds']:7.1f}s  "
+        f"{run['apps']} apps ({run['errors']} errors)  RSS {run['peak_rss_mb']:.0f} MB"
+        + (f" + {run['peak_rss_children_mb']:.0f} MB children" if run["peak_rss_children_mb"] else "")
+    )
+    print(f"      stage p50/p95 s: {', '.join(parts)}")
+
+
+def compare(old: dict, new: dict):
+    """Print apps/min and stage p50 changes for worker counts present in both results."""
+    print(f"Compare {old['commit']} ({old['created_at'][:16]}) → {new['commit']} ({new['created_at'][:16]})")
+    if old["settings"] != new["settings"]:
+        print(f"  note: settings differ\n    old {old['settings']}\n    new {new['settings']}")
+    old_runs = {r["workers"]: r for r in old["runs"]}
+    for run in new["runs"]:
+        before = old_runs.get(run["workers"])
+        if before is None:
+            continue
+        change = (run["apps_per_min"] / before["apps_per_min"] - 1) if before["apps_per_min"] else 0
+        print(f"  workers {run['workers']:>2}: {before['apps_per_min']:7.1f} → {run['apps_per_min']:7.1f} apps/min "
+              f"({change:+.1%}), RSS {before['peak_rss_mb']:.0f} → {run['peak_rss_mb']:.0f} MB")
+        for name, s in run["stages"].items():
+            if name in before["stages"]:
+                b = before["stages"][name]["p50"]
+                delta = f"{s['p50'] / b - 1:+.0%}" if b else "n/a"
+                print(f"      {name:<10} p50 {b:.3f}s → {s['p50']:.3f}s ({delta})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark with a fake Vision API")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts (default: 1,2,4)")
+    parser.add_argument("--limit", type=int, default=20, help="Apps per run (default: 20)")
+    parser.add_argument("--mode", choices=sorted(MODES), default="workers", help="process_labels run mode")
+    parser.add_argument("--latency", default="lognormal:1.2,0.35",
+                        help="Vision latency: fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA (default: lognormal:1.2,0.35)")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of requests that are slow outliers")
+    parser.add_argument("--tail-factor", type=float, default=8.0, help="Latency multiplier for outliers (default: 8)")
+    parser.add_argument("--seed", type=int, default=1, help="Latency seed (default: 1)")
+    parser.add_argument("--process-args", default="", help="Extra process_labels.py arguments, e.g. '--no-adaptive'")
+    parser.add_argument("--out", help="Result JSON path (default: data/benchmarks/e2e-{commit}-{time}.json)")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="Compare two result files, or one against a fresh run")
+    parser.add_argument("--keep", action="store_true", help="Keep the sandboxes (logs, DBs, crops)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    parse_latency(args.latency)
+
+    if args.child is not None:
+        run_child(args)
+        return
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as a, open(args.compare[1]) as b:
+            compare(json.load(a), json.load(b))
+        return
+
+    commit, dirty = git_commit()
+    worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    settings = {
+        "mode": args.mode, "limit": args.limit, "latency": args.latency, "tail_rate": args.tail_rate,
+        "tail_factor": args.tail_factor, "seed": args.seed, "process_args": args.process_args,
+    }
+    print(f"Benchmark {commit}{' (dirty)' if dirty else ''}: {args.mode}, {args.limit} apps, latency {args.latency}"
+          + (f", {args.tail_rate:.0%} x{args.tail_factor:g} tail" if args.tail_rate else ""))
+
+    root = tempfile.mkdtemp(prefix="bench-e2e-")
+    runs = []
+    try:
+        for workers in worker_counts:
+            run = run_one(args, workers, root)
+            runs.append(run)
+            print_run(run)
+    finally:
+        if args.keep:
+            print(f"Sandboxes kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    result = {
+        "benchmark": "e2e",
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": settings,
+        "runs": runs,
+    }
+    out = args.out or os.path.join(
+        DEFAULT_OUT_DIR, f"e2e-{commit}-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results: {out}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
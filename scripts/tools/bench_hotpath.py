@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark + golden outputs for the OCR geometry and matching hot path.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Times the functions process_labels.py runs for every field of every
+    app, in isolation:
+
+        normalize                   every OCR token's text
+        compute_text_angle          every OCR token's polygon
+        OcrIndex                    building the per-image match index
+        find_ocr_regions_for_field  every field, against the prebuilt index
+                                    and against the raw item list
+        merge_bboxes                every field's matched regions, plus
+                                    runs of neighbouring tokens
+
+    OCR is synthesized per label size (--sizes, default 50..1000 tokens):
+    each app's fields (including the long government warning) are split
+    into garbled runs as in bench_matcher.py, then padded with filler copy
+    up to the size. Lines are drawn at mixed rotations: mostly horizontal
+    with a few degrees of skew, some vertical (±90°), some steeply skewed.
+
+    Every function's outputs are compared with a golden file, so a faster
+    version can be shown to return exactly the same thing. --update writes
+    the golden file from the current code; without it, any difference is
+    reported and the exit status is 1.
+
+Inputs:
+    - data/applications.tsv (field text, via tools/stub_anthropic_server.py)
+    - tools/golden/hotpath.json (expected outputs)
+    - Command line: --sizes, --apps, --repeat, --seed, --update
+
+Outputs:
+    - Console: calls, best total time and µs/call per function and size
+    - tools/golden/hotpath.json (with --update)
+
+Usage:
+    cd scripts && python3 tools/bench_hotpath.py
+    cd scripts && python3 tools/bench_hotpath.py --sizes 1000 --repeat 10
+    cd scripts && python3 tools/bench_hotpath.py --update     # after an intended change
+
+Created: February 2026
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from batchProcessor import ocr_matcher
+from batchProcessor.ocr_matcher import OcrIndex, normalize
+from batchProcessor.process_labels import compute_text_angle, find_ocr_regions_for_field, merge_bboxes
+from bench_matcher import FILLER_WORDS, garble
+from stub_anthropic_server import TRUTH, fields_for
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "hotpath.json")
+MERGE_RUN = 6  # neighbouring tokens per extra merge_bboxes group
+
+
+# ── Synthetic OCR ──
+
+def line_angle(rng: random.Random) -> float:
+    """Text direction in degrees: mostly level, some vertical, a few steep."""
+    roll = rng.random()
+    if roll < 0.70:
+        return rng.uniform(-3, 3)
+    if roll < 0.85:
+        return 90 + rng.uniform(-2, 2)
+    if roll < 0.95:
+        return -90 + rng.uniform(-2, 2)
+    return rng.choice([-1, 1]) * rng.uniform(15, 40)
+
+
+def polygon(x: int, y: int, width: int, height: int, angle: float) -> list[list[int]]:
+    """EasyOCR-style [tl, tr, br, bl] for a box of text rotated about its top-left."""
+    rad = math.radians(angle)
+    cos, sin = math.cos(rad), math.sin(rad)
+    corners = [(0, 0), (width, 0), (width, height), (0, height)]
+    return [[int(round(x + cx * cos - cy * sin)), int(round(y + cx * sin + cy * cos))] for cx, cy in corners]
+
+
+def synth_label(fields: list[dict], size: int, rng: random.Random) -> list[dict]:
+    """`size` OCR items holding every field's text (garbled, in runs) plus filler."""
+    runs = []
+    for field in fields:
+        words = field["extracted_text"].split()
+        longest = 8 if len(words) > 20 else 4  # the warning comes back as long lines
+        while words:
+            n = rng.randint(1, longest)
+            runs.append(" ".join(garble(w, rng) for w in words[:n]))
+            words = words[n:]
+    while len(runs) < size:
+        runs.append(" ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(1, 3))))
+
+    items = []
+    for text in runs:
+        x, y = rng.randint(40, 1400), rng.randint(40, 2000)
+        items.append({
+            "text": text,
+            "bbox_polygon": polygon(x, y, 12 * len(text), 24, line_angle(rng)),
+            "confidence": round(rng.uniform(0.4, 1.0), 3),
+        })
+    rng.shuffle(items)
+    return items
+
+
+def build_cases(sizes: list[int], apps: int, seed: int) -> list[dict]:
+    """One synthetic label per (size, app), every field read from that label."""
+    cases = []
+    ids = sorted(TRUTH)[:apps]
+    for size in sizes:
+        rng = random.Random(f"{seed}:{size}")
+        for ttb_id in ids:
+            fields = fields_for(ttb_id)
+            cases.append({"key": f"{size}/{ttb_id}", "size": size, "fields": fields,
+                          "items": synth_label(fields, size, rng)})
+    return cases
+
+
+# ── Outputs ──
+
+def outputs(case: dict) -> dict:
+    """Everything the hot-path functions return for one label, JSON-ready."""
+    items = case["items"]
+    position = {id(item): i for i, item in enumerate(items)}
+    index = OcrIndex(items)
+    regions, merged = {}, {}
+    for field in case["fields"]:
+        found = find_ocr_regions_for_field(field["extracted_text"], index)
+        if found != find_ocr_regions_for_field(field["extracted_text"], items):
+            raise AssertionError(f"{case['key']} {field['field_name']}: index and list results differ")
+        regions[field["field_name"]] = [position[id(item)] for item in found]
+        merged[field["field_name"]] = merge_bboxes(found)
+    return {
+        "normalize": [normalize(item["text"]) for item in items],
+        "compute_text_angle": [compute_text_angle(item["bbox_polygon"]) for item in items],
+        "find_ocr_regions_for_field": regions,
+        "merge_bboxes": merged,
+        "merge_bboxes_runs": [merge_bboxes(items[i:i + MERGE_RUN]) for i in range(0, len(items), MERGE_RUN)],
+    }
+
+
+def compare_golden(golden: dict, current: dict) -> int:
+    """Print each differing output; returns how many differ."""
+    differences = 0
+    for key, expected in golden.items():
+        actual = current.get(key)
+        if actual is None:
+            print(f"  MISSING {key}")
+            differences += 1
+            continue
+        for name, value in expected.items():
+            if actual[name] != value:
+                differences += 1
+                print(f"  DIFF {key} {name}: {describe_diff(value, actual[name])}")
+    return differences
+
+
+def describe_diff(expected, actual) -> str:
+    if isinstance(expected, list) and len(expected) == len(actual):
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            if a != b:
+                return f"[{i}] expected {a!r}, got {b!r}"
+    if isinstance(expected, dict):
+        for k in expected:
+            if expected[k] != actual.get(k):
+                return f"{k}: expected {expected[k]!r}, got {actual.get(k)!r}"
+    return f"expected {str(expected)[:80]}, got {str(actual)[:80]}"
+
+
+# ── Benchmark ──
+
+def time_best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        ocr_matcher._words_similar.cache_clear()  # each run starts cold
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_size(cases: list[dict], repeat: int) -> list[tuple[str, int, float]]:
+    """(function, calls, best seconds) for the cases of one label size."""
+    texts = [item["text"] for case in cases for item in case["items"]]
+    polygons = [item["bbox_polygon"] for case in cases for item in case["items"]]
+    indexes = [OcrIndex(case["items"]) for case in cases]
+    lookups = [(field["extracted_text"], index, case["items"])
+               for case, index in zip(cases, indexes) for field in case["fields"]]
+    groups = [find_ocr_regions_for_field(text, index) for text, index, _ in lookups]
+    groups = [g for g in groups if g] + [case["items"][i:i + MERGE_RUN] for case in cases
+                                         for i in range(0, len(case["items"]), MERGE_RUN)]
+
+    def run_normalize():
+        for text in texts:
+            normalize(text)
+
+    def run_angles():
+        for points in polygons:
+            compute_text_angle(points)
+
+    def run_index():
+        for case in cases:
+            OcrIndex(case["items"])
+
+    def run_find_index():
+        for text, index, _ in lookups:
+            find_ocr_regions_for_field(text, index)
+
+    def run_find_list():
+        for text, _, items in lookups:
+            find_ocr_regions_for_field(text, items)
+
+    def run_merge():
+        for group in groups:
+            merge_bboxes(group)
+
+    return [
+        ("normalize", len(texts), time_best(run_normalize, repeat)),
+        ("compute_text_angle", len(polygons), time_best(run_angles, repeat)),
+        ("OcrIndex", len(cases), time_best(run_index, repeat)),
+        ("find_ocr_regions_for_field (index)", len(lookups), time_best(run_find_index, repeat)),
+        ("find_ocr_regions_for_field (list)", len(lookups), time_best(run_find_list, repeat)),
+        ("merge_bboxes", len(groups), time_best(run_merge, repeat)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the OCR geometry/matching hot path and check golden outputs")
+    parser.add_argument("--sizes", default="50,200,500,1000", help="OCR tokens per label (default: 50,200,500,1000)")
+    parser.add_argument("--apps", type=int, default=4, help="Apps (labels) per size (default: 4)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per function, best time kept (default: 5)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for synthetic OCR (default: 1)")
+    parser.add_argument("--update", action="store_true", help="Write the golden file from the current code")
+    parser.add_argument("--golden", default=GOLDEN_PATH, help="Golden file (default: tools/golden/hotpath.json)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    cases = build_cases(sizes, args.apps, args.seed)
+    print(f"{len(cases)} labels: {args.apps} apps x sizes {', '.join(map(str, sizes))} (seed {args.seed})")
+
+    print(f"\n{'Function':<36}{'Size':>6}{'Calls':>8}{'Best ms':>10}{'µs/call':>10}")
+    for size in sizes:
+        for name, calls, seconds in bench_size([c for c in cases if c["size"] == size], args.repeat):
+            print(f"{name:<36}{size:>6}{calls:>8}{seconds * 1000:>10.2f}{seconds / calls * 1e6:>10.2f}")
+
+    # Round-trip so tuples and floats compare the way they were stored
+    current = json.loads(json.dumps({case["key"]: outputs(case) for case in cases}))
+    settings = {"sizes": sizes, "apps": args.apps, "seed": args.seed}
+    if args.update:
+        os.makedirs(os.path.dirname(os.path.abspath(args.golden)), exist_ok=True)
+        with open(args.golden, "w") as f:
+            json.dump({"settings": settings, "cases": current}, f, separators=(",", ":"))
+            f.write("\n")
+        print(f"\nGolden outputs written: {args.golden}")
+        return
+
+    if not os.path.exists(args.golden):
+        print(f"\nNo golden file at {args.golden}; run with --update to create it")
+        return
+    with open(args.golden) as f:
+        golden = json.load(f)
+    if golden["settings"] != settings:
+        print(f"\nGolden file was written for {golden['settings']}; rerun with those settings to check outputs")
+        return
+    differences = compare_golden(golden["cases"], current)
+    print(f"\nGolden outputs: {len(current)} labels checked, {differences} differences")
+    sys.exit(1 if differences else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: indexed OCR matcher vs the original SequenceMatcher scan.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Runs the field → OCR region matching from save_fields() for every
+    application in applications.tsv, once with the original
+    find_ocr_regions_for_field() (kept here verbatim as the reference) and
+    once with ocr_matcher.OcrIndex / find_regions().
+
+    EasyOCR output is synthesized from the application truth so this runs
+    without the OCR model: each field's words become OCR tokens with
+    typical character confusions (O→0, I→1, S→5...), lines are split and
+    shuffled in position, and --filler tokens of unrelated label copy are
+    added to the back label to mimic a dense back label.
+
+    Every match decision is compared between the two implementations; any
+    difference is reported and the exit status is 1.
+
+Inputs:
+    - data/applications.tsv (field text, via tools/stub_anthropic_server.py)
+    - Command line: --repeat, --filler, --seed
+
+Outputs:
+    - Console: per-implementation time, speedup, decision mismatches
+
+Usage:
+    cd scripts && python3 tools/bench_matcher.py
+    cd scripts && python3 tools/bench_matcher.py --filler 400 --repeat 5
+
+Created: February 2026
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from batchProcessor import ocr_matcher
+from batchProcessor.ocr_matcher import OcrIndex, find_regions, normalize
+from stub_anthropic_server import TRUTH, fields_for
+
+CONFUSIONS = {"O": "0", "I": "1", "S": "5", "L": "I", "B": "8", "E": "F", "G": "6", "%": "9%"}
+FILLER_WORDS = (
+    "crafted small batch since family estate aged oak barrels smooth finish notes of vanilla "
+    "caramel citrus honey spice enjoy responsibly serve chilled neat or on the rocks distilled "
+    "bottled by product of imported please recycle www label co"
+).upper().split()
+
+
+# ── Reference implementation (find_ocr_regions_for_field before ocr_matcher) ──
+
+def legacy_find_regions(field_text: str, ocr_items: list[dict], min_similarity: float = 0.3) -> list[dict]:
+    if not field_text or not ocr_items:
+        return []
+
+    field_norm = normalize(field_text)
+    field_words = field_norm.split()
+
+    scored_items = []
+    for i, item in enumerate(ocr_items):
+        item_norm = normalize(item["text"])
+        if not item_norm:
+            continue
+
+        if item_norm in field_norm:
+            score = len(item_norm) / max(len(field_norm), 1)
+            scored_items.append((i, score, item))
+        else:
+            ratio = SequenceMatcher(None, item_norm, field_norm).ratio()
+
+            item_words = item_norm.split()
+            fuzzy_word_matches = 0
+            for iw in item_words:
+                for fw in field_words:
+                    if SequenceMatcher(None, iw, fw).ratio() > 0.6:
+                        fuzzy_word_matches += 1
+                        break
+            word_score = fuzzy_word_matches / max(len(item_words), 1)
+
+            score = max(ratio * 0.6, word_score * 0.8)
+            if score >= min_similarity:
+                scored_items.append((i, score, item))
+
+    if not scored_items:
+        return []
+
+    scored_items.sort(key=lambda x: (x[2]["bbox_polygon"][0][1], x[2]["bbox_polygon"][0][0]))
+
+    if len(field_words) <= 6:
+        best_score = 0
+        best_items = []
+        for idx, score, item in scored_items:
+            if score > best_score:
+                best_score = score
+                best_items = [item]
+
+        for i in range(len(scored_items)):
+            for j in range(i + 1, min(i + 4, len(scored_items) + 1)):
+                group = [s[2] for s in scored_items[i:j]]
+                combined = " ".join(normalize(it["text"]) for it in group)
+                ratio = SequenceMatcher(None, combined, field_norm).ratio()
+                if ratio > best_score:
+                    best_score = ratio
+                    best_items = group
+
+        return best_items
+
+    return [item for _, _, item in scored_items]
+
+
+# ── Synthetic OCR ──
+
+def garble(word: str, rng: random.Random, rate: float = 0.08) -> str:
+    return "".join(CONFUSIONS[ch] if ch in CONFUSIONS and rng.random() < rate else ch for ch in word)
+
+
+def synth_ocr(fields: list[dict], side: str, filler: int, rng: random.Random) -> list[dict]:
+    """OCR items for one label side: field text split into short garbled runs, plus filler."""
+    runs = []
+    for field in fields:
+        if field["image_side"] != side:
+            continue
+        words = field["extracted_text"].split()
+        while words:
+            n = rng.randint(1, 4)
+            runs.append(" ".join(garble(w, rng) for w in words[:n]))
+            words = words[n:]
+    for _ in range(filler if side == "back" else filler // 4):
+        runs.append(" ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(1, 3))))
+
+    items = []
+    for text in runs:
+        x, y = rng.randint(0, 700), rng.randint(0, 1000)
+        w, h = 12 * len(text), 24
+        items.append({
+            "text": text,
+            "bbox_polygon": [[x, y], [x + w, y], [x + w, y + h], [x, y + h]],
+            "confidence": round(rng.uniform(0.4, 1.0), 3),
+        })
+    return items
+
+
+def build_corpus(filler: int, seed: int) -> list[tuple]:
+    rng = random.Random(seed)
+    corpus = []
+    for ttb_id in sorted(TRUTH):
+        fields = fields_for(ttb_id)
+        corpus.append((ttb_id, fields, synth_ocr(fields, "front", filler, rng), synth_ocr(fields, "back", filler, rng)))
+    return corpus
+
+
+# ── Benchmark ──
+
+def match_app(fields, front_ocr, back_ocr, find) -> list[tuple]:
+    """The side / fallback logic of save_fields(); returns (field, side, item ids)."""
+    decisions = []
+    for field in fields:
+        side = field["image_side"]
+        ocr_items, alt_ocr = (back_ocr, front_ocr) if side == "back" else (front_ocr, back_ocr)
+        regions = find(field["extracted_text"], ocr_items)
+        if not regions:
+            regions = find(field["extracted_text"], alt_ocr)
+            side = "front" if side == "back" else "back"
+        decisions.append((field["field_name"], side, [id(r) for r in regions]))
+    return decisions
+
+
+def run_legacy(corpus):
+    return [match_app(f, fo, bo, legacy_find_regions) for _, f, fo, bo in corpus]
+
+
+def run_indexed(corpus):
+    ocr_matcher._words_similar.cache_clear()  # each run starts cold
+    results = []
+    for _, fields, front_ocr, back_ocr in corpus:
+        front, back = OcrIndex(front_ocr), OcrIndex(back_ocr)
+        results.append(match_app(fields, front, back, lambda text, index: find_regions(index, text)))
+    return results
+
+
+def best_time(fn, corpus, repeat: int) -> tuple[float, list]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(corpus)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the indexed OCR matcher against the original")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation, best time kept (default: 3)")
+    parser.add_argument("--filler", type=int, default=200, help="Filler OCR tokens on each back label (default: 200)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for synthetic OCR (default: 1)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.filler, args.seed)
+    tokens = sum(len(fo) + len(bo) for _, _, fo, bo in corpus)
+    fields = sum(len(f) for _, f, _, _ in corpus)
+    print(f"{len(corpus)} apps, {fields} fields, {tokens} OCR tokens (filler {args.filler}/back label)")
+
+    legacy_time, legacy = best_time(run_legacy, corpus, args.repeat)
+    indexed_time, indexed = best_time(run_indexed, corpus, args.repeat)
+
+    mismatches = 0
+    for (ttb_id, *_), old, new in zip(corpus, legacy, indexed):
+        for a, b in zip(old, new):
+            if a != b:
+                mismatches += 1
+                print(f"  MISMATCH {ttb_id} {a[0]}: legacy side={a[1]} n={len(a[2])}, indexed side={b[1]} n={len(b[2])}")
+
+    print(f"legacy:  {legacy_time * 1000:8.1f} ms  ({legacy_time / len(corpus) * 1000:.2f} ms/app)")
+    print(f"indexed: {indexed_time * 1000:8.1f} ms  ({indexed_time / len(corpus) * 1000:.2f} ms/app)")
+    print(f"speedup: {legacy_time / indexed_time:.1f}x, decision mismatches: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
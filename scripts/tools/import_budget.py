@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check: startup cost of each entry point, from -X importtime.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    process_labels.py used to import anthropic, easyocr (and so torch),
+    numpy and PIL before parsing its arguments, so `--help`, a missing
+    --ttb-id and every `make` step paid for them. Those imports now sit on
+    the code paths that use them; this tool keeps it that way.
+
+    Each entry point is started in a fresh interpreter with
+    `python -X importtime` (scripts with a CLI get --help, the others are
+    imported as modules without running main()). The stderr report is
+    parsed into per-module self/cumulative microseconds, and for every
+    entry point the tool prints:
+
+        total ms     import time of everything the entry point pulled in,
+                     minus a bare interpreter's own startup imports
+        heaviest     the largest top-level packages by time
+        forbidden    heavy packages that must not load at startup
+                     (anthropic, easyocr, torch, numpy, PIL, cv2) —
+                     found anywhere in the import tree
+
+    A run fails (exit 1) if an entry point imports a forbidden package or
+    goes over its budget. Timings are the best of --repeat runs, since the
+    first run after a change also pays for .pyc compilation.
+
+Inputs:
+    - The entry points in ENTRY_POINTS (run from scripts/)
+    - Command line: --repeat, --only, --top, --scale
+
+Outputs:
+    - Console: total ms vs budget, heaviest packages, forbidden imports
+    - Exit status 1 on any forbidden import or budget overrun
+
+Usage:
+    cd scripts && python3 tools/import_budget.py
+    cd scripts && python3 tools/import_budget.py --only process_labels --top 10
+    cd scripts && python3 tools/import_budget.py --scale 2     # slow machine: double budgets
+
+Created: February 2026
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name → (command after `python -X importtime`, budget in ms)
+ENTRY_POINTS = {
+    "process_labels": (["batchProcessor/process_labels.py", "--help"], 120),
+    "verify_extractions": (["-c", "import batchProcessor.verify_extractions"], 80),
+    "export_extractions": (["-c", "import batchProcessor.export_extractions"], 60),
+    "clear_processing": (["-c", "import batchProcessor.clear_processing"], 60),
+    "stage_timings": (["batchProcessor/stage_timings.py", "--help"], 60),
+    "vision_cache": (["batchProcessor/vision_cache.py", "--help"], 60),
+    "ocr_cache": (["batchProcessor/ocr_cache.py", "--help"], 60),
+    "api_server": (["miniServer/api_server.py", "--help"], 120),
+    "ocr_daemon": (["miniServer/ocr_daemon.py", "--help"], 100),
+}
+
+# Must not be imported just to start up
+FORBIDDEN = ["anthropic", "easyocr", "torch", "numpy", "PIL", "cv2"]
+
+
+# ── -X importtime ──
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """(module, depth, self µs, cumulative µs) per line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), depth, int(parts[0]), int(parts[1])))
+    return rows
+
+
+def run_importtime(command: list[str]) -> list[tuple[str, int, int, int]]:
+    """Run one command under -X importtime from scripts/ and parse its report."""
+    env = dict(os.environ, PYTHONPATH=SCRIPTS_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run([sys.executable, "-X", "importtime", *command], cwd=SCRIPTS_DIR,
+                            env=env, capture_output=True, text=True)
+    rows = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        last = result.stderr.strip().splitlines()[-1:] or ["(no output)"]
+        raise RuntimeError(f"{' '.join(command)} exited {result.returncode}: {last[0]}")
+    return rows
+
+
+def total_us(rows: list[tuple[str, int, int, int]]) -> int:
+    """Cumulative time of the top-level imports (nested ones are inside these)."""
+    return sum(cumulative for _, depth, _, cumulative in rows if depth == 0)
+
+
+def by_package(rows: list[tuple[str, int, int, int]], skip: set[str]) -> dict[str, int]:
+    """Self time summed per top-level package, leaving out the interpreter's own startup modules."""
+    packages = {}
+    for name, _, self_us, _ in rows:
+        if name in skip:
+            continue
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    return packages
+
+
+def import_chain(rows: list[tuple[str, int, int, int]], index: int) -> list[str]:
+    """Top-level import → ... → rows[index]: each module is listed after the ones it imported."""
+    chain = [rows[index][0]]
+    depth = rows[index][1]
+    for name, row_depth, _, _ in rows[index + 1:]:
+        if row_depth < depth:
+            chain.append(name)
+            depth = row_depth
+            if depth == 0:
+                break
+    return chain[::-1]
+
+
+def measure(command: list[str], repeat: int) -> list[tuple[str, int, int, int]]:
+    """The run with the smallest total out of `repeat`."""
+    return min((run_importtime(command) for _ in range(max(1, repeat))), key=total_us)
+
+
+# ── Report ──
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup import cost per entry point, checked against budgets")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per entry point, best kept (default: 3)")
+    parser.add_argument("--only", help="Comma-separated entry points to check (default: all)")
+    parser.add_argument("--top", type=int, default=3, help="Heaviest packages to list per entry point (default: 3)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (slow machines, CI)")
+    args = parser.parse_args()
+
+    names = list(ENTRY_POINTS)
+    if args.only:
+        names = [n.strip() for n in args.only.split(",") if n.strip()]
+        unknown = sorted(set(names) - set(ENTRY_POINTS))
+        if unknown:
+            parser.error(f"unknown entry point(s): {', '.join(unknown)}; choose from {', '.join(ENTRY_POINTS)}")
+
+    baseline = measure(["-c", "pass"], args.repeat)
+    startup = {name for name, _, _, _ in baseline}
+    baseline_us = total_us(baseline)
+    print(f"Bare interpreter startup imports: {baseline_us / 1000:.1f} ms (subtracted below)\n")
+
+    failures = 0
+    print(f"{'Entry point':<20}{'ms':>8}{'budget':>8}  Heaviest packages")
+    for name in names:
+        command, budget_ms = ENTRY_POINTS[name]
+        budget_ms *= args.scale
+        try:
+            rows = measure(command, args.repeat)
+        except RuntimeError as e:
+            failures += 1
+            print(f"{name:<20}{'—':>8}{budget_ms:>8.0f}  FAILED: {e}")
+            continue
+
+        ms = max(0, total_us(rows) - baseline_us) / 1000
+        heaviest = sorted(by_package(rows, startup).items(), key=lambda kv: -kv[1])[:args.top]
+        listed = ", ".join(f"{pkg} {us / 1000:.1f}" for pkg, us in heaviest)
+        status = ""
+        if ms > budget_ms:
+            failures += 1
+            status = "  OVER BUDGET"
+        print(f"{name:<20}{ms:>8.1f}{budget_ms:>8.0f}  {listed}{status}")
+
+        loaded = {row[0].split(".")[0] for row in rows}
+        for package in FORBIDDEN:
+            if package in loaded:
+                failures += 1
+                first = next(i for i, row in enumerate(rows) if row[0].split(".")[0] == package)
+                print(f"{'':<20}  FORBIDDEN: {package} at startup via {' → '.join(import_chain(rows, first))}")
+
+    print(f"\n{failures} problem(s)" if failures else "\nAll entry points within budget")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
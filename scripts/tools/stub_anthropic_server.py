@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Anthropic API, for testing without a key or cost.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    Testing utility that implements the Messages endpoint and the Message
+    Batches endpoints used by process_labels.py (--batch-api). Replies are
+    built from the "truth" in data/applications.tsv (brand name, alcohol
+    content, etc.), so the OCR/crop/export half of the pipeline runs on
+    realistic field text. Batch replies use the app named by custom_id;
+    plain /v1/messages replies can't know the app, so they use one picked
+    from a hash of the first image (fine for latency/usage testing).
+
+    Usage is echoed like the real API, including prompt caching: system
+    blocks up to the last cache_control breakpoint form the cached prefix
+    (~4 chars/token). If the prefix reaches --cache-min-tokens (the model's
+    minimum cacheable length, 1024 for Sonnet), the first request reports
+    cache_creation_input_tokens and later ones within 5 minutes report
+    cache_read_input_tokens; shorter prefixes are never cached.
+
+    Requests with "stream": true get the reply as server-sent events
+    (message_start, text deltas of --stream-chunk characters spread over
+    the latency, message_delta, message_stop), for process_labels.py
+    --stream.
+
+    Batches report "in_progress" until --batch-seconds have elapsed, then
+    "ended". State lives in memory, so the processor can be killed and
+    restarted mid-batch while this server keeps running — the way to
+    exercise batch resume.
+
+Inputs:
+    - data/applications.tsv: Field text for each ttbId (custom_id)
+    - Command line: --port, --batch-seconds, --error-rate, --latency,
+      --slow-rate, --retry-after, --cache-min-tokens, --stream-chunk
+
+Actions:
+    - POST /v1/messages                       Single message (after --latency seconds,
+                                              10x for --slow-rate of them; 529s for --error-rate;
+                                              SSE when the body has "stream": true)
+    - POST /v1/messages/batches               Create a batch
+    - GET  /v1/messages/batches/{id}          Batch status + request counts
+    - GET  /v1/messages/batches/{id}/results  JSONL results once ended
+
+Outputs:
+    - JSON / JSONL responses shaped like the real API
+
+Usage:
+    cd scripts && python3 tools/stub_anthropic_server.py --port 9082 --batch-seconds 10
+    cd scripts && python3 tools/stub_anthropic_server.py --port 9083 --latency 1.5 --cache-min-tokens 512
+    ANTHROPIC_BASE_URL=http://localhost:9082 ANTHROPIC_API_KEY=stub \\
+        python3 batchProcessor/process_labels.py --batch-api --poll-interval 2
+
+Created: February 2026
+"""
+
+import argparse
+import csv
+import hashlib
+import http.server
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_DIR
+
+TSV_PATH = os.path.join(DATA_DIR, "applications.tsv")
+
+# Which applications.tsv column answers each extracted field
+FIELD_COLUMNS = {
+    "brandName": "brandName",
+    "fancifulName": "fancifulName",
+    "alcoholContent": "alcoholContent",
+    "netContents": "netContents",
+    "classTypeCode": "classTypeDesc",
+    "bottlerName": "applicantName",
+    "bottlerAddress": "applicantAddress",
+    "wineVintage": "wineVintage",
+    "grapeVarietal": "grapeVarietal",
+    "wineAppellation": "wineAppellation",
+    "ageStatement": "ageStatement",
+}
+
+GOVERNMENT_WARNING = (
+    "GOVERNMENT WARNING: (1) ACCORDING TO THE SURGEON GENERAL, WOMEN SHOULD NOT DRINK "
+    "ALCOHOLIC BEVERAGES DURING PREGNANCY BECAUSE OF THE RISK OF BIRTH DEFECTS. (2) CONSUMPTION "
+    "OF ALCOHOLIC BEVERAGES IMPAIRS YOUR ABILITY TO DRIVE A CAR OR OPERATE MACHINERY, AND MAY "
+    "CAUSE HEALTH PROBLEMS."
+)
+
+batches = {}
+batches_lock = threading.Lock()
+settings = {"batch_seconds": 10.0, "error_rate": 0.0, "model": "claude-stub", "latency": 0.0,
+            "cache_min_tokens": 1024, "slow_rate": 0.0, "retry_after": 0.0, "stream_chunk": 24}
+
+# Prompt cache: prefix hash → last use time (entries live 5 minutes)
+CACHE_TTL_SECONDS = 300
+prompt_cache = {}
+prompt_cache_lock = threading.Lock()
+
+
+def load_truth() -> dict:
+    """Map ttbId → application row from applications.tsv."""
+    if not os.path.exists(TSV_PATH):
+        return {}
+    with open(TSV_PATH, "r", encoding="utf-8") as f:
+        return {row["ttbId"].strip(): row for row in csv.DictReader(f, delimiter="\t") if row.get("ttbId")}
+
+
+TRUTH = load_truth()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def fields_for(custom_id: str) -> list[dict]:
+    """Build a plausible Vision reply for one application."""
+    row = TRUTH.get(custom_id, {})
+    fields = []
+    for field_name, column in FIELD_COLUMNS.items():
+        text = (row.get(column) or "").strip()
+        if text:
+            fields.append({"field_name": field_name, "extracted_text": text, "image_side": "front", "confidence": 0.95})
+    fields.append({"field_name": "governmentWarning", "extracted_text": GOVERNMENT_WARNING,
+                   "image_side": "back", "confidence": 0.95})
+    return fields
+
+
+def _tokens(value) -> int:
+    """Rough token count of a request fragment: ~4 chars/token, ~1600 per image."""
+    if isinstance(value, str):
+        return len(value) // 4
+    if isinstance(value, list):
+        return sum(_tokens(v) for v in value)
+    if isinstance(value, dict):
+        if value.get("type") == "image":
+            return 1600
+        return _tokens(value.get("text", "")) + _tokens(value.get("content", ""))
+    return 0
+
+
+def usage_for(params: dict) -> dict:
+    """input / cache_read / cache_creation tokens for a messages.create() body."""
+    system = params.get("system") or []
+    if isinstance(system, str):
+        system = [{"type": "text", "text": system}]
+    total = _tokens(system) + _tokens(params.get("messages", []))
+
+    # Cached prefix: system blocks through the last cache_control breakpoint
+    breakpoint = max((i for i, block in enumerate(system) if block.get("cache_control")), default=-1)
+    prefix = system[:breakpoint + 1]
+    prefix_tokens = _tokens(prefix)
+    usage = {"input_tokens": total, "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+    if not prefix or prefix_tokens < settings["cache_min_tokens"]:
+        return usage
+
+    key = hashlib.sha256(json.dumps([params.get("model"), prefix], sort_keys=True).encode()).hexdigest()
+    now = time.time()
+    with prompt_cache_lock:
+        hit = now - prompt_cache.get(key, 0) < CACHE_TTL_SECONDS
+        prompt_cache[key] = now
+    usage["cache_read_input_tokens" if hit else "cache_creation_input_tokens"] = prefix_tokens
+    usage["input_tokens"] = total - prefix_tokens
+    return usage
+
+
+def app_for_images(params: dict) -> str:
+    """Pick a stable ttbId for a single message from its first image's bytes."""
+    for message in params.get("messages", []):
+        for block in message.get("content", []) if isinstance(message.get("content"), list) else []:
+            if block.get("type") == "image":
+                digest = hashlib.sha256(block["source"].get("data", "").encode()).digest()
+                ids = sorted(TRUTH)
+                return ids[int.from_bytes(digest[:4], "big") % len(ids)] if ids else ""
+    return ""
+
+
+def make_message(custom_id: str, usage: dict | None = None) -> dict:
+    text = json.dumps(fields_for(custom_id), indent=2)
+    usage = usage or {"input_tokens": 3000}
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": settings["model"],
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": usage["input_tokens"],
+            "cache_read_input_tokens": usage.get("cache_read_input_tokens", 0),
+            "cache_creation_input_tokens": usage.get("cache_creation_input_tokens", 0),
+            "output_tokens": len(text) // 4,
+        },
+    }
+
+
+def batch_json(batch: dict, base_url: str) -> dict:
+    ended = time.time() - batch["created"] >= settings["batch_seconds"]
+    n = len(batch["results"])
+    errored = sum(1 for r in batch["results"] if r["result"]["type"] == "errored")
+    return {
+        "id": batch["id"],
+        "type": "message_batch",
+        "processing_status": "ended" if ended else "in_progress",
+        "request_counts": {
+            "processing": 0 if ended else n,
+            "succeeded": n - errored if ended else 0,
+            "errored": errored if ended else 0,
+            "canceled": 0,
+            "expired": 0,
+        },
+        "created_at": batch["created_at"],
+        "expires_at": batch["created_at"],
+        "ended_at": _now() if ended else None,
+        "cancel_initiated_at": None,
+        "archived_at": None,
+        "results_url": f"{base_url}/v1/messages/batches/{batch['id']}/results" if ended else None,
+    }
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    def send_json(self, data, status=200, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stream(self, message: dict, seconds: float):
+        """Send a message as SSE events, first text after ~30% of `seconds`, the rest spread out."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def event(name: str, data: dict):
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+        text = message["content"][0]["text"]
+        size = max(1, settings["stream_chunk"])
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        usage = dict(message["usage"], output_tokens=1)
+        event("message_start", {"type": "message_start", "message": dict(message, content=[], usage=usage,
+                                                                         stop_reason=None)})
+        event("content_block_start", {"type": "content_block_start", "index": 0,
+                                      "content_block": {"type": "text", "text": ""}})
+        time.sleep(seconds * 0.3)
+        for chunk in chunks:
+            time.sleep(seconds * 0.7 / len(chunks))
+            event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                          "delta": {"type": "text_delta", "text": chunk}})
+        event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        event("message_delta", {"type": "message_delta",
+                                "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                                "usage": {"output_tokens": message["usage"]["output_tokens"]}})
+        event("message_stop", {"type": "message_stop"})
+
+    def base_url(self) -> str:
+        return f"http://{self.headers.get('Host', 'localhost')}"
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path == "/v1/messages":
+            body = self.read_json()
+            slow = random.random() < settings["slow_rate"]
+            seconds = settings["latency"] * (10 if slow else 1)
+            if random.random() < settings["error_rate"]:
+                time.sleep(seconds)
+                headers = {"retry-after": f"{settings['retry_after']:g}"} if settings["retry_after"] else None
+                self.send_json({"type": "error", "error": {
+                    "type": "overloaded_error", "message": "Stub: simulated error"}}, 529, headers)
+                return
+            message = make_message(app_for_images(body), usage_for(body))
+            if body.get("stream"):
+                self.send_stream(message, seconds)
+                return
+            time.sleep(seconds)
+            self.send_json(message)
+        elif path == "/v1/messages/batches":
+            body = self.read_json()
+            batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+            results = []
+            for req in body.get("requests", []):
+                if random.random() < settings["error_rate"]:
+                    result = {"type": "errored", "error": {"type": "error", "error": {
+                        "type": "overloaded_error", "message": "Stub: simulated error"}}}
+                else:
+                    result = {"type": "succeeded",
+                              "message": make_message(req["custom_id"], usage_for(req.get("params", {})))}
+                results.append({"custom_id": req["custom_id"], "result": result})
+            batch = {"id": batch_id, "created": time.time(), "created_at": _now(), "results": results}
+            with batches_lock:
+                batches[batch_id] = batch
+            print(f"[stub] batch {batch_id}: {len(results)} requests")
+            self.send_json(batch_json(batch, self.base_url()))
+        else:
+            self.send_json({"type": "error", "error": {"type": "not_found_error", "message": path}}, 404)
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        # v1 / messages / batches / {id} [/ results]
+        if len(parts) >= 4 and parts[:3] == ["v1", "messages", "batches"]:
+            with batches_lock:
+                batch = batches.get(parts[3])
+            if batch is None:
+                self.send_json({"type": "error", "error": {"type": "not_found_error", "message": parts[3]}}, 404)
+                return
+            if len(parts) == 5 and parts[4] == "results":
+                body = "\n".join(json.dumps(r) for r in batch["results"]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/binary")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self.send_json(batch_json(batch, self.base_url()))
+        else:
+            self.send_json({"type": "error", "error": {"type": "not_found_error", "message": self.path}}, 404)
+
+    def log_message(self, format, *args):
+        print(f"[stub] {args[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Anthropic API")
+    parser.add_argument("--port", "-p", type=int, default=9082, help="Port to listen on (default: 9082)")
+    parser.add_argument("--batch-seconds", type=float, default=10, help="Seconds until a batch ends (default: 10)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that error (default: 0)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each /v1/messages reply (default: 0)")
+    parser.add_argument("--slow-rate", type=float, default=0.0,
+                        help="Fraction of /v1/messages replies that take 10x --latency (default: 0)")
+    parser.add_argument("--retry-after", type=float, default=0.0,
+                        help="Retry-After seconds sent with simulated 529s (default: none)")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024,
+                        help="Minimum cacheable prompt prefix in tokens (default: 1024)")
+    parser.add_argument("--stream-chunk", type=int, default=24,
+                        help="Characters per streamed text delta (default: 24)")
+    args = parser.parse_args()
+
+    settings["batch_seconds"] = args.batch_seconds
+    settings["error_rate"] = args.error_rate
+    settings["latency"] = args.latency
+    settings["cache_min_tokens"] = args.cache_min_tokens
+    settings["slow_rate"] = args.slow_rate
+    settings["retry_after"] = args.retry_after
+    settings["stream_chunk"] = args.stream_chunk
+
+    print(f"Stub Anthropic API on http://localhost:{args.port} ({len(TRUTH)} applications loaded)")
+    print(f"  export ANTHROPIC_BASE_URL=http://localhost:{args.port} ANTHROPIC_API_KEY=stub")
+
+    server = http.server.ThreadingHTTPServer(("", args.port), StubHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
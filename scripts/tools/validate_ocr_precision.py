@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Validate the int8 EasyOCR reader against fp32 on the fixture labels.
+
+===============================================================================
+TAKE-HOME PROJECT FOR IT SPECIALIST POSITION
+AI-Powered Alcohol Label Verification App
+Michael Douma, February 2026
+Developed with AI assistance (Claude)
+===============================================================================
+
+Description:
+    OCR_PRECISION selects fp32 or int8 (dynamically quantized) EasyOCR
+    weights (see batchProcessor/ocr_reader.py). This tool loads both
+    readers in one process and runs every fixture label through each,
+    reporting what the switch costs in accuracy and buys in speed:
+
+        speed        readtext() time per label (best of --repeat, the two
+                     readers alternating), total and per app, and the
+                     speedup of int8 over fp32
+        match score  each app's expected fields (from applications.tsv, as
+                     the stub Vision server replies) are matched to each
+                     reader's OCR with match_fields(), and the matched
+                     regions' text is scored against the field text with
+                     verify_extractions.match_score()
+        delta        int8 score minus fp32 score per field and on average,
+                     the fields that moved more than --tolerance, and how
+                     many fields were matched to different regions
+
+    The OCR cache is bypassed, so both readers really run. Exits 1 if the
+    mean match score drops by more than --max-drop.
+
+Inputs:
+    - data/applications.tsv, htdocs/ttb-external/images/ (fixture labels)
+    - EasyOCR fp32 weights and data/ocr_models/ (int8 cache, built if missing)
+    - Command line: --limit, --only, --repeat, --tolerance, --max-drop,
+      --top, --out
+
+Outputs:
+    - Console: load times, int8 layer counts, per-app time and score,
+      summary of speedup and score delta
+    - JSON report (with --out)
+
+Usage:
+    cd scripts && python3 tools/validate_ocr_precision.py
+    cd scripts && python3 tools/validate_ocr_precision.py --limit 10 --repeat 3
+    cd scripts && python3 tools/validate_ocr_precision.py --out ../data/benchmarks/ocr-precision.json
+
+Created: February 2026
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+from batchProcessor import ocr_reader
+from batchProcessor.label_images import LabelImage
+from batchProcessor.ocr_batcher import readtext_rgb
+from batchProcessor.process_labels import image_paths, match_fields
+from batchProcessor.verify_extractions import match_score
+from stub_anthropic_server import TRUTH, fields_for
+
+PRECISIONS = ["fp32", "int8"]
+
+
+# ── OCR ──
+
+def load_readers() -> dict:
+    """Both readers, with their load times printed (int8 after fp32, so the weights are on disk)."""
+    readers = {}
+    for precision in PRECISIONS:
+        cached = precision == "int8" and os.path.exists(ocr_reader.quantized_path())
+        start = time.perf_counter()
+        readers[precision] = ocr_reader.new_reader(precision)
+        note = ""
+        if precision == "int8":
+            layers = ocr_reader.quantized_layers(readers[precision])
+            source = "loaded from cache" if cached else "quantized and cached"
+            note = f" ({source}; int8 layers: recognizer {layers['recognizer']}, detector {layers['detector']})"
+        print(f"  {precision}: {time.perf_counter() - start:.1f}s{note}")
+    return readers
+
+
+def to_items(results) -> list[dict]:
+    """readtext() output as the pipeline's {text, bbox_polygon, confidence} items."""
+    return [
+        {"text": text, "bbox_polygon": [[int(p) for p in pt] for pt in bbox], "confidence": float(conf)}
+        for bbox, text, conf in results
+    ]
+
+
+def ocr_both(readers: dict, path: str | None, repeat: int) -> tuple[dict, dict]:
+    """(items, best seconds) per precision for one label image."""
+    items = {p: [] for p in PRECISIONS}
+    seconds = {p: 0.0 for p in PRECISIONS}
+    if not path or not os.path.exists(path):
+        return items, seconds
+    label = LabelImage(path)
+    try:
+        rgb = label.rgb_array()
+        best = {p: float("inf") for p in PRECISIONS}
+        for run in range(max(1, repeat)):
+            # Alternate which reader goes first, so neither always gets warm caches
+            for precision in PRECISIONS if run % 2 == 0 else PRECISIONS[::-1]:
+                start = time.perf_counter()
+                results = readtext_rgb(readers[precision], [rgb])[0]
+                best[precision] = min(best[precision], time.perf_counter() - start)
+                items[precision] = to_items(results)
+        return items, best
+    finally:
+        label.close()
+
+
+# ── Match scores ──
+
+def field_scores(fields: list[dict], front_path: str | None, back_path: str | None,
+                 front_ocr: list[dict], back_ocr: list[dict]) -> dict:
+    """field_index → (score, regions) for each verified field, as process_labels would match it."""
+    ocr = {"front": front_ocr, "back": back_ocr}
+    scores = {}
+    for decision in match_fields(fields, front_path, back_path, front_ocr, back_ocr):
+        items = ocr[decision["source"]]
+        text = " ".join(items[r]["text"] for r in decision["regions"])
+        extracted = fields[decision["field_index"]].get("extracted_text", "")
+        scores[decision["field_index"]] = (match_score(extracted, text), (decision["source"], decision["regions"]))
+    return scores
+
+
+def validate_app(readers: dict, ttb_id: str, row: dict, repeat: int) -> dict:
+    front_path, back_path = image_paths(row.get("labelImageFront", ""), row.get("labelImageBack", ""))
+    front_items, front_s = ocr_both(readers, front_path, repeat)
+    back_items, back_s = ocr_both(readers, back_path, repeat)
+
+    fields = fields_for(ttb_id)
+    scored = {
+        p: field_scores(fields, front_path, back_path, front_items[p], back_items[p])
+        for p in PRECISIONS
+    }
+    per_field = []
+    for i in sorted(scored["fp32"]):
+        fp32_score, fp32_regions = scored["fp32"][i]
+        int8_score, int8_regions = scored["int8"][i]
+        per_field.append({
+            "field_name": fields[i]["field_name"],
+            "fp32": fp32_score,
+            "int8": int8_score,
+            "same_regions": fp32_regions == int8_regions,
+        })
+    return {
+        "ttbId": ttb_id,
+        "seconds": {p: front_s[p] + back_s[p] for p in PRECISIONS},
+        "fields": per_field,
+    }
+
+
+# ── Report ──
+
+def mean(values: list[float]) -> float:
+    return statistics.fmean(values) if values else 0.0
+
+
+def print_app(app: dict):
+    fp32_s, int8_s = app["seconds"]["fp32"], app["seconds"]["int8"]
+    speedup = fp32_s / int8_s if int8_s else 0.0
+    fp32_score = mean([f["fp32"] for f in app["fields"]])
+    int8_score = mean([f["int8"] for f in app["fields"]])
+    print(f"{app['ttbId']:<18}{len(app['fields']):>7}{fp32_s * 1000:>10.0f}{int8_s * 1000:>10.0f}"
+          f"{speedup:>8.2f}x{fp32_score:>9.3f}{int8_score:>9.3f}{int8_score - fp32_score:>+9.3f}")
+
+
+def print_summary(apps: list[dict], tolerance: float, top: int) -> float:
+    """Print totals and the fields that moved most; returns the mean score delta."""
+    fields = [dict(f, ttbId=app["ttbId"]) for app in apps for f in app["fields"]]
+    totals = {p: sum(app["seconds"][p] for app in apps) for p in PRECISIONS}
+    speedup = totals["fp32"] / totals["int8"] if totals["int8"] else 0.0
+    scores = {p: mean([f[p] for f in fields]) for p in PRECISIONS}
+    delta = scores["int8"] - scores["fp32"]
+    moved = sorted((f for f in fields if abs(f["int8"] - f["fp32"]) > tolerance),
+                   key=lambda f: f["int8"] - f["fp32"])
+
+    print(f"\nOCR time:    fp32 {totals['fp32']:.1f}s, int8 {totals['int8']:.1f}s ({speedup:.2f}x)")
+    print(f"Match score: fp32 {scores['fp32']:.3f}, int8 {scores['int8']:.3f} (delta {delta:+.3f}) "
+          f"over {len(fields)} fields")
+    print(f"Regions:     {sum(1 for f in fields if not f['same_regions'])} of {len(fields)} fields "
+          f"matched to different OCR regions")
+    print(f"Moved > {tolerance:.2f}: {len(moved)} fields")
+    for f in moved[:top]:
+        print(f"  {f['ttbId']} {f['field_name']}: {f['fp32']:.0%} → {f['int8']:.0%}")
+    return delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare int8 and fp32 EasyOCR on the fixture labels")
+    parser.add_argument("--limit", type=int, default=0, help="Only the first N apps (default: all)")
+    parser.add_argument("--only", help="Comma-separated ttbIds to check")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per image per reader, best kept (default: 1)")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="List fields whose score moved more than this (default: 0.05)")
+    parser.add_argument("--max-drop", type=float, default=0.02,
+                        help="Fail if the mean match score drops by more than this (default: 0.02)")
+    parser.add_argument("--top", type=int, default=10, help="Moved fields to list (default: 10)")
+    parser.add_argument("--out", help="Write the per-app results as JSON")
+    args = parser.parse_args()
+
+    ttb_ids = list(TRUTH)
+    if args.only:
+        ttb_ids = [t.strip() for t in args.only.split(",") if t.strip()]
+        unknown = [t for t in ttb_ids if t not in TRUTH]
+        if unknown:
+            parser.error(f"not in applications.tsv: {', '.join(unknown)}")
+    if args.limit:
+        ttb_ids = ttb_ids[:args.limit]
+    if not ttb_ids:
+        print("No fixture applications found (data/applications.tsv)")
+        sys.exit(1)
+
+    print("Loading readers...")
+    readers = load_readers()
+
+    print(f"\n{'ttbId':<18}{'fields':>7}{'fp32 ms':>10}{'int8 ms':>10}{'speedup':>9}"
+          f"{'fp32':>9}{'int8':>9}{'delta':>9}")
+    apps = []
+    for ttb_id in ttb_ids:
+        app = validate_app(readers, ttb_id, TRUTH[ttb_id], args.repeat)
+        apps.append(app)
+        print_app(app)
+
+    delta = print_summary(apps, args.tolerance, args.top)
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "apps": apps}, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+    if delta < -args.max_drop:
+        print(f"\nint8 mean match score dropped by {-delta:.3f} (more than --max-drop {args.max_drop})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()